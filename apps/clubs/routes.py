@@ -16,7 +16,7 @@ import logging
 logger = logging.getLogger("uvicorn.error")
 router = APIRouter(prefix="/clubs", tags=["Clubs"])
 
-# TODO(search): при добавлении delete-эндпоинта клуба вызывать SearchService.delete_point("club", club_id) после commit.
+# TODO(search): при добавлении delete-эндпоинта клуба вызывать SearchOutboxService.enqueue(db, "club", club_id) до commit.
 
 
 # === PUBLIC ENDPOINTS ===
@@ -4,7 +4,7 @@ from sqlalchemy import select, update, or_
 from pwdlib import PasswordHash
 from apps.clubs.models import Club
 from apps.clubs.schemas import ClubCreate, ClubUpdate
-from apps.search.service import SearchService
+from apps.search.outbox import SearchOutboxService
 from apps.users.models import UserRole
 
 # Настройка хеширования (обычно выносится в core.security)
@@ -37,9 +37,10 @@ class ClubService:
                 edu_org_id=schema.edu_org_id,
             )
             db.add(club)
+            await db.flush()
+            SearchOutboxService.enqueue(db, "club", club.id)
             await db.commit()
             await db.refresh(club)
-            await SearchService.upsert_single(SearchService.club_payload(club))
             return club
         except Exception as e:
             print(e)
@@ -88,7 +89,7 @@ class ClubService:
         for key, value in update_data.items():
             setattr(club, key, value)
 
+        SearchOutboxService.enqueue(db, "club", club.id)
         await db.commit()
         await db.refresh(club)
-        await SearchService.upsert_single(SearchService.club_payload(club))
         return club
@@ -19,7 +19,10 @@ from apps.reviews.models import ClubReview, OrganizationReview
 from apps.ratings.models import ClubRating, OrganizationRating
 from apps.clubs.edu_orgs.models import EducationalOrganization
 # 4. Search tracking
-from apps.search.models import SearchEvent, ClickEvent, UserSearchProfile
+from apps.search.models import (
+    SearchEvent, ClickEvent, SearchQueryHourly, SearchClickHourly, SearchPositionHourly, UserSearchProfile, ReindexJob,
+    SearchOutboxEntry
+)
 from apps.employment.enums import *
 from apps.employment.models import (
     TgInfo, CandidateProfile, Vacancy, ClubMember, EmploymentReaction, EmploymentMatch, CandidateProfileHistory
@@ -4,14 +4,17 @@ import json
 import logging
 import re
 from hashlib import sha512
-from typing import Any
-from google.genai import types
+from typing import TYPE_CHECKING, Any
 import httpx
-from google import genai
 
+if TYPE_CHECKING:
+    from google import genai
 
 
 def _build_genai_client() -> genai.Client:
+    # google.genai is slow to import and only needed when an explanation is generated.
+    from google import genai
+
     return genai.Client(api_key=settings.GEMINI_API_KEY)
 from apps.core.settings import settings
 from apps.employment.enums import MatchConfidence
@@ -107,6 +110,8 @@ class EmploymentAIService:
             "language must be one of: ru, kk, en, multi."
         )
 
+        from google.genai import types
+
         client = _build_genai_client()
 
         try:
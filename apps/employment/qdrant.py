@@ -4,8 +4,6 @@ import logging
 import uuid
 from typing import Any
 
-from qdrant_client.http.models import Distance, PointStruct, VectorParams
-
 from apps.employment.ai_service import EmploymentAIService
 from apps.search.qdrant_client import get_qdrant_client, search_points
 from apps.core.settings import settings
@@ -17,6 +15,8 @@ def _employment_point_uuid(entity_type: str, entity_id: int) -> str:
     return str(uuid.uuid5(uuid.NAMESPACE_URL, f"employment:{entity_type}:{entity_id}"))
 
 async def ensure_employment_collection() -> bool:
+    from qdrant_client.http.models import Distance, VectorParams
+
     client = get_qdrant_client()
     try:
         exists = await client.collection_exists(settings.EMPLOYMENT_QDRANT_COLLECTION)
@@ -34,6 +34,8 @@ async def ensure_employment_collection() -> bool:
 async def upsert_candidate_vector(candidate_id: int, payload: dict[str, Any]) -> None:
     if not await ensure_employment_collection():
         return
+    from qdrant_client.http.models import PointStruct
+
     client = get_qdrant_client()
     vector = EmploymentAIService.vectorize(payload)
     await client.upsert(
@@ -51,6 +53,8 @@ async def upsert_candidate_vector(candidate_id: int, payload: dict[str, Any]) ->
 async def upsert_vacancy_vector(vacancy_id: int, payload: dict[str, Any]) -> None:
     if not await ensure_employment_collection():
         return
+    from qdrant_client.http.models import PointStruct
+
     client = get_qdrant_client()
     vector = EmploymentAIService.vectorize(payload)
     await client.upsert(
@@ -19,7 +19,7 @@ from apps.funding.services import CampaignService, InvestmentService
 
 router = APIRouter(prefix="/funding", tags=["Funding"])
 
-# TODO(search): при добавлении delete-эндпоинта кампании вызывать SearchService.delete_point("campaign", campaign_id) после commit.
+# TODO(search): при добавлении delete-эндпоинта кампании вызывать SearchOutboxService.enqueue(db, "campaign", campaign_id) до commit.
 
 # ==========================================
 # 1. CAMPAIGNS
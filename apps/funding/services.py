@@ -6,7 +6,7 @@ from sqlalchemy import select, desc, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from apps.funding.models import Campaign, Investment, CampaignStatus, InvestmentStatus
-from apps.search.service import SearchService
+from apps.search.outbox import SearchOutboxService
 from apps.funding.schemas import CampaignCreate, CampaignUpdate, InvestmentCreate
 
 
@@ -19,9 +19,10 @@ class CampaignService:
             status=CampaignStatus.DRAFT
         )
         db.add(campaign)
+        await db.flush()
+        SearchOutboxService.enqueue(db, "campaign", campaign.id)
         await db.commit()
         await db.refresh(campaign)
-        await SearchService.upsert_single(SearchService.campaign_payload(campaign))
         return campaign
 
     @staticmethod
@@ -110,9 +111,9 @@ class CampaignService:
         for key, value in update_data.items():
             setattr(campaign, key, value)
 
+        SearchOutboxService.enqueue(db, "campaign", campaign.id)
         await db.commit()
         await db.refresh(campaign)
-        await SearchService.upsert_single(SearchService.campaign_payload(campaign))
 
         # Чтобы вернуть красивый ответ с суммой, можно снова вызвать get_by_id
         # или просто вернуть объект (current_amount будет 0 или старым, если не пересчитать)
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from apps.news.models import News
 from apps.news.schemas import NewsCreate, NewsUpdate
+from apps.search.outbox import SearchOutboxService
 
 
 class NewsService:
@@ -17,6 +18,8 @@ class NewsService:
             published_at=datetime.utcnow() if schema.is_published else None
         )
         db.add(news)
+        await db.flush()
+        SearchOutboxService.enqueue(db, "news", news.id)
         await db.commit()
         await db.refresh(news)
         return news
@@ -59,6 +62,7 @@ class NewsService:
         for key, value in update_data.items():
             setattr(news, key, value)
 
+        SearchOutboxService.enqueue(db, "news", news.id)
         await db.commit()
         await db.refresh(news)
         return news
@@ -70,5 +74,6 @@ class NewsService:
             return False
 
         await db.delete(news)
+        SearchOutboxService.enqueue(db, "news", news_id)
         await db.commit()
         return True
@@ -0,0 +1,302 @@
+"""Offline benchmarks for the search stack.
+
+    python -m apps.search.bench embeddings [--corpus texts.txt] [--min-cosine 0.99]
+    python -m apps.search.bench personalization [--clicks 50] [--hits 500] [--pools 50 200 500]
+    python -m apps.search.bench local-index [--docs 100000] [--dim 384]
+
+Each subcommand prints a JSON report; a failed parity check exits with code 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from apps.search.config import get_search_settings
+
+SAMPLE_TEXTS = [
+    "IT клуб программирования для школьников Алматы",
+    "Шахматный клуб, турниры по выходным",
+    "Футбольная секция для детей 7-12 лет",
+    "Сбор средств на оборудование для робототехники",
+    "Кампания по поддержке студенческого стартапа",
+    "Новости: открытие нового клуба английского языка в Астане",
+    "Клуб любителей настольных игр",
+    "Art studio: painting and drawing classes for teenagers",
+    "Debate club preparing for the national championship",
+    "Музыкальная школа: гитара, фортепиано, вокал",
+    "Волонтерский клуб помощи приютам для животных",
+    "Crowdfunding campaign for a community garden",
+    "Клуб 222: программирование на Python",
+    "Курсы подготовки к олимпиадам по математике",
+    "Танцевальная студия современной хореографии",
+    "Результаты городского турнира по шахматам",
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_calls(fn: Callable[[], Any], repeats: int) -> list[float]:
+    """Wall-clock milliseconds of each call."""
+    timings: list[float] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def latency_summary(timings_ms: list[float]) -> dict[str, float]:
+    return {
+        "p50_ms": round(percentile(timings_ms, 50), 3),
+        "p95_ms": round(percentile(timings_ms, 95), 3),
+        "mean_ms": round(statistics.fmean(timings_ms), 3) if timings_ms else 0.0,
+    }
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> dict[str, float]:
+    """Row-wise cosine similarity between two embedding matrices of the same texts."""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = np.sum(reference * candidate, axis=1)
+    return {
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "min_cosine": round(float(cosines.min()), 6),
+    }
+
+
+def load_corpus(path: str | None) -> list[str]:
+    if not path:
+        return list(SAMPLE_TEXTS)
+    with open(path, encoding="utf-8") as handle:
+        return [line.strip() for line in handle if line.strip()]
+
+
+def bench_embeddings(args: argparse.Namespace) -> int:
+    from apps.search.embeddings import load_embedding_model
+
+    texts = load_corpus(args.corpus)
+    report: dict[str, Any] = {"model": get_search_settings().EMBEDDING_MODEL_NAME, "texts": len(texts), "backends": {}}
+    matrices: dict[str, np.ndarray] = {}
+
+    for backend in args.backends:
+        started = time.perf_counter()
+        model = load_embedding_model(backend)
+        load_seconds = time.perf_counter() - started
+
+        def encode(batch: list[str], model=model) -> np.ndarray:
+            return model.encode(batch, normalize_embeddings=True, batch_size=args.batch_size)
+
+        matrices[backend] = encode(texts)
+        single = time_calls(lambda: encode([texts[0]]), args.repeats * 10)
+        full = time_calls(lambda: encode(texts), args.repeats)
+        report["backends"][backend] = {
+            "load_seconds": round(load_seconds, 3),
+            "dimension": int(matrices[backend].shape[1]),
+            "single_query": latency_summary(single),
+            "corpus": latency_summary(full),
+            "texts_per_second": round(len(texts) / (statistics.fmean(full) / 1000), 1),
+        }
+
+    exit_code = 0
+    if "torch" in matrices and "onnx" in matrices:
+        parity = cosine_agreement(matrices["torch"], matrices["onnx"])
+        parity["min_required"] = args.min_cosine
+        parity["passed"] = matrices["torch"].shape == matrices["onnx"].shape and parity["min_cosine"] >= args.min_cosine
+        report["parity"] = parity
+        exit_code = 0 if parity["passed"] else 1
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return exit_code
+
+
+def bench_personalization(args: argparse.Namespace) -> int:
+    from apps.search import personalization
+    from apps.search.personalization import BonusWeights
+
+    if personalization.np is None:
+        print(json.dumps({"error": "numpy is not installed"}))
+        return 1
+
+    rng = np.random.default_rng(args.seed)
+    vectors = rng.standard_normal((args.clicks, args.dim)).tolist()
+    click_weights = personalization.decay_weights(rng.uniform(0, 60, args.clicks).tolist(), half_life_days=14)
+
+    types = ["club", "campaign", "news", "organization"]
+    cities = ["Almaty", "Astana", "Shymkent", "Karaganda", None]
+    categories = ["IT", "Sport", "Music", "Art", "Science", None]
+
+    def make_hits(count: int) -> list[dict[str, Any]]:
+        # Sorted best first, as Qdrant returns them.
+        return [
+            {
+                "type": types[index % len(types)],
+                "city": cities[index % len(cities)],
+                "category": categories[index % len(categories)],
+                "score": float(score),
+                "position": index,
+            }
+            for index, score in enumerate(np.sort(rng.uniform(0.2, 0.9, count))[::-1])
+        ]
+
+    hits = make_hits(args.hits)
+    preferences = {
+        "top_cities": ["Almaty", "Astana"],
+        "top_categories": ["IT", "Science"],
+        "top_types": ["club"],
+        "type_counts": {"club": 12, "campaign": 3},
+    }
+    weights = BonusWeights()
+
+    report: dict[str, Any] = {"clicks": args.clicks, "dim": args.dim, "hits": args.hits, "top_k": args.top_k}
+    numpy_timings = time_calls(lambda: personalization.build_profile_vector(vectors, click_weights), args.repeats)
+    python_timings = time_calls(
+        lambda: personalization._build_profile_vector_python(vectors, click_weights), args.repeats
+    )
+    report["profile_vector"] = {
+        "numpy": latency_summary(numpy_timings),
+        "python": latency_summary(python_timings),
+        "speedup": round(statistics.fmean(python_timings) / statistics.fmean(numpy_timings), 2),
+    }
+    # Reranking rewrites "score" in place; the drift across repeats does not matter for timing.
+    report["rerank"] = latency_summary(
+        time_calls(
+            lambda: personalization.rerank_results(
+                hits, "member", preferences, weights, role_boost=True, top_k=args.top_k
+            ),
+            args.repeats,
+        )
+    )
+
+    # Candidate pools for over-fetching: the rerank cost per request and how many of the final
+    # top_k come from beyond the first top_k vector hits, i.e. what a top_k-only rerank would miss.
+    report["pools"] = {}
+    for pool in args.pools:
+        pool_hits = make_hits(pool)
+        ranked = personalization.rerank_results(
+            [dict(hit) for hit in pool_hits], "member", preferences, weights, role_boost=True, top_k=args.top_k
+        )
+        report["pools"][str(pool)] = {
+            "rerank": latency_summary(
+                time_calls(
+                    lambda pool_hits=pool_hits: personalization.rerank_results(
+                        pool_hits, "member", preferences, weights, role_boost=True, top_k=args.top_k
+                    ),
+                    args.repeats,
+                )
+            ),
+            "promoted_from_beyond_top_k": sum(hit["position"] >= args.top_k for hit in ranked),
+        }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+def bench_local_index(args: argparse.Namespace) -> int:
+    from apps.search.local_index import LocalVectorIndex
+
+    rng = np.random.default_rng(args.seed)
+    vectors = rng.standard_normal((args.docs, args.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    types = ["club", "campaign", "news", "organization"]
+    cities = [f"city-{index}" for index in range(40)]
+    payloads = [
+        {
+            "doc_id": f"doc-{index}",
+            "type": types[index % len(types)],
+            "entity_id": index,
+            "title": f"Document {index}",
+            "snippet": "Synthetic benchmark document",
+            "url": f"/docs/{index}",
+            "city": cities[index % len(cities)],
+        }
+        for index in range(args.docs)
+    ]
+    point_ids = [f"doc-{index}" for index in range(args.docs)]
+    # Queries close to stored documents, like real queries close to their best match.
+    queries = vectors[rng.integers(0, args.docs, args.queries)] + rng.normal(0, 0.05, (args.queries, args.dim))
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, : args.top_k]
+
+    report: dict[str, Any] = {"docs": args.docs, "dim": args.dim, "top_k": args.top_k, "float32_bytes": vectors.nbytes}
+    for dtype in args.dtypes:
+        started = time.perf_counter()
+        index = LocalVectorIndex.build(point_ids, vectors, payloads, dtype=dtype)
+        build_seconds = time.perf_counter() - started
+
+        recalls = []
+        for query, expected in zip(queries, exact):
+            found = {hit.id for hit in index.search(query.tolist(), args.top_k)}
+            recalls.append(len(found & {point_ids[row] for row in expected}) / args.top_k)
+
+        query_list = queries[0].tolist()
+        report[dtype] = {
+            "bytes": index.nbytes(),
+            "vector_bytes": int(index.vectors.nbytes + (index.scales.nbytes if index.scales is not None else 0)),
+            "build_seconds": round(build_seconds, 3),
+            "recall_at_k": round(statistics.fmean(recalls), 4),
+            "query": latency_summary(time_calls(lambda: index.search(query_list, args.top_k), args.repeats)),
+            "filtered_query": latency_summary(
+                time_calls(
+                    lambda: index.search(query_list, args.top_k, filters={"type": "club", "city": "city-4"}),
+                    args.repeats,
+                )
+            ),
+        }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Search benchmarks.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    embeddings = subparsers.add_parser("embeddings", help="Compare embedding backends: latency, throughput, parity.")
+    embeddings.add_argument("--corpus", help="Text file with one document per line; a built-in sample by default.")
+    embeddings.add_argument("--backends", nargs="+", default=["torch", "onnx"], choices=["torch", "onnx"])
+    embeddings.add_argument("--batch-size", type=int, default=32)
+    embeddings.add_argument("--repeats", type=int, default=5)
+    embeddings.add_argument("--min-cosine", type=float, default=0.99)
+    embeddings.set_defaults(handler=bench_embeddings)
+
+    personalization = subparsers.add_parser(
+        "personalization", help="Compare NumPy and pure-Python profile building and reranking."
+    )
+    personalization.add_argument("--clicks", type=int, default=50)
+    personalization.add_argument("--dim", type=int, default=384)
+    personalization.add_argument("--hits", type=int, default=500)
+    personalization.add_argument("--top-k", type=int, default=10)
+    personalization.add_argument("--pools", type=int, nargs="+", default=[50, 200, 500])
+    personalization.add_argument("--repeats", type=int, default=200)
+    personalization.add_argument("--seed", type=int, default=0)
+    personalization.set_defaults(handler=bench_personalization)
+
+    local_index = subparsers.add_parser("local-index", help="Memory and latency of the degraded-mode local index.")
+    local_index.add_argument("--docs", type=int, default=100_000)
+    local_index.add_argument("--dim", type=int, default=384)
+    local_index.add_argument("--dtypes", nargs="+", default=["int8", "float16"], choices=["int8", "float16"])
+    local_index.add_argument("--top-k", type=int, default=10)
+    local_index.add_argument("--queries", type=int, default=50)
+    local_index.add_argument("--repeats", type=int, default=30)
+    local_index.add_argument("--seed", type=int, default=0)
+    local_index.set_defaults(handler=bench_local_index)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
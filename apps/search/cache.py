@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+from apps.search.config import get_search_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def normalize_query(q: str) -> str:
+    return " ".join(q.casefold().split())
+
+
+class TTLCache(Generic[T]):
+    """Per-process LRU cache with a fixed entry cap and time-based expiry."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, T]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> T | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: T) -> None:
+        if self.max_entries == 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: str) -> T | None:
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class QueryVectorCache:
+    """Query text -> embedding cache used by semantic_search.
+
+    Vectors live in a per-process LRU. When ``redis_url`` is set they are also
+    written to Redis so that gunicorn workers share warm entries; Redis errors
+    only degrade the cache to per-process mode.
+    """
+
+    key_prefix = "search:qvec:"
+
+    def __init__(self, model_name: str, max_vectors: int, ttl_seconds: float, redis_url: str | None = None) -> None:
+        self.model_name = model_name
+        self.local: TTLCache[list[float]] = TTLCache(max_entries=max_vectors, ttl_seconds=ttl_seconds)
+        self.redis_url = redis_url
+        self.shared_hits = 0
+        self.shared_errors = 0
+        self._redis: Any = None
+
+    def build_key(self, q: str) -> str:
+        digest = hashlib.sha256(f"{self.model_name}\n{normalize_query(q)}".encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}{digest}"
+
+    def _get_redis(self) -> Any:
+        if self._redis is None and self.redis_url:
+            from redis import asyncio as redis_asyncio
+
+            self._redis = redis_asyncio.from_url(self.redis_url)
+        return self._redis
+
+    async def get(self, q: str) -> list[float] | None:
+        key = self.build_key(q)
+        vector = self.local.get(key)
+        if vector is not None:
+            return vector
+
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            raw = await client.get(key)
+        except Exception:
+            self.shared_errors += 1
+            logger.warning("Shared query-vector cache is unavailable", exc_info=True)
+            return None
+        if not raw:
+            return None
+
+        vector = array("f", raw).tolist()
+        self.shared_hits += 1
+        self.local.set(key, vector)
+        return vector
+
+    async def set(self, q: str, vector: list[float]) -> None:
+        key = self.build_key(q)
+        self.local.set(key, vector)
+
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            await client.set(key, array("f", vector).tobytes(), ex=max(1, int(self.local.ttl_seconds)))
+        except Exception:
+            self.shared_errors += 1
+            logger.warning("Failed to write to shared query-vector cache", exc_info=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.local.stats(),
+            "shared": bool(self.redis_url),
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+        }
+
+
+_query_vector_cache: QueryVectorCache | None = None
+
+
+def get_query_vector_cache() -> QueryVectorCache:
+    global _query_vector_cache
+    if _query_vector_cache is None:
+        settings = get_search_settings()
+        _query_vector_cache = QueryVectorCache(
+            model_name=settings.EMBEDDING_MODEL_NAME,
+            max_vectors=settings.QUERY_CACHE_MAX_VECTORS if settings.QUERY_CACHE_ENABLED else 0,
+            ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS,
+            redis_url=settings.QUERY_CACHE_REDIS_URL if settings.QUERY_CACHE_ENABLED else None,
+        )
+    return _query_vector_cache
+
+
+class SimilarItemsCache:
+    """(source doc_id, filters, top_k) -> similar items for the /similar endpoint.
+
+    Every entry is also registered under the doc_ids it returned, so
+    ``invalidate`` drops it when its source point or any point in its result is
+    upserted or deleted. Invalidation only reaches this process; other workers
+    rely on the TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.local: TTLCache[list[dict[str, Any]]] = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.invalidations = 0
+        self._keys_by_doc_id: dict[str, set[str]] = {}
+
+    @staticmethod
+    def build_key(doc_id: str, filters: dict[str, Any]) -> str:
+        parts = [f"{name}={value}" for name, value in sorted(filters.items()) if value is not None]
+        return "|".join([doc_id, *parts])
+
+    def get(self, doc_id: str, filters: dict[str, Any]) -> list[dict[str, Any]] | None:
+        return self.local.get(self.build_key(doc_id, filters))
+
+    def set(self, doc_id: str, filters: dict[str, Any], items: list[dict[str, Any]]) -> None:
+        if self.local.max_entries == 0:
+            return
+        key = self.build_key(doc_id, filters)
+        self.local.set(key, items)
+        for related in {doc_id, *(item["doc_id"] for item in items if item.get("doc_id"))}:
+            self._keys_by_doc_id.setdefault(related, set()).add(key)
+        if len(self._keys_by_doc_id) > 4 * self.local.max_entries:
+            self._prune()
+
+    def _prune(self) -> None:
+        # LRU evictions leave their keys behind in the reverse map; drop those once it grows too large.
+        live = set(self.local._entries)
+        self._keys_by_doc_id = {
+            doc_id: keys & live for doc_id, keys in self._keys_by_doc_id.items() if keys & live
+        }
+
+    def invalidate(self, doc_ids: list[str]) -> int:
+        dropped = 0
+        for doc_id in doc_ids:
+            for key in self._keys_by_doc_id.pop(str(doc_id), ()):
+                if self.local.pop(key) is not None:
+                    dropped += 1
+        self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        self.local.clear()
+        self._keys_by_doc_id.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.local.stats(), "invalidations": self.invalidations}
+
+
+_similar_cache: SimilarItemsCache | None = None
+
+
+def get_similar_cache() -> SimilarItemsCache:
+    global _similar_cache
+    if _similar_cache is None:
+        settings = get_search_settings()
+        _similar_cache = SimilarItemsCache(
+            max_entries=settings.SIMILAR_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.SIMILAR_CACHE_TTL_SECONDS,
+        )
+    return _similar_cache
+
+
+class SearchResultCache:
+    """Normalized search request -> semantic_search hits, valid for one index version.
+
+    The index version is a counter in Redis and part of every key, so
+    ``bump_version`` (any upsert, delete, reindex or alias switch, in any
+    worker) orphans all cached results at once and they age out of the LRU.
+    Without ``redis_url``, or while Redis is unreachable, there is no version
+    every worker agrees on and results are not stored at all. Degraded results
+    are never stored. Concurrent misses for the same key still share one
+    computation. Callers get copies, since reranking edits scores in place.
+    """
+
+    version_key = "search:index_version"
+
+    def __init__(self, max_entries: int, ttl_seconds: float, redis_url: str | None = None) -> None:
+        self.local: TTLCache[list[dict[str, Any]]] = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.redis_url = redis_url
+        self.coalesced = 0
+        self.shared_errors = 0
+        self._in_flight: dict[str, asyncio.Future[tuple[list[dict[str, Any]], bool]]] = {}
+        self._redis: Any = None
+
+    @staticmethod
+    def build_key(version: str, request: dict[str, Any]) -> str:
+        normalized = {**request, "q": normalize_query(str(request.get("q", "")))}
+        return f"{version}:{json.dumps(normalized, sort_keys=True, ensure_ascii=False)}"
+
+    def _get_redis(self) -> Any:
+        if self._redis is None and self.redis_url:
+            from redis import asyncio as redis_asyncio
+
+            self._redis = redis_asyncio.from_url(self.redis_url)
+        return self._redis
+
+    async def version(self) -> str | None:
+        """Shared index version, or None when results must not be stored."""
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            return str(int(await client.get(self.version_key) or 0))
+        except Exception:
+            self.shared_errors += 1
+            logger.warning("Shared search index version is unavailable", exc_info=True)
+            return None
+
+    async def bump_version(self) -> None:
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            await client.incr(self.version_key)
+        except Exception:
+            self.shared_errors += 1
+            logger.warning("Failed to bump shared search index version", exc_info=True)
+
+    async def get_or_compute(
+        self,
+        request: dict[str, Any],
+        compute: Callable[[], Awaitable[tuple[list[dict[str, Any]], bool]]],
+    ) -> tuple[list[dict[str, Any]], bool]:
+        """Returns ``(items, degraded)``; ``compute`` reports whether its whole result is degraded."""
+        version = await self.version()
+        key = self.build_key(version or "uncached", request)
+        items = self.local.get(key) if version is not None else None
+        degraded = False
+        if items is None:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = asyncio.ensure_future(self._compute(key, compute, store=version is not None))
+                future.add_done_callback(lambda done: done.cancelled() or done.exception())
+                self._in_flight[key] = future
+            else:
+                self.coalesced += 1
+            # Shielded: a caller that times out must not cancel the query the other waiters share.
+            items, degraded = await asyncio.shield(future)
+        return [dict(item) for item in items], degraded
+
+    async def _compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[tuple[list[dict[str, Any]], bool]]],
+        store: bool,
+    ) -> tuple[list[dict[str, Any]], bool]:
+        try:
+            items, degraded = await compute()
+            if store and not degraded:
+                self.local.set(key, items)
+            return items, degraded
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.local.stats(),
+            "in_flight": len(self._in_flight),
+            "coalesced": self.coalesced,
+            "shared": bool(self.redis_url),
+            "shared_errors": self.shared_errors,
+        }
+
+
+_search_result_cache: SearchResultCache | None = None
+
+
+def get_search_result_cache() -> SearchResultCache:
+    global _search_result_cache
+    if _search_result_cache is None:
+        settings = get_search_settings()
+        _search_result_cache = SearchResultCache(
+            max_entries=settings.SEARCH_RESULT_CACHE_MAX_ENTRIES if settings.SEARCH_RESULT_CACHE_ENABLED else 0,
+            ttl_seconds=settings.SEARCH_RESULT_CACHE_TTL_SECONDS,
+            redis_url=settings.SEARCH_RESULT_CACHE_REDIS_URL if settings.SEARCH_RESULT_CACHE_ENABLED else None,
+        )
+    return _search_result_cache
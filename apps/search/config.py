@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,13 +10,84 @@ class SearchSettings(BaseSettings):
     QDRANT_URL: str = "http://localhost:6333"
     QDRANT_API_KEY: str | None = None
     QDRANT_COLLECTION: str = "clubverse_search"
+    QDRANT_READINESS_TTL_SECONDS: float = 30.0
+    QDRANT_CIRCUIT_FAILURE_THRESHOLD: int = 3
+    QDRANT_CIRCUIT_RESET_SECONDS: float = 10.0
+    QDRANT_KEYWORD_INDEX_FIELDS: list[str] = ["type", "city", "category", "status"]
+    SEARCH_LEXICAL_PUSHDOWN: bool = False
+    QDRANT_QUANTIZATION_ENABLED: bool = False
+    QDRANT_QUANTIZATION_QUANTILE: float = 0.99
+    QDRANT_QUANTIZATION_RESCORE: bool = True
+    QDRANT_QUANTIZATION_OVERSAMPLING: float = 2.0
+    QDRANT_HNSW_M: int | None = None
+    QDRANT_HNSW_EF_CONSTRUCT: int | None = None
+    QDRANT_HNSW_EF_SEARCH: int | None = None
 
     EMBEDDING_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"
     VECTOR_SIZE: int | None = None
+    EMBEDDING_BACKEND: Literal["torch", "onnx"] = "torch"
+    EMBEDDING_ONNX_FILE_NAME: str | None = "onnx/model_qint8_avx2.onnx"
+    EMBEDDING_BATCH_MAX_SIZE: int = 64
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_STORE_DIR: str | None = None
+    EMBEDDING_STORE_MAX_ROWS: int = 500_000
+    EMBEDDING_SERVER_SOCKET: str | None = None
+    EMBEDDING_SERVER_POOL_SIZE: int = 4
+    EMBEDDING_SERVER_TIMEOUT_SECONDS: float = 30.0
+    EMBEDDING_SERVER_TORCH_THREADS: int | None = None
+    SEARCH_WORKER_COUNT: int | None = None
+    EMBEDDING_TORCH_THREADS: int | None = None
+    EMBEDDING_EXECUTOR_THREADS: int = 1
+    SEARCH_WARMUP_ENABLED: bool = True
+
+    LOCAL_INDEX_DIR: str | None = None
+    LOCAL_INDEX_DTYPE: Literal["int8", "float16"] = "int8"
+    LOCAL_INDEX_SNAPSHOT_INTERVAL_SECONDS: float = 900.0
+
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_MAX_VECTORS: int = 10_000
+    QUERY_CACHE_TTL_SECONDS: float = 3600.0
+    QUERY_CACHE_REDIS_URL: str | None = None
+    SIMILAR_CACHE_MAX_ENTRIES: int = 5_000
+    SIMILAR_CACHE_TTL_SECONDS: float = 600.0
+    SEARCH_RESULT_CACHE_ENABLED: bool = True
+    SEARCH_RESULT_CACHE_MAX_ENTRIES: int = 2_000
+    SEARCH_RESULT_CACHE_TTL_SECONDS: float = 300.0
+    SEARCH_RESULT_CACHE_REDIS_URL: str | None = None
+
+    REINDEX_CHUNK_SIZE: int = 256
+    REINDEX_MAX_IN_FLIGHT: int = 2
+    REINDEX_JOB_STALE_SECONDS: int = 900
+    REINDEX_BLUE_GREEN_GRACE_SECONDS: float = 600.0
+
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 2.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 300.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_LEASE_SECONDS: float = 60.0
+
+    TRACKING_BUFFER_ENABLED: bool = True
+    TRACKING_BUFFER_MAX_EVENTS: int = 10_000
+    TRACKING_BUFFER_BATCH_SIZE: int = 500
+    TRACKING_BUFFER_FLUSH_INTERVAL_SECONDS: float = 1.0
+    TRACKING_BUFFER_OVERFLOW: Literal["drop_newest", "drop_oldest", "block"] = "drop_newest"
+    TRACKING_BUFFER_BLOCK_TIMEOUT_SECONDS: float = 0.05
+    TRACKING_MAINTENANCE_ENABLED: bool = True
+    TRACKING_MAINTENANCE_INTERVAL_SECONDS: float = 3600.0
+    TRACKING_PARTITION_PREMAKE_MONTHS: int = 2
+    TRACKING_RETENTION_MONTHS: int = 6
 
     SEARCH_SCORE_THRESHOLD: float | None = None
+    SEARCH_TIMEOUT_SECONDS: float = 10.0
+    PERSONALIZATION_TIMEOUT_SECONDS: float = 1.0
+    TRACKING_TIMEOUT_SECONDS: float = 1.0
 
     PERSONALIZATION_ENABLED: bool = True
+    PERSONALIZATION_CANDIDATE_POOL: int = 100
+    PROFILE_DECAY_HALF_LIFE_DAYS: float = 14.0
+    PROFILE_RECENT_DOCS: int = 20
     ROLE_BOOST_WEIGHT: float = 0.05
     PREF_CITY_WEIGHT: float = 0.02
     PREF_CATEGORY_WEIGHT: float = 0.02
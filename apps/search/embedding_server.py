@@ -0,0 +1,271 @@
+"""Out-of-process embedding server shared by all gunicorn workers.
+
+Run it next to the API with ``python -m apps.search.embedding_server`` and set
+``EMBEDDING_SERVER_SOCKET`` for the workers: ``encode_texts`` then sends texts
+over the Unix socket instead of loading the model in every worker.
+
+Wire format: every message is a 4-byte big-endian length followed by the body.
+Requests are JSON (``{"op": "encode", "texts": [...]}`` or ``{"op": "stats"}``).
+A response is a JSON header frame; a successful encode is followed by one more
+frame holding ``count * dim`` float32 values in native byte order.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+from array import array
+from collections.abc import Callable
+from concurrent.futures import Executor
+from dataclasses import replace
+from typing import Any
+
+from apps.search.config import get_search_settings
+from apps.search.embeddings import EmbeddingBatcher, _encode_sync, get_embedding_model
+from apps.search.runtime import compute_thread_budget, get_embedding_executor, set_thread_budget
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+class EmbeddingServerError(RuntimeError):
+    pass
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+    return await reader.readexactly(length)
+
+
+def write_frame(writer: asyncio.StreamWriter, body: bytes) -> None:
+    writer.write(_HEADER.pack(len(body)) + body)
+
+
+def pack_vectors(vectors: list[list[float]]) -> tuple[bytes, int]:
+    dim = len(vectors[0]) if vectors else 0
+    flat = array("f")
+    for vector in vectors:
+        flat.extend(vector)
+    return flat.tobytes(), dim
+
+
+def unpack_vectors(raw: bytes, count: int, dim: int) -> list[list[float]]:
+    flat = array("f")
+    flat.frombytes(raw)
+    if len(flat) != count * dim:
+        raise EmbeddingServerError(f"Expected {count}x{dim} floats, got {len(flat)}")
+    return [flat[i * dim : (i + 1) * dim].tolist() for i in range(count)]
+
+
+class EmbeddingServer:
+    """Serves encode requests from every API worker through one shared EmbeddingBatcher."""
+
+    def __init__(
+        self,
+        socket_path: str,
+        encode: Callable[[list[str]], list[list[float]]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        executor: Executor | None = None,
+    ) -> None:
+        self.socket_path = socket_path
+        self.batcher = EmbeddingBatcher(
+            encode, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, executor=executor
+        )
+        self.started_at = time.monotonic()
+        self.connections_open = 0
+        self.connections_total = 0
+        self.requests_failed = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    def stats(self) -> dict[str, Any]:
+        uptime = time.monotonic() - self.started_at
+        texts_total = self.batcher.stats.texts_total
+        return {
+            **self.batcher.snapshot(),
+            "pid": os.getpid(),
+            "uptime_seconds": round(uptime, 1),
+            "texts_per_second": round(texts_total / uptime, 2) if uptime > 0 else 0.0,
+            "connections_open": self.connections_open,
+            "connections_total": self.connections_total,
+            "requests_failed": self.requests_failed,
+        }
+
+    async def start(self) -> None:
+        # A socket file left behind by a killed server would make bind() fail.
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        logger.info("Embedding server listening on %s", self.socket_path)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections_open += 1
+        self.connections_total += 1
+        try:
+            # Clients keep connections open and send one request at a time on each of them.
+            while True:
+                try:
+                    request = json.loads(await read_frame(reader))
+                except asyncio.IncompleteReadError:
+                    return
+                await self._respond(request, writer)
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            logger.warning("Dropping embedding client connection", exc_info=True)
+        finally:
+            self.connections_open -= 1
+            writer.close()
+
+    async def _respond(self, request: dict[str, Any], writer: asyncio.StreamWriter) -> None:
+        op = request.get("op")
+        if op == "stats":
+            write_frame(writer, json.dumps({"ok": True, "stats": self.stats()}).encode("utf-8"))
+            return
+        if op != "encode":
+            write_frame(writer, json.dumps({"ok": False, "error": f"Unknown op {op!r}"}).encode("utf-8"))
+            return
+
+        try:
+            vectors = await self.batcher.encode([str(text) for text in request.get("texts") or []])
+        except Exception as exc:
+            self.requests_failed += 1
+            write_frame(writer, json.dumps({"ok": False, "error": str(exc)}).encode("utf-8"))
+            return
+
+        raw, dim = pack_vectors(vectors)
+        write_frame(writer, json.dumps({"ok": True, "count": len(vectors), "dim": dim}).encode("utf-8"))
+        write_frame(writer, raw)
+
+
+class EmbeddingClient:
+    """Worker-side client with a small pool of persistent connections to the embedding server."""
+
+    def __init__(self, socket_path: str, pool_size: int = 4, timeout: float = 30.0) -> None:
+        self.socket_path = socket_path
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # Streams are tied to the loop that opened them.
+        self._loop = loop
+        self._idle = []
+        self._slots = asyncio.Semaphore(self.pool_size)
+
+    async def _request(self, payload: dict[str, Any]) -> tuple[dict[str, Any], bytes | None]:
+        self._bind_loop()
+        assert self._slots is not None
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(
+                        asyncio.open_unix_connection(self.socket_path), timeout=self.timeout
+                    )
+                reader, writer = connection
+                write_frame(writer, json.dumps(payload).encode("utf-8"))
+                await writer.drain()
+                header = json.loads(await asyncio.wait_for(read_frame(reader), timeout=self.timeout))
+                body = None
+                if header.get("ok") and "count" in header:
+                    body = await asyncio.wait_for(read_frame(reader), timeout=self.timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as exc:
+                if connection is not None:
+                    connection[1].close()
+                raise EmbeddingServerError(f"Embedding server at {self.socket_path} is unavailable: {exc}") from exc
+            except BaseException:
+                # Cancelled mid-request (e.g. a stage timeout): a reply may still be in flight, so the
+                # connection cannot go back to the pool.
+                if connection is not None:
+                    connection[1].close()
+                raise
+
+            self._idle.append(connection)
+        return header, body
+
+    async def encode(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        header, body = await self._request({"op": "encode", "texts": texts})
+        if not header.get("ok"):
+            raise EmbeddingServerError(header.get("error") or "Embedding server failed to encode texts")
+        return unpack_vectors(body or b"", header["count"], header["dim"])
+
+    async def stats(self) -> dict[str, Any]:
+        header, _ = await self._request({"op": "stats"})
+        return header.get("stats") or {}
+
+
+_client: EmbeddingClient | None = None
+
+
+def get_embedding_client() -> EmbeddingClient:
+    global _client
+    if _client is None:
+        settings = get_search_settings()
+        _client = EmbeddingClient(
+            settings.EMBEDDING_SERVER_SOCKET or "",
+            pool_size=settings.EMBEDDING_SERVER_POOL_SIZE,
+            timeout=settings.EMBEDDING_SERVER_TIMEOUT_SECONDS,
+        )
+    return _client
+
+
+def main() -> None:
+    settings = get_search_settings()
+    parser = argparse.ArgumentParser(description="Shared embedding server for API workers.")
+    parser.add_argument("--socket", default=settings.EMBEDDING_SERVER_SOCKET or "/tmp/clubverse-embeddings.sock")
+    parser.add_argument("--threads", type=int, default=settings.EMBEDDING_SERVER_TORCH_THREADS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    # The server is the only process running the model, so it budgets the host's CPUs as a single worker.
+    budget = compute_thread_budget(workers=1)
+    if args.threads:
+        budget = replace(budget, torch_threads=args.threads)
+    set_thread_budget(budget)
+    # Load the model before accepting connections so the first requests do not pay for it.
+    get_embedding_model()
+
+    server = EmbeddingServer(
+        args.socket,
+        _encode_sync,
+        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+        executor=get_embedding_executor(),
+    )
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
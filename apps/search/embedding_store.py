@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from apps.search.config import get_search_settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingStore:
+    """Persistent text -> embedding cache shared by every process on the host.
+
+    Each generation is a pair of append-only files: ``<slug>.<gen>.f32`` holds
+    float32 rows and is memory-mapped for reads, ``<slug>.<gen>.idx`` holds
+    fixed-size (sha256, row) records. A row is fsynced before its index record
+    is written, so a crash can leave only unreferenced rows or a torn trailing
+    record, both of which are ignored on load. Compaction writes the next
+    generation and switches to it by atomically replacing ``<slug>.current``.
+    Writers serialize on an flock; readers never take it and pick up other
+    processes' appends on their next miss. Within a process, ``_state_lock``
+    guards the index and the mapped generation, so a lookup never pairs a row
+    number from one generation with the matrix of the next. All methods block
+    on disk I/O and are meant to run in a worker thread.
+    """
+
+    _RECORD = struct.Struct("<32sI")
+
+    def __init__(self, directory: str | os.PathLike[str], model_id: str, max_rows: int) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.model_id = model_id
+        self.max_rows = max(1, max_rows)
+        slug = hashlib.sha256(model_id.encode("utf-8")).hexdigest()[:16]
+        self._base = str(self.directory / slug)
+        self._pointer_path = f"{self._base}.current"
+        self._lock_path = f"{self._base}.lock"
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.compactions = 0
+
+        self._state_lock = threading.RLock()
+        self._pointer_stamp: tuple[int, int] | None = None
+        self._generation = 0
+        self._dim: int | None = None
+        self._index: dict[bytes, int] = {}
+        self._index_offset = 0
+        self._matrix: np.memmap | None = None
+        self._matrix_rows = 0
+        self._refresh()
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_id}\n{text}".encode("utf-8")).digest()
+
+    def _paths(self, generation: int) -> tuple[str, str]:
+        return f"{self._base}.{generation}.f32", f"{self._base}.{generation}.idx"
+
+    def _row_bytes(self) -> int:
+        assert self._dim is not None
+        return self._dim * 4
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        with self._state_lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        try:
+            stat = os.stat(self._pointer_path)
+            stamp: tuple[int, int] | None = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            stamp = None
+
+        if stamp != self._pointer_stamp:
+            generation, dim = 0, None
+            if stamp is not None:
+                with open(self._pointer_path, encoding="utf-8") as handle:
+                    pointer = json.load(handle)
+                generation, dim = int(pointer["generation"]), int(pointer["dim"])
+            self._pointer_stamp = stamp
+            self._generation = generation
+            self._dim = dim
+            self._index = {}
+            self._index_offset = 0
+            self._matrix = None
+            self._matrix_rows = 0
+
+        if self._dim is None:
+            return
+        _, index_path = self._paths(self._generation)
+        try:
+            with open(index_path, "rb") as handle:
+                handle.seek(self._index_offset)
+                data = handle.read()
+        except FileNotFoundError:
+            return
+        usable = len(data) - len(data) % self._RECORD.size
+        for digest, row in self._RECORD.iter_unpack(data[:usable]):
+            self._index[digest] = row
+        self._index_offset += usable
+
+    def _vector(self, row: int) -> list[float] | None:
+        if self._matrix is None or row >= self._matrix_rows:
+            vectors_path, _ = self._paths(self._generation)
+            try:
+                rows = os.path.getsize(vectors_path) // self._row_bytes()
+            except FileNotFoundError:
+                # Another process compacted the store; the next lookup reloads the new generation.
+                return None
+            if row >= rows:
+                return None
+            self._matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim))
+            self._matrix_rows = rows
+        return self._matrix[row].tolist()
+
+    def get_many(self, texts: list[str]) -> list[list[float] | None]:
+        keys = [self.key(text) for text in texts]
+        with self._state_lock:
+            if any(key not in self._index for key in keys):
+                self._refresh()
+
+            results: list[list[float] | None] = []
+            for key in keys:
+                row = self._index.get(key)
+                vector = self._vector(row) if row is not None else None
+                if vector is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                results.append(vector)
+        return results
+
+    def put_many(self, texts: list[str], vectors: list[list[float]]) -> None:
+        if not texts:
+            return
+        with self._locked(), self._state_lock:
+            self._refresh()
+            dim = len(vectors[0])
+            if self._dim is None:
+                self._write_pointer(self._generation + 1, dim)
+                self._refresh()
+            elif dim != self._dim:
+                raise ValueError(f"Embedding store holds {self._dim}-d vectors, got {dim}-d")
+
+            new_rows: dict[bytes, list[float]] = {}
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                if key not in self._index:
+                    new_rows[key] = vector
+            if not new_rows:
+                return
+
+            self._append(new_rows)
+            self.writes += len(new_rows)
+            if len(self._index) > self.max_rows:
+                # Compact below the cap so that a store at the limit does not rewrite itself on every put.
+                self._compact_locked(keep=int(self.max_rows * 0.8))
+
+    def _append(self, rows: dict[bytes, list[float]]) -> None:
+        vectors_path, index_path = self._paths(self._generation)
+        row_bytes = self._row_bytes()
+
+        with open(vectors_path, "ab") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            first_row = size // row_bytes
+            if size % row_bytes:
+                handle.truncate(first_row * row_bytes)
+            handle.write(np.asarray(list(rows.values()), dtype=np.float32).tobytes())
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        records = b"".join(self._RECORD.pack(key, first_row + offset) for offset, key in enumerate(rows))
+        with open(index_path, "ab") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if size % self._RECORD.size:
+                handle.truncate(size - size % self._RECORD.size)
+            handle.write(records)
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._refresh()
+
+    def compact(self, keep: int | None = None) -> None:
+        """Rewrites the store without duplicate or unreferenced rows, keeping the ``keep`` newest entries."""
+        with self._locked(), self._state_lock:
+            self._refresh()
+            if self._dim is not None:
+                self._compact_locked(keep=len(self._index) if keep is None else keep)
+
+    def _compact_locked(self, keep: int) -> None:
+        live = sorted(self._index.items(), key=lambda item: item[1])[-keep:] if keep > 0 else []
+        old_paths = self._paths(self._generation)
+        generation = self._generation + 1
+        vectors_path, index_path = self._paths(generation)
+
+        with open(vectors_path, "wb") as handle:
+            for _, row in live:
+                handle.write(np.asarray(self._vector(row), dtype=np.float32).tobytes())
+            handle.flush()
+            os.fsync(handle.fileno())
+        with open(index_path, "wb") as handle:
+            handle.write(b"".join(self._RECORD.pack(key, row) for row, (key, _) in enumerate(live)))
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        assert self._dim is not None
+        self._write_pointer(generation, self._dim)
+        for path in old_paths:
+            # Processes that still map the old generation keep reading the unlinked file until they refresh.
+            Path(path).unlink(missing_ok=True)
+        self._refresh()
+        self.compactions += 1
+        logger.info("Compacted embedding store to generation %s with %s rows", generation, len(live))
+
+    def _write_pointer(self, generation: int, dim: int) -> None:
+        tmp_path = f"{self._pointer_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump({"generation": generation, "dim": dim, "model": self.model_id}, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self._pointer_path)
+        directory_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        vectors_path, _ = self._paths(self._generation)
+        return {
+            "rows": len(self._index),
+            "max_rows": self.max_rows,
+            "generation": self._generation,
+            "dim": self._dim,
+            "bytes": os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "compactions": self.compactions,
+        }
+
+
+_store: EmbeddingStore | None = None
+
+
+def get_embedding_store() -> EmbeddingStore | None:
+    global _store
+    settings = get_search_settings()
+    if not settings.EMBEDDING_STORE_DIR:
+        return None
+    if _store is None:
+        _store = EmbeddingStore(
+            settings.EMBEDDING_STORE_DIR,
+            model_id=f"{settings.EMBEDDING_MODEL_NAME}:{settings.EMBEDDING_BACKEND}",
+            max_rows=settings.EMBEDDING_STORE_MAX_ROWS,
+        )
+    return _store
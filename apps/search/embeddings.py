@@ -1,19 +1,49 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from collections.abc import Callable
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any
+
 import anyio
 
 from apps.search.config import get_search_settings
+from apps.search.embedding_store import get_embedding_store
+from apps.search.runtime import configure_torch, get_embedding_executor
+
+logger = logging.getLogger(__name__)
 
 _model = None
 
 
+def load_embedding_model(backend: str | None = None):
+    """Loads EMBEDDING_MODEL_NAME on the given backend ("torch" or "onnx"); both yield the same vector size."""
+    from sentence_transformers import SentenceTransformer
+
+    settings = get_search_settings()
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend == "onnx":
+        # Needs the onnx extra (sentence-transformers[onnx]); the file is typically a dynamic int8 export.
+        model_kwargs = {"file_name": settings.EMBEDDING_ONNX_FILE_NAME} if settings.EMBEDDING_ONNX_FILE_NAME else None
+        model = SentenceTransformer(settings.EMBEDDING_MODEL_NAME, backend="onnx", model_kwargs=model_kwargs)
+    else:
+        model = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
+
+    dimension = model.get_sentence_embedding_dimension()
+    if settings.VECTOR_SIZE and dimension != settings.VECTOR_SIZE:
+        raise RuntimeError(
+            f"{backend} embedding backend produces {dimension}-d vectors, collection expects {settings.VECTOR_SIZE}"
+        )
+    return model
+
+
 def get_embedding_model():
     global _model
     if _model is None:
-        from sentence_transformers import SentenceTransformer
-
-        settings = get_search_settings()
-        _model = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
+        configure_torch()
+        _model = load_embedding_model()
     return _model
 
 
@@ -23,7 +53,201 @@ def _encode_sync(texts: list[str]) -> list[list[float]]:
     return vectors.tolist()
 
 
-async def encode_texts(texts: list[str]) -> list[list[float]]:
+@dataclass
+class _PendingEncode:
+    texts: list[str]
+    future: asyncio.Future[list[list[float]]]
+
+
+@dataclass
+class BatcherStats:
+    requests_total: int = 0
+    texts_total: int = 0
+    batches_total: int = 0
+    max_batch_size_seen: int = 0
+    errors_total: int = 0
+    batch_size_histogram: dict[int, int] = field(default_factory=dict)
+
+
+class EmbeddingBatcher:
+    """Collects concurrent encode requests and runs them as one forward pass.
+
+    Callers await ``encode``; the first request in an empty queue starts a flush
+    window of ``max_wait_ms``. The window closes early once ``max_batch_size``
+    texts are queued. Each batch is encoded in a worker thread and the vectors
+    are split back to the callers' futures.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[list[str]], list[list[float]]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        executor: Executor | None = None,
+    ) -> None:
+        self._encode = encode
+        self._executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.stats = BatcherStats()
+        self._pending: list[_PendingEncode] = []
+        self._queued_texts = 0
+        self._batch_full: asyncio.Event | None = None
+        self._worker: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def queued_texts(self) -> int:
+        return self._queued_texts
+
+    def snapshot(self) -> dict[str, Any]:
+        batches = self.stats.batches_total
+        return {
+            "queue_depth": self.queue_depth,
+            "queued_texts": self.queued_texts,
+            "requests_total": self.stats.requests_total,
+            "texts_total": self.stats.texts_total,
+            "batches_total": batches,
+            "avg_batch_size": round(self.stats.texts_total / batches, 2) if batches else 0.0,
+            "max_batch_size_seen": self.stats.max_batch_size_seen,
+            "errors_total": self.stats.errors_total,
+            "batch_size_histogram": dict(sorted(self.stats.batch_size_histogram.items())),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+        }
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # A new event loop (worker restart, tests) invalidates queued futures and the worker task.
+        self._loop = loop
+        self._pending = []
+        self._queued_texts = 0
+        self._batch_full = asyncio.Event()
+        self._worker = None
+
+    async def encode(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+
+        self._bind_loop()
+        assert self._loop is not None and self._batch_full is not None
+
+        future: asyncio.Future[list[list[float]]] = self._loop.create_future()
+        self._pending.append(_PendingEncode(texts=list(texts), future=future))
+        self._queued_texts += len(texts)
+        self.stats.requests_total += 1
+
+        if self._queued_texts >= self.max_batch_size:
+            self._batch_full.set()
+        if self._worker is None or self._worker.done():
+            self._worker = self._loop.create_task(self._run())
+
+        return await future
+
+    def _take_batch(self) -> list[_PendingEncode]:
+        batch: list[_PendingEncode] = []
+        size = 0
+        while self._pending:
+            request = self._pending[0]
+            if batch and size + len(request.texts) > self.max_batch_size:
+                break
+            batch.append(self._pending.pop(0))
+            size += len(request.texts)
+        self._queued_texts -= size
+        return batch
+
+    async def _run(self) -> None:
+        assert self._batch_full is not None
+        while self._pending:
+            if self._queued_texts < self.max_batch_size and self.max_wait_ms > 0:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), timeout=self.max_wait_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+
+            batch = [request for request in self._take_batch() if not request.future.cancelled()]
+            if self._queued_texts >= self.max_batch_size:
+                self._batch_full.set()
+            if not batch:
+                continue
+
+            texts = [text for request in batch for text in request.texts]
+            self._record_batch(len(texts))
+            try:
+                vectors = await asyncio.get_running_loop().run_in_executor(self._executor, self._encode, texts)
+            except Exception as exc:
+                self.stats.errors_total += 1
+                logger.warning("Embedding batch of %s texts failed", len(texts), exc_info=True)
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(exc)
+                continue
+
+            offset = 0
+            for request in batch:
+                chunk = vectors[offset : offset + len(request.texts)]
+                offset += len(request.texts)
+                if not request.future.done():
+                    request.future.set_result(chunk)
+
+    def _record_batch(self, size: int) -> None:
+        self.stats.batches_total += 1
+        self.stats.texts_total += size
+        self.stats.max_batch_size_seen = max(self.stats.max_batch_size_seen, size)
+        # Power-of-two buckets keep the histogram small while still showing how full batches get.
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+        self.stats.batch_size_histogram[bucket] = self.stats.batch_size_histogram.get(bucket, 0) + 1
+
+
+_batcher: EmbeddingBatcher | None = None
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        settings = get_search_settings()
+        _batcher = EmbeddingBatcher(
+            _encode_sync,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            executor=get_embedding_executor(),
+        )
+    return _batcher
+
+
+async def encode_texts(texts: list[str], use_store: bool = True) -> list[list[float]]:
+    """Embeds texts; with ``use_store`` vectors are looked up in and saved to the on-disk embedding store."""
     if not texts:
         return []
-    return await anyio.to_thread.run_sync(_encode_sync, texts)
+    store = get_embedding_store() if use_store else None
+    if store is None:
+        return await _encode_with_model(texts)
+
+    vectors = await anyio.to_thread.run_sync(store.get_many, texts)
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+    if missing:
+        encoded = dict(zip(missing, await _encode_with_model(missing)))
+        try:
+            await anyio.to_thread.run_sync(store.put_many, missing, [encoded[text] for text in missing])
+        except (OSError, ValueError):
+            logger.warning("Failed to persist %s embeddings", len(missing), exc_info=True)
+        vectors = [vector if vector is not None else encoded[text] for text, vector in zip(texts, vectors)]
+    return vectors
+
+
+async def _encode_with_model(texts: list[str]) -> list[list[float]]:
+    if get_search_settings().EMBEDDING_SERVER_SOCKET:
+        # Imported lazily: the server module imports this one.
+        from apps.search.embedding_server import get_embedding_client
+
+        return await get_embedding_client().encode(texts)
+    return await get_embedding_batcher().encode(texts)
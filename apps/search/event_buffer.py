@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any
+
+from sqlalchemy import insert
+
+from apps.db.base import Base
+from apps.db.session import AsyncSessionLocal
+from apps.search.config import get_search_settings
+from apps.search.rollups import SearchRollupService
+
+logger = logging.getLogger(__name__)
+
+TrackedEvent = tuple[type[Base], dict[str, Any]]
+
+
+class TrackingEventBuffer:
+    """Takes search/click analytics off the request path and writes them in batches.
+
+    ``submit`` only puts the row into a bounded in-process queue; a background
+    task flushes it with one multi-row INSERT per table, plus the hourly rollup
+    upserts in the same transaction, once TRACKING_BUFFER_BATCH_SIZE rows are
+    queued or TRACKING_BUFFER_FLUSH_INTERVAL_SECONDS have passed since the
+    first one. When the queue is full the
+    TRACKING_BUFFER_OVERFLOW policy decides: drop the new event, drop the
+    oldest queued one, or make the request wait up to
+    TRACKING_BUFFER_BLOCK_TIMEOUT_SECONDS before dropping. Events still queued
+    at shutdown are flushed by ``stop``; a failed flush is logged and counted,
+    not retried, since these rows are best-effort analytics.
+    """
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue[TrackedEvent] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._batch: list[TrackedEvent] = []
+        self._flushing: asyncio.Future[None] | None = None
+        self.accepted = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms: float | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        settings = get_search_settings()
+        if not settings.TRACKING_BUFFER_ENABLED or self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=max(1, settings.TRACKING_BUFFER_MAX_EVENTS))
+        self._batch = []
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, model: type[Base], row: dict[str, Any]) -> bool:
+        """Queues one row; False means the buffer is not running and the caller should write it itself."""
+        if not self.running or self._queue is None:
+            return False
+
+        event = (model, row)
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            if not self._handle_overflow(event) and not await self._wait_for_space(event):
+                self.dropped += 1
+                return True
+        self.accepted += 1
+        return True
+
+    def _handle_overflow(self, event: TrackedEvent) -> bool:
+        assert self._queue is not None
+        if get_search_settings().TRACKING_BUFFER_OVERFLOW != "drop_oldest":
+            return False
+        self._queue.get_nowait()
+        self.dropped += 1
+        self._queue.put_nowait(event)
+        return True
+
+    async def _wait_for_space(self, event: TrackedEvent) -> bool:
+        assert self._queue is not None
+        settings = get_search_settings()
+        if settings.TRACKING_BUFFER_OVERFLOW != "block":
+            return False
+        try:
+            await asyncio.wait_for(self._queue.put(event), timeout=settings.TRACKING_BUFFER_BLOCK_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._flushing is not None and not self._flushing.done():
+            # The cancelled loop shielded its in-flight INSERT; let it land instead of writing the rows twice.
+            await asyncio.wait([self._flushing])
+
+        remaining = self._batch
+        self._batch = []
+        while self._queue is not None and not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        batch_size = max(1, get_search_settings().TRACKING_BUFFER_BATCH_SIZE)
+        for start in range(0, len(remaining), batch_size):
+            await self._flush(remaining[start : start + batch_size])
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        settings = get_search_settings()
+        batch_size = max(1, settings.TRACKING_BUFFER_BATCH_SIZE)
+        while True:
+            self._batch.append(await self._queue.get())
+            deadline = time.monotonic() + settings.TRACKING_BUFFER_FLUSH_INTERVAL_SECONDS
+            while len(self._batch) < batch_size:
+                try:
+                    self._batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            batch, self._batch = self._batch, []
+            self._flushing = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._flushing)
+
+    async def _flush(self, batch: list[TrackedEvent]) -> None:
+        if not batch:
+            return
+        rows_by_model: dict[type[Base], list[dict[str, Any]]] = defaultdict(list)
+        for model, row in batch:
+            rows_by_model[model].append(row)
+
+        started = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as db:
+                for model, rows in rows_by_model.items():
+                    await db.execute(insert(model).values(rows))
+                await SearchRollupService.apply(db, rows_by_model)
+                await db.commit()
+        except Exception:
+            self.failed += len(batch)
+            logger.warning("Failed to flush %s tracking events", len(batch), exc_info=True)
+            return
+        self.flushed += len(batch)
+        self.flushes += 1
+        self.last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() + len(self._batch) if self._queue is not None else 0,
+            "capacity": self._queue.maxsize if self._queue is not None else 0,
+            "overflow_policy": get_search_settings().TRACKING_BUFFER_OVERFLOW,
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+tracking_buffer = TrackingEventBuffer()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from apps.db.session import AsyncSessionLocal, engine
+from apps.search.config import get_search_settings
+from apps.search.models import ReindexJob
+from apps.search.service import ReindexProgress, SearchService
+
+logger = logging.getLogger(__name__)
+
+# Session-level advisory lock key shared by every worker; any constant works as long as it is unique in the DB.
+REINDEX_LOCK_KEY = 7_310_452_001
+FINISHED_PHASES = ("completed", "failed")
+_PROGRESS_FLUSH_INTERVAL = 1.0
+
+_running_jobs: set[asyncio.Task[None]] = set()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ReindexJobService:
+    @staticmethod
+    async def get(db: AsyncSession, job_id: str) -> ReindexJob | None:
+        result = await db.execute(select(ReindexJob).where(ReindexJob.id == job_id))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_active(db: AsyncSession) -> ReindexJob | None:
+        settings = get_search_settings()
+        stale_before = _utcnow() - timedelta(seconds=settings.REINDEX_JOB_STALE_SECONDS)
+
+        # A worker that died mid-job never finishes its row; expire such leases so they do not block new jobs.
+        await db.execute(
+            update(ReindexJob)
+            .where(ReindexJob.phase.notin_(FINISHED_PHASES), ReindexJob.updated_at < stale_before)
+            .values(phase="failed", errors=["Job lease expired"], finished_at=_utcnow())
+        )
+        result = await db.execute(
+            select(ReindexJob).where(ReindexJob.phase.notin_(FINISHED_PHASES)).order_by(ReindexJob.created_at.desc())
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    async def start(db: AsyncSession, mode: str) -> ReindexJob:
+        active = await ReindexJobService.get_active(db)
+        if active is not None:
+            await db.commit()
+            raise HTTPException(status_code=409, detail=f"Reindex job {active.id} is already running")
+
+        job = ReindexJob(
+            id=str(uuid.uuid4()),
+            mode=mode,
+            phase="queued",
+            total=0,
+            processed=0,
+            indexed=0,
+            skipped=0,
+            deleted=0,
+            errors=[],
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+
+        task = asyncio.create_task(ReindexJobService.run(job.id, mode))
+        _running_jobs.add(task)
+        task.add_done_callback(_running_jobs.discard)
+        return job
+
+    @staticmethod
+    async def _update(job_id: str, **values: Any) -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(ReindexJob).where(ReindexJob.id == job_id).values(**values))
+            await session.commit()
+
+    @staticmethod
+    async def _try_lock(conn: AsyncConnection) -> bool:
+        if conn.dialect.name != "postgresql":
+            return True
+        result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": REINDEX_LOCK_KEY})
+        return bool(result.scalar())
+
+    @staticmethod
+    async def _unlock(conn: AsyncConnection) -> None:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REINDEX_LOCK_KEY})
+
+    @staticmethod
+    async def run(job_id: str, mode: str) -> None:
+        async with engine.connect() as conn:
+            # Autocommit keeps the lock connection from sitting "idle in transaction" for the whole job.
+            lock_conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            if not await ReindexJobService._try_lock(lock_conn):
+                await ReindexJobService._update(
+                    job_id,
+                    phase="failed",
+                    errors=["Another reindex is already running"],
+                    finished_at=_utcnow(),
+                )
+                return
+
+            last_flush = 0.0
+
+            async def on_progress(progress: ReindexProgress) -> None:
+                nonlocal last_flush
+                now = time.monotonic()
+                if now - last_flush < _PROGRESS_FLUSH_INTERVAL:
+                    return
+                last_flush = now
+                await ReindexJobService._update(job_id, **ReindexJobService._progress_values(progress))
+
+            try:
+                await ReindexJobService._update(job_id, phase="indexing", started_at=_utcnow())
+                async with AsyncSessionLocal() as db:
+                    progress = await SearchService.rebuild_index(db, on_progress=on_progress, mode=mode)
+                await ReindexJobService._update(
+                    job_id,
+                    **ReindexJobService._progress_values(progress),
+                    phase="completed",
+                    finished_at=_utcnow(),
+                )
+            except Exception as exc:
+                detail = exc.detail if isinstance(exc, HTTPException) else str(exc)
+                logger.exception("Reindex job %s failed", job_id)
+                await ReindexJobService._update(job_id, phase="failed", errors=[str(detail)], finished_at=_utcnow())
+            finally:
+                await ReindexJobService._unlock(lock_conn)
+
+    @staticmethod
+    def _progress_values(progress: ReindexProgress) -> dict[str, Any]:
+        return {
+            "phase": progress.phase,
+            "total": progress.total,
+            "processed": progress.processed,
+            "indexed": progress.indexed,
+            "skipped": progress.skipped,
+            "deleted": progress.deleted,
+        }
+
+    @staticmethod
+    def describe(job: ReindexJob) -> dict[str, Any]:
+        duration: float | None = None
+        if job.started_at is not None:
+            finished_at = job.finished_at or _utcnow()
+            started_at = job.started_at
+            if started_at.tzinfo is None:
+                started_at = started_at.replace(tzinfo=timezone.utc)
+            if finished_at.tzinfo is None:
+                finished_at = finished_at.replace(tzinfo=timezone.utc)
+            duration = max((finished_at - started_at).total_seconds(), 0.0)
+
+        return {
+            "job_id": job.id,
+            "mode": job.mode,
+            "phase": job.phase,
+            "total": job.total,
+            "processed": job.processed,
+            "indexed": job.indexed,
+            "skipped": job.skipped,
+            "deleted": job.deleted,
+            "errors": list(job.errors or []),
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "duration_seconds": round(duration, 3) if duration is not None else None,
+            "docs_per_second": round(job.processed / duration, 2) if duration else None,
+        }
@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from apps.search.config import get_search_settings
+from apps.search.qdrant_client import ensure_collection, get_qdrant_client, live_alias_name, track_qdrant_call
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_FIELDS = ("doc_id", "type", "entity_id", "title", "snippet", "url", "city", "category", "status")
+FILTER_FIELDS = ("type", "city", "category", "status")
+_QUERY_CHUNK_ROWS = 16_384
+
+
+@dataclass
+class LocalHit:
+    """Shaped like a Qdrant ScoredPoint so SearchService._normalize_hit accepts it."""
+
+    id: str
+    payload: dict[str, Any]
+    score: float
+
+
+class LocalVectorIndex:
+    """Brute-force fallback index over a snapshot of the Qdrant collection.
+
+    Vectors are L2-normalized and stored either as float16 or as int8 with one
+    float32 scale per row; payloads are JSON lines decoded only for returned
+    hits, and the filterable fields are integer codes so a filter is a
+    vectorized equality mask. Every array is memory-mapped, so worker
+    processes on the host share one copy through the page cache.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        scales: np.ndarray | None,
+        codes: np.ndarray,
+        vocab: dict[str, list[str]],
+        point_ids: list[str],
+        payload_offsets: np.ndarray,
+        payload_bytes: np.ndarray,
+        created_at: float,
+    ) -> None:
+        self.vectors = vectors
+        self.scales = scales
+        self.codes = codes
+        self.vocab = vocab
+        self.point_ids = point_ids
+        self.payload_offsets = payload_offsets
+        self.payload_bytes = payload_bytes
+        self.created_at = created_at
+        self._codes_by_value = {field: {value: code for code, value in enumerate(values)} for field, values in vocab.items()}
+        self._row_by_id = {point_id: row for row, point_id in enumerate(point_ids)}
+
+    @property
+    def size(self) -> int:
+        return len(self.point_ids)
+
+    @classmethod
+    def build(
+        cls, point_ids: list[str], vectors: np.ndarray, payloads: list[dict[str, Any]], dtype: str = "int8"
+    ) -> LocalVectorIndex:
+        stored, scales = cls.quantize(np.asarray(vectors, dtype=np.float32), dtype)
+        return cls.from_quantized(point_ids, stored, scales, payloads)
+
+    @staticmethod
+    def quantize(matrix: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray | None]:
+        """L2-normalized rows as ``dtype``, plus one float32 scale per row for int8; rows are independent."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+        if dtype == "int8":
+            scales = (np.abs(matrix).max(axis=1) / 127.0).astype(np.float32)
+            scales[scales == 0] = 1.0
+            return np.round(matrix / scales[:, None]).astype(np.int8), scales
+        if dtype == "float16":
+            return matrix.astype(np.float16), None
+        raise ValueError(f"Unsupported local index dtype: {dtype}")
+
+    @classmethod
+    def from_quantized(
+        cls, point_ids: list[str], stored: np.ndarray, scales: np.ndarray | None, payloads: list[dict[str, Any]]
+    ) -> LocalVectorIndex:
+        vocab: dict[str, list[str]] = {}
+        codes = np.full((len(point_ids), len(FILTER_FIELDS)), -1, dtype=np.int32)
+        for column, field in enumerate(FILTER_FIELDS):
+            values = sorted({str(payload[field]) for payload in payloads if payload.get(field) is not None})
+            vocab[field] = values
+            lookup = {value: code for code, value in enumerate(values)}
+            codes[:, column] = [lookup.get(str(payload.get(field)), -1) for payload in payloads]
+
+        encoded = [
+            json.dumps({key: payload.get(key) for key in PAYLOAD_FIELDS}, ensure_ascii=False).encode("utf-8")
+            for payload in payloads
+        ]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(item) for item in encoded])
+        payload_bytes = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(stored, scales, codes, vocab, list(point_ids), offsets, payload_bytes, time.time())
+
+    def payload(self, row: int) -> dict[str, Any]:
+        start, end = int(self.payload_offsets[row]), int(self.payload_offsets[row + 1])
+        return json.loads(self.payload_bytes[start:end].tobytes())
+
+    def vector(self, point_id: str) -> np.ndarray | None:
+        """Stored (dequantized) vector of ``point_id``, or None when the snapshot does not have it."""
+        row = self._row_by_id.get(point_id)
+        if row is None:
+            return None
+        vector = self.vectors[row].astype(np.float32)
+        return vector * self.scales[row] if self.scales is not None else vector
+
+    def _mask(self, filters: dict[str, str | None]) -> np.ndarray | None:
+        mask: np.ndarray | None = None
+        for column, field in enumerate(FILTER_FIELDS):
+            value = filters.get(field)
+            if not value:
+                continue
+            code = self._codes_by_value[field].get(str(value))
+            if code is None:
+                return np.zeros(self.size, dtype=bool)
+            field_mask = self.codes[:, column] == code
+            mask = field_mask if mask is None else mask & field_mask
+        return mask
+
+    def search(
+        self,
+        query_vector: list[float],
+        top_k: int,
+        filters: dict[str, str | None] | None = None,
+        exclude_ids: list[str] | None = None,
+        score_threshold: float | None = None,
+    ) -> list[LocalHit]:
+        if self.size == 0 or top_k <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        mask = self._mask(filters or {})
+        if exclude_ids:
+            excluded = [self._row_by_id[point_id] for point_id in exclude_ids if point_id in self._row_by_id]
+            if excluded:
+                mask = np.ones(self.size, dtype=bool) if mask is None else mask.copy()
+                mask[excluded] = False
+        rows = np.arange(self.size) if mask is None else np.flatnonzero(mask)
+        if rows.size == 0:
+            return []
+
+        scores = np.empty(rows.size, dtype=np.float32)
+        # Chunks keep the float32 upcast of the stored matrix small and cache-friendly.
+        for start in range(0, rows.size, _QUERY_CHUNK_ROWS):
+            chunk = rows[start : start + _QUERY_CHUNK_ROWS]
+            if mask is None:
+                block = self.vectors[chunk[0] : chunk[-1] + 1]
+            else:
+                block = self.vectors[chunk]
+            chunk_scores = block.astype(np.float32) @ query
+            if self.scales is not None:
+                chunk_scores *= self.scales[chunk]
+            scores[start : start + chunk.size] = chunk_scores
+
+        if score_threshold is not None:
+            keep = scores >= score_threshold
+            rows, scores = rows[keep], scores[keep]
+        if rows.size > top_k:
+            selected = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            selected = np.arange(rows.size)
+        ordered = selected[np.argsort(-scores[selected], kind="stable")]
+        return [
+            LocalHit(id=self.point_ids[int(rows[index])], payload=self.payload(int(rows[index])), score=float(scores[index]))
+            for index in ordered
+        ]
+
+    def nbytes(self) -> int:
+        arrays = [self.vectors, self.codes, self.payload_offsets, self.payload_bytes]
+        if self.scales is not None:
+            arrays.append(self.scales)
+        return int(sum(array.nbytes for array in arrays))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "docs": self.size,
+            "dim": int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0,
+            "dtype": str(self.vectors.dtype),
+            "bytes": self.nbytes(),
+            "age_seconds": round(time.time() - self.created_at, 1),
+        }
+
+    def save(self, directory: str | os.PathLike[str]) -> Path:
+        """Writes a new snapshot next to the current one and switches the ``current`` pointer atomically."""
+        root = Path(directory)
+        root.mkdir(parents=True, exist_ok=True)
+        name = f"snapshot-{int(self.created_at * 1000)}"
+        target = root / name
+        target.mkdir(exist_ok=True)
+        np.save(target / "vectors.npy", self.vectors)
+        if self.scales is not None:
+            np.save(target / "scales.npy", self.scales)
+        np.save(target / "codes.npy", self.codes)
+        np.save(target / "payload_offsets.npy", self.payload_offsets)
+        np.save(target / "payloads.npy", self.payload_bytes)
+        with open(target / "meta.json", "w", encoding="utf-8") as handle:
+            json.dump({"created_at": self.created_at, "vocab": self.vocab, "point_ids": self.point_ids}, handle)
+
+        pointer_tmp = root / "current.tmp"
+        pointer_tmp.write_text(name, encoding="utf-8")
+        os.replace(pointer_tmp, root / "current")
+        for old in root.glob("snapshot-*"):
+            if old.name != name:
+                # Readers that still map the old snapshot keep their (unlinked) files until they reload.
+                shutil.rmtree(old, ignore_errors=True)
+        return target
+
+    @classmethod
+    def load(cls, directory: str | os.PathLike[str]) -> LocalVectorIndex | None:
+        root = Path(directory)
+        try:
+            target = root / (root / "current").read_text(encoding="utf-8").strip()
+            with open(target / "meta.json", encoding="utf-8") as handle:
+                meta = json.load(handle)
+        except FileNotFoundError:
+            return None
+        scales_path = target / "scales.npy"
+        return cls(
+            vectors=np.load(target / "vectors.npy", mmap_mode="r"),
+            scales=np.load(scales_path, mmap_mode="r") if scales_path.exists() else None,
+            codes=np.load(target / "codes.npy", mmap_mode="r"),
+            vocab=meta["vocab"],
+            point_ids=meta["point_ids"],
+            payload_offsets=np.load(target / "payload_offsets.npy", mmap_mode="r"),
+            payload_bytes=np.load(target / "payloads.npy", mmap_mode="r"),
+            created_at=float(meta["created_at"]),
+        )
+
+
+_index: LocalVectorIndex | None = None
+_index_stamp: tuple[int, int] | None = None
+_reload_task: asyncio.Future[None] | None = None
+
+
+def get_local_index() -> LocalVectorIndex | None:
+    """The latest snapshot in LOCAL_INDEX_DIR, reloaded when another process switched the pointer.
+
+    Inside the event loop the reload runs in a worker thread and the previous
+    index keeps answering until it finishes.
+    """
+    global _reload_task
+    settings = get_search_settings()
+    if not settings.LOCAL_INDEX_DIR:
+        return None
+    try:
+        stat = os.stat(Path(settings.LOCAL_INDEX_DIR) / "current")
+    except FileNotFoundError:
+        return None
+    stamp = (stat.st_ino, stat.st_mtime_ns)
+    if stamp != _index_stamp:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            _load(settings.LOCAL_INDEX_DIR, stamp)
+        else:
+            if _reload_task is None or _reload_task.done():
+                _reload_task = asyncio.ensure_future(asyncio.to_thread(_load, settings.LOCAL_INDEX_DIR, stamp))
+    return _index
+
+
+async def load_local_index() -> LocalVectorIndex | None:
+    """Same as get_local_index, but waits for a pending reload instead of returning the previous index."""
+    index = get_local_index()
+    if _reload_task is not None and not _reload_task.done():
+        await asyncio.shield(_reload_task)
+        index = _index
+    return index
+
+
+def _load(directory: str, stamp: tuple[int, int]) -> None:
+    global _index, _index_stamp
+    try:
+        index = LocalVectorIndex.load(directory)
+    except (OSError, ValueError, KeyError):
+        logger.warning("Failed to load the local search index snapshot", exc_info=True)
+        return
+    _index, _index_stamp = index, stamp
+
+
+async def snapshot_collection() -> LocalVectorIndex:
+    """Scrolls every point (vector and display payload) out of Qdrant and builds an index from them.
+
+    Each page is quantized as it arrives and copied into a matrix preallocated
+    from the point count, so memory peaks at the stored matrix plus one page.
+    """
+    settings = get_search_settings()
+    client = get_qdrant_client()
+    async with track_qdrant_call():
+        capacity = (await client.count(collection_name=live_alias_name(), exact=True)).count
+    point_ids: list[str] = []
+    payloads: list[dict[str, Any]] = []
+    stored: np.ndarray | None = None
+    scales: np.ndarray | None = None
+    offset: Any = None
+    while True:
+        async with track_qdrant_call():
+            points, offset = await client.scroll(
+                collection_name=live_alias_name(),
+                limit=settings.REINDEX_CHUNK_SIZE,
+                offset=offset,
+                with_payload=list(PAYLOAD_FIELDS),
+                with_vectors=True,
+            )
+        page = [point for point in points if point.vector is not None]
+        if page:
+            page_stored, page_scales = LocalVectorIndex.quantize(
+                np.asarray([point.vector for point in page], dtype=np.float32), settings.LOCAL_INDEX_DTYPE
+            )
+            start, end = len(point_ids), len(point_ids) + len(page)
+            if stored is None or end > len(stored):
+                # Points written after the count: grow once by at least half instead of per page.
+                size = max(end, capacity, len(stored) * 3 // 2 if stored is not None else 0)
+                stored = _grown(stored, (size, page_stored.shape[1]), page_stored.dtype)
+                if page_scales is not None:
+                    scales = _grown(scales, (size,), page_scales.dtype)
+            stored[start:end] = page_stored
+            if scales is not None:
+                scales[start:end] = page_scales
+            point_ids.extend(str(point.id) for point in page)
+            payloads.extend(point.payload or {} for point in page)
+        if offset is None:
+            break
+
+    count = len(point_ids)
+    if stored is None:
+        stored, scales = LocalVectorIndex.quantize(np.zeros((0, 0), dtype=np.float32), settings.LOCAL_INDEX_DTYPE)
+    return await asyncio.to_thread(
+        LocalVectorIndex.from_quantized,
+        point_ids,
+        stored[:count],
+        scales[:count] if scales is not None else None,
+        payloads,
+    )
+
+
+def _grown(array: np.ndarray | None, shape: tuple[int, ...], dtype: np.dtype[Any]) -> np.ndarray:
+    grown = np.empty(shape, dtype=dtype)
+    if array is not None:
+        grown[: len(array)] = array
+    return grown
+
+
+class LocalIndexSnapshotter:
+    """Refreshes the local index snapshot while Qdrant is healthy; one process per host does the work."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task[None] | None = None
+        self.last_error: str | None = None
+
+    def start(self) -> None:
+        if not get_search_settings().LOCAL_INDEX_DIR or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def refresh(self) -> bool:
+        settings = get_search_settings()
+        assert settings.LOCAL_INDEX_DIR
+        current = await load_local_index()
+        if current is not None and time.time() - current.created_at < settings.LOCAL_INDEX_SNAPSHOT_INTERVAL_SECONDS:
+            return False
+        if not await ensure_collection():
+            return False
+
+        root = Path(settings.LOCAL_INDEX_DIR)
+        root.mkdir(parents=True, exist_ok=True)
+        with open(root / "snapshot.lock", "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                index = await snapshot_collection()
+                await asyncio.to_thread(index.save, root)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        logger.info("Local search index snapshot: %s docs, %s bytes", index.size, index.nbytes())
+        return True
+
+    async def _run(self) -> None:
+        settings = get_search_settings()
+        while True:
+            try:
+                await self.refresh()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.last_error = str(exc)
+                logger.exception("Local search index snapshot failed")
+            await asyncio.sleep(min(settings.LOCAL_INDEX_SNAPSHOT_INTERVAL_SECONDS, 300.0))
+
+
+local_index_snapshotter = LocalIndexSnapshotter()
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, JSON, String, func
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, JSON, String, Text, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from apps.db.base import Base
@@ -8,6 +8,9 @@ from apps.db.base import Base
 
 class SearchEvent(Base):
     __tablename__ = "search_events"
+    # Monthly partitions are created and dropped by apps.search.partitions; in the database the
+    # primary key is (id, created_at) because a partitioned table's keys must include the partition column.
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
@@ -20,6 +23,7 @@ class SearchEvent(Base):
 
 class ClickEvent(Base):
     __tablename__ = "click_events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -31,6 +35,31 @@ class ClickEvent(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
 
 
+class SearchQueryHourly(Base):
+    __tablename__ = "search_query_hourly"
+
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    queries: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class SearchClickHourly(Base):
+    __tablename__ = "search_click_hourly"
+
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    doc_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    doc_type: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    clicks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class SearchPositionHourly(Base):
+    __tablename__ = "search_position_hourly"
+
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, primary_key=True)
+    impressions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    clicks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
 class UserSearchProfile(Base):
     __tablename__ = "user_search_profiles"
 
@@ -38,4 +67,43 @@ class UserSearchProfile(Base):
     top_cities: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
     top_categories: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
     top_types: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
+    profile_vector: Mapped[list[float] | None] = mapped_column(JSON, nullable=True)
+    profile_weight: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default=text("0"))
+    city_weights: Mapped[dict[str, float]] = mapped_column(JSON, nullable=False, default=dict, server_default=text("'{}'"))
+    category_weights: Mapped[dict[str, float]] = mapped_column(JSON, nullable=False, default=dict, server_default=text("'{}'"))
+    type_weights: Mapped[dict[str, float]] = mapped_column(JSON, nullable=False, default=dict, server_default=text("'{}'"))
+    recent_doc_ids: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list, server_default=text("'[]'"))
+    last_click_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class ReindexJob(Base):
+    __tablename__ = "search_reindex_jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    mode: Mapped[str] = mapped_column(String(32), nullable=False)
+    phase: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    indexed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    skipped: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    deleted: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    errors: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class SearchOutboxEntry(Base):
+    __tablename__ = "search_outbox"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    doc_type: Mapped[str] = mapped_column(String(32), nullable=False)
+    entity_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    # Set once OUTBOX_MAX_ATTEMPTS syncs have failed; dead entries are kept for inspection and never retried.
+    dead_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.db.session import AsyncSessionLocal
+from apps.search.config import get_search_settings
+from apps.search.models import SearchOutboxEntry
+from apps.search.qdrant_client import ensure_collection
+from apps.search.service import SearchService
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _coerce_entity_id(entity_id: str) -> Any:
+    return int(entity_id) if entity_id.isdigit() else entity_id
+
+
+class SearchOutboxService:
+    @staticmethod
+    def enqueue(db: AsyncSession, doc_type: str, entity_id: Any) -> None:
+        """Adds an index sync entry to the caller's transaction; it becomes visible on commit."""
+        db.add(SearchOutboxEntry(doc_type=doc_type, entity_id=str(entity_id), attempts=0))
+
+    @staticmethod
+    def backoff_seconds(attempts: int) -> float:
+        settings = get_search_settings()
+        return min(settings.OUTBOX_BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), settings.OUTBOX_BACKOFF_MAX_SECONDS)
+
+    @staticmethod
+    async def drain_batch(db: AsyncSession, batch_size: int) -> int:
+        """Syncs one batch of entries and returns how many were completed.
+
+        Entries are claimed under a short lease and the claim is committed
+        before any model or Qdrant call, so no row lock is held across the
+        network work. When a batch fails while Qdrant is up, its entities are
+        retried one at a time so a single bad entity cannot hold back the rest.
+        """
+        claimed = await SearchOutboxService._claim(db, batch_size)
+        if not claimed:
+            return 0
+
+        # Several entries for the same entity collapse into one sync of its current state.
+        pending: dict[tuple[str, str], list[int]] = defaultdict(list)
+        for entry_id, doc_type, entity_id in claimed:
+            pending[(doc_type, entity_id)].append(entry_id)
+
+        try:
+            await SearchOutboxService._sync(db, list(pending))
+        except Exception as exc:
+            await db.rollback()
+            if len(pending) == 1 or not await ensure_collection():
+                await SearchOutboxService._record_failure(db, [entry_id for entry_id, _, _ in claimed], exc)
+                logger.warning("Search outbox batch of %s entries failed, will retry", len(claimed), exc_info=True)
+                return 0
+            logger.warning("Search outbox batch of %s entities failed, retrying one by one", len(pending), exc_info=True)
+            return await SearchOutboxService._drain_one_by_one(db, pending)
+
+        await SearchOutboxService._complete(db, [entry_id for entry_id, _, _ in claimed])
+        return len(claimed)
+
+    @staticmethod
+    async def _claim(db: AsyncSession, batch_size: int) -> list[tuple[int, str, str]]:
+        settings = get_search_settings()
+        now = _utcnow()
+        result = await db.execute(
+            select(SearchOutboxEntry)
+            .where(SearchOutboxEntry.available_at <= now, SearchOutboxEntry.dead_at.is_(None))
+            .order_by(SearchOutboxEntry.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        entries = list(result.scalars().all())
+        # The lease keeps other workers off these entries until they are completed or rescheduled;
+        # if this worker dies, they become available again when it runs out.
+        for entry in entries:
+            entry.available_at = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        claimed = [(entry.id, entry.doc_type, entry.entity_id) for entry in entries]
+        await db.commit()
+        return claimed
+
+    @staticmethod
+    async def _sync(db: AsyncSession, entities: list[tuple[str, str]]) -> None:
+        by_type: dict[str, list[str]] = defaultdict(list)
+        for doc_type, entity_id in entities:
+            by_type[doc_type].append(entity_id)
+
+        docs: list[dict[str, Any]] = []
+        removed_doc_ids: list[str] = []
+        for doc_type, entity_ids in by_type.items():
+            found = await SearchService.load_documents(
+                db, doc_type, [_coerce_entity_id(entity_id) for entity_id in entity_ids]
+            )
+            for entity_id in entity_ids:
+                if entity_id in found:
+                    docs.append(found[entity_id])
+                else:
+                    removed_doc_ids.append(SearchService.build_doc_id(doc_type, entity_id))
+
+        await SearchService.upsert_documents(docs)
+        await SearchService.delete_points(removed_doc_ids)
+
+    @staticmethod
+    async def _drain_one_by_one(db: AsyncSession, pending: dict[tuple[str, str], list[int]]) -> int:
+        drained = 0
+        for entity, entry_ids in pending.items():
+            try:
+                await SearchOutboxService._sync(db, [entity])
+            except Exception as exc:
+                await db.rollback()
+                await SearchOutboxService._record_failure(db, entry_ids, exc)
+                continue
+            await SearchOutboxService._complete(db, entry_ids)
+            drained += len(entry_ids)
+        return drained
+
+    @staticmethod
+    async def _complete(db: AsyncSession, entry_ids: list[int]) -> None:
+        await db.execute(delete(SearchOutboxEntry).where(SearchOutboxEntry.id.in_(entry_ids)))
+        await db.commit()
+
+    @staticmethod
+    async def _record_failure(db: AsyncSession, entry_ids: list[int], exc: Exception) -> None:
+        """Reschedules the entries with backoff, or dead-letters them after OUTBOX_MAX_ATTEMPTS.
+
+        Runs in a fresh transaction: the failed sync may have been a database
+        error, so the entries are selected again rather than reused.
+        """
+        settings = get_search_settings()
+        now = _utcnow()
+        result = await db.execute(select(SearchOutboxEntry).where(SearchOutboxEntry.id.in_(entry_ids)))
+        for entry in result.scalars().all():
+            entry.attempts += 1
+            entry.last_error = str(exc)[:1000]
+            if entry.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                entry.dead_at = now
+                logger.error(
+                    "Search outbox entry %s (%s %s) failed %s times and was dead-lettered",
+                    entry.id,
+                    entry.doc_type,
+                    entry.entity_id,
+                    entry.attempts,
+                )
+            else:
+                entry.available_at = now + timedelta(seconds=SearchOutboxService.backoff_seconds(entry.attempts))
+        await db.commit()
+
+
+class SearchOutboxWorker:
+    """Drains search_outbox in the background of every API worker; SKIP LOCKED keeps them from colliding."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        settings = get_search_settings()
+        if not settings.OUTBOX_ENABLED or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        settings = get_search_settings()
+        while True:
+            drained = 0
+            try:
+                if await ensure_collection():
+                    async with AsyncSessionLocal() as db:
+                        drained = await SearchOutboxService.drain_batch(db, settings.OUTBOX_BATCH_SIZE)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Search outbox worker iteration failed")
+
+            if drained < settings.OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+
+
+outbox_worker = SearchOutboxWorker()
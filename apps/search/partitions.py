@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.db.session import AsyncSessionLocal
+from apps.search.config import get_search_settings
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("search_events", "click_events")
+PARTITION_LOCK_KEY = 7_310_452_002
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def month_start(value: datetime, offset: int = 0) -> datetime:
+    """First instant (UTC) of the month ``offset`` months away from the one containing ``value``."""
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    months = value.year * 12 + value.month - 1 + offset
+    return datetime(months // 12, months % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_month(table: str, name: str) -> datetime | None:
+    if not name.startswith(f"{table}_p"):
+        return None
+    match = _PARTITION_SUFFIX.search(name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+class TrackingPartitionService:
+    """Creates upcoming monthly partitions of the event tables and drops those past retention.
+
+    Rows that fall outside every monthly partition land in ``<table>_default``,
+    so inserts never fail if maintenance falls behind. Retention only drops
+    whole partitions; the hourly rollups are kept and remain the source for
+    analytics over longer periods.
+    """
+
+    @staticmethod
+    async def list_partitions(db: AsyncSession, table: str) -> list[str]:
+        result = await db.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table},
+        )
+        return sorted(result.scalars().all())
+
+    @staticmethod
+    async def create_partition(db: AsyncSession, table: str, start: datetime, end: datetime, has_default: bool) -> None:
+        """Creates the partition for ``[start, end)``, moving that range's rows out of ``<table>_default`` first.
+
+        CREATE TABLE ... PARTITION OF fails while the default partition holds
+        rows of the new range (events written while maintenance was behind), so
+        in that case the rows are copied into a standalone table that is then
+        attached in their place.
+        """
+        name = partition_name(table, start)
+        bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        if has_default:
+            default = f"{table}_default"
+            in_range = "created_at >= :start AND created_at < :end"
+            bind = {"start": start, "end": end}
+            # Holds off inserts routed to the default partition until the move commits.
+            await db.execute(text(f'LOCK TABLE "{default}" IN SHARE ROW EXCLUSIVE MODE'))
+            stray = await db.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE {in_range})'), bind)
+            if stray.scalar():
+                await db.execute(text(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+                await db.execute(text(f'INSERT INTO "{name}" SELECT * FROM "{default}" WHERE {in_range}'), bind)
+                await db.execute(text(f'DELETE FROM "{default}" WHERE {in_range}'), bind)
+                await db.execute(text(f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" {bounds}'))
+                logger.info("Moved rows of '%s' out of '%s'", name, default)
+                return
+        await db.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" {bounds}'))
+
+    @staticmethod
+    async def ensure_partitions(db: AsyncSession, now: datetime) -> list[str]:
+        settings = get_search_settings()
+        created: list[str] = []
+        for table in PARTITIONED_TABLES:
+            existing = set(await TrackingPartitionService.list_partitions(db, table))
+            for offset in range(0, max(settings.TRACKING_PARTITION_PREMAKE_MONTHS, 0) + 1):
+                start, end = month_start(now, offset), month_start(now, offset + 1)
+                name = partition_name(table, start)
+                if name in existing:
+                    continue
+                # Savepoint per partition: one failed create must not abort the rest of the run.
+                try:
+                    async with db.begin_nested():
+                        await TrackingPartitionService.create_partition(
+                            db, table, start, end, has_default=f"{table}_default" in existing
+                        )
+                except Exception:
+                    logger.exception("Failed to create tracking partition '%s'", name)
+                    continue
+                created.append(name)
+        return created
+
+    @staticmethod
+    async def drop_expired_partitions(db: AsyncSession, now: datetime) -> list[str]:
+        settings = get_search_settings()
+        if settings.TRACKING_RETENTION_MONTHS <= 0:
+            return []
+        # A partition is dropped only once all of its rows are older than the retention window.
+        cutoff = month_start(now, -settings.TRACKING_RETENTION_MONTHS)
+        dropped: list[str] = []
+        for table in PARTITIONED_TABLES:
+            for name in await TrackingPartitionService.list_partitions(db, table):
+                month = partition_month(table, name)
+                if month is None or month_start(month, 1) > cutoff:
+                    continue
+                try:
+                    async with db.begin_nested():
+                        await db.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+                except Exception:
+                    logger.exception("Failed to drop tracking partition '%s'", name)
+                    continue
+                dropped.append(name)
+        return dropped
+
+    @staticmethod
+    async def maintain(db: AsyncSession, now: datetime | None = None) -> dict[str, Any]:
+        if db.get_bind().dialect.name != "postgresql":
+            return {"skipped": True}
+        now = now or datetime.now(timezone.utc)
+        # Transaction-scoped lock: only one API worker runs the DDL, the others skip this round.
+        locked = await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+        if not locked.scalar():
+            return {"skipped": True}
+        created = await TrackingPartitionService.ensure_partitions(db, now)
+        dropped = await TrackingPartitionService.drop_expired_partitions(db, now)
+        await db.commit()
+        if created or dropped:
+            logger.info("Tracking partitions: created %s, dropped %s", created, dropped)
+        return {"skipped": False, "created": created, "dropped": dropped}
+
+
+class TrackingPartitionWorker:
+    """Runs TrackingPartitionService.maintain at startup and then every TRACKING_MAINTENANCE_INTERVAL_SECONDS."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task[None] | None = None
+        self.last_run: dict[str, Any] | None = None
+
+    def start(self) -> None:
+        settings = get_search_settings()
+        if not settings.TRACKING_MAINTENANCE_ENABLED or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        settings = get_search_settings()
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    self.last_run = await TrackingPartitionService.maintain(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Tracking partition maintenance failed")
+            await asyncio.sleep(settings.TRACKING_MAINTENANCE_INTERVAL_SECONDS)
+
+
+partition_worker = TrackingPartitionWorker()
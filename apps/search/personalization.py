@@ -5,6 +5,11 @@ from dataclasses import dataclass
 from math import sqrt
 from typing import Any
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with the search extras
+    np = None
+
 
 @dataclass
 class BonusWeights:
@@ -39,18 +44,27 @@ def compute_user_preferences(click_payloads: list[dict[str, Any]], top_n: int =
     }
 
 
-def build_profile_vector(vectors: list[list[float]]) -> list[float]:
-    if not vectors:
-        return []
+def decay_weights(ages_days: list[float], half_life_days: float) -> list[float]:
+    """Weight of each click: it halves every ``half_life_days`` of age; no decay when the half-life is 0."""
+    if half_life_days <= 0:
+        return [1.0] * len(ages_days)
+    if np is None:
+        return [0.5 ** (max(age, 0.0) / half_life_days) for age in ages_days]
+    ages = np.maximum(np.asarray(ages_days, dtype=np.float64), 0.0)
+    return np.power(0.5, ages / half_life_days).tolist()
 
+
+def _build_profile_vector_python(vectors: list[list[float]], weights: list[float]) -> list[float]:
     size = len(vectors[0])
     means = [0.0] * size
-    for vector in vectors:
+    for vector, weight in zip(vectors, weights):
         for idx in range(size):
-            means[idx] += float(vector[idx])
+            means[idx] += float(vector[idx]) * weight
 
-    count = float(len(vectors))
-    means = [value / count for value in means]
+    total = sum(weights)
+    if total <= 0:
+        return []
+    means = [value / total for value in means]
 
     norm = sqrt(sum(value * value for value in means))
     if norm == 0:
@@ -59,40 +73,87 @@ def build_profile_vector(vectors: list[list[float]]) -> list[float]:
     return [value / norm for value in means]
 
 
-def rerank_results(
-    items: list[dict[str, Any]],
+def build_profile_vector(vectors: list[list[float]], weights: list[float] | None = None) -> list[float]:
+    """Normalized (optionally weighted, e.g. time-decayed) mean of the clicked document vectors."""
+    if not vectors:
+        return []
+    if weights is None:
+        weights = [1.0] * len(vectors)
+    if np is None:
+        return _build_profile_vector_python(vectors, weights)
+
+    matrix = np.asarray(vectors, dtype=np.float64)
+    weight_array = np.asarray(weights, dtype=np.float64)
+    total = weight_array.sum()
+    if total <= 0:
+        return []
+    means = weight_array @ matrix / total
+
+    norm = np.linalg.norm(means)
+    if norm == 0:
+        return means.tolist()
+
+    return (means / norm).tolist()
+
+
+def _type_bonuses(
     user_role: str | None,
     preferences: dict[str, Any],
     weights: BonusWeights,
-    role_boost: bool = True,
-) -> list[dict[str, Any]]:
-    top_cities = set(preferences.get("top_cities", []))
-    top_categories = set(preferences.get("top_categories", []))
+    role_boost: bool,
+    doc_types: set[str | None],
+) -> dict[str | None, float]:
+    """Role, preferred-type and click-frequency bonus of every document type, computed once per type."""
     top_types = set(preferences.get("top_types", []))
     type_counts: dict[str, int] = preferences.get("type_counts", {})
 
-    for item in items:
-        adjusted_score = float(item.get("score", 0.0))
-        doc_type = item.get("type")
-
+    bonuses: dict[str | None, float] = {}
+    for doc_type in doc_types:
+        bonus = 0.0
         if role_boost and user_role:
             if user_role == "investor" and doc_type == "campaign":
-                adjusted_score += weights.role_boost_weight
+                bonus += weights.role_boost_weight
             elif user_role == "member" and doc_type in {"club", "news"}:
-                adjusted_score += weights.role_boost_weight
+                bonus += weights.role_boost_weight
             elif user_role in {"club", "organization"} and doc_type in {"club", "news"}:
-                adjusted_score += weights.role_boost_weight / 2
+                bonus += weights.role_boost_weight / 2
 
-        if item.get("city") in top_cities:
-            adjusted_score += weights.pref_city_weight
-        if item.get("category") in top_categories:
-            adjusted_score += weights.pref_category_weight
         if doc_type in top_types:
-            adjusted_score += weights.pref_type_weight
+            bonus += weights.pref_type_weight
 
         click_bias = type_counts.get(doc_type or "", 0)
-        adjusted_score += min(click_bias * 0.005, 0.03)
+        bonus += min(click_bias * 0.005, 0.03)
+        bonuses[doc_type] = bonus
+    return bonuses
 
+
+def rerank_results(
+    items: list[dict[str, Any]],
+    user_role: str | None,
+    preferences: dict[str, Any],
+    weights: BonusWeights,
+    role_boost: bool = True,
+    top_k: int | None = None,
+) -> list[dict[str, Any]]:
+    """Adds personalization bonuses to ``score`` and returns the items best first (only ``top_k`` if given).
+
+    Plain Python on purpose: reading the fields out of each hit dict costs more
+    than the bonus math, so NumPy code arrays were slower than list.sort even
+    at 500 hits. The stable sort keeps Qdrant order among tied scores.
+    """
+    if not items:
+        return []
+    top_cities = set(preferences.get("top_cities", []))
+    top_categories = set(preferences.get("top_categories", []))
+    type_bonuses = _type_bonuses(user_role, preferences, weights, role_boost, {item.get("type") for item in items})
+
+    for item in items:
+        adjusted_score = float(item.get("score", 0.0)) + type_bonuses[item.get("type")]
+        if item.get("city") in top_cities:
+            adjusted_score += weights.pref_city_weight
+        if item.get("category") in top_categories:
+            adjusted_score += weights.pref_category_weight
         item["score"] = adjusted_score
 
-    return sorted(items, key=lambda payload: payload.get("score", 0.0), reverse=True)
+    ranked = sorted(items, key=lambda payload: payload.get("score", 0.0), reverse=True)
+    return ranked if top_k is None else ranked[:top_k]
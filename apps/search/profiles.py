@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.search.config import get_search_settings
+from apps.search.models import UserSearchProfile
+from apps.search.service import SearchService
+from apps.search.tracking import SearchTrackingService
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_aware(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def decay_factor(last_click_at: datetime | None, now: datetime, half_life_days: float) -> float:
+    if last_click_at is None or half_life_days <= 0:
+        return 1.0
+    elapsed_days = max((_as_aware(now) - _as_aware(last_click_at)).total_seconds(), 0.0) / 86400
+    return 0.5 ** (elapsed_days / half_life_days)
+
+
+def _bump(weights: dict[str, float], key: str | None, decay: float) -> dict[str, float]:
+    decayed = {name: weight * decay for name, weight in (weights or {}).items()}
+    if key:
+        decayed[key] = decayed.get(key, 0.0) + 1.0
+    return decayed
+
+
+def _top(weights: dict[str, float], top_n: int = 3) -> list[str]:
+    return [name for name, _ in sorted(weights.items(), key=lambda item: item[1], reverse=True)[:top_n]]
+
+
+class SearchProfileService:
+    """Keeps UserSearchProfile up to date on every click so /recommend and /search read a single row.
+
+    The profile vector is a weighted mean of clicked document vectors and the
+    city/category/type counters are weighted counts; older clicks lose half of
+    their weight every PROFILE_DECAY_HALF_LIFE_DAYS.
+    """
+
+    @staticmethod
+    def point_id(doc_id: str) -> str:
+        # Clicks arrive as "type:entity_id" or as the Qdrant point UUID itself.
+        if ":" in doc_id:
+            doc_type, _, entity_id = doc_id.partition(":")
+            return SearchService.build_doc_id(doc_type, entity_id)
+        return doc_id
+
+    @staticmethod
+    def apply_click(
+        profile: UserSearchProfile,
+        point_id: str,
+        payload: dict[str, Any],
+        vector: list[float] | None,
+        clicked_at: datetime,
+    ) -> None:
+        settings = get_search_settings()
+        decay = decay_factor(profile.last_click_at, clicked_at, settings.PROFILE_DECAY_HALF_LIFE_DAYS)
+
+        profile.city_weights = _bump(profile.city_weights, payload.get("city"), decay)
+        profile.category_weights = _bump(profile.category_weights, payload.get("category"), decay)
+        profile.type_weights = _bump(profile.type_weights, payload.get("type"), decay)
+        profile.top_cities = _top(profile.city_weights)
+        profile.top_categories = _top(profile.category_weights)
+        profile.top_types = _top(profile.type_weights)
+
+        if vector:
+            previous = profile.profile_vector
+            previous_weight = (profile.profile_weight or 0.0) * decay
+            if previous and len(previous) == len(vector) and previous_weight > 0:
+                total = previous_weight + 1.0
+                profile.profile_vector = [
+                    (old * previous_weight + new) / total for old, new in zip(previous, vector)
+                ]
+                profile.profile_weight = total
+            else:
+                profile.profile_vector = [float(value) for value in vector]
+                profile.profile_weight = 1.0
+
+        recent = [point_id, *[doc_id for doc_id in profile.recent_doc_ids or [] if doc_id != point_id]]
+        profile.recent_doc_ids = recent[: settings.PROFILE_RECENT_DOCS]
+        profile.last_click_at = clicked_at
+
+    @staticmethod
+    def preferences(profile: UserSearchProfile) -> dict[str, Any]:
+        """Same shape as compute_user_preferences, built from the decayed counters."""
+        return {
+            "top_cities": list(profile.top_cities or []),
+            "top_categories": list(profile.top_categories or []),
+            "top_types": list(profile.top_types or []),
+            "type_counts": dict(profile.type_weights or {}),
+        }
+
+    @staticmethod
+    async def get(db: AsyncSession, user_id: int, for_update: bool = False) -> UserSearchProfile | None:
+        query = select(UserSearchProfile).where(UserSearchProfile.user_id == user_id)
+        if for_update:
+            query = query.with_for_update()
+        result = await db.execute(query)
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def _fetch_points(point_ids: list[str]) -> dict[str, tuple[dict[str, Any], list[float]]]:
+        try:
+            return await SearchService.fetch_points_by_doc_ids(point_ids)
+        except Exception:
+            # The click itself is already stored; the profile just misses this vector.
+            logger.warning("Could not load clicked documents for the search profile", exc_info=True)
+            return {}
+
+    @staticmethod
+    async def record_click(db: AsyncSession, user_id: int, doc_id: str) -> None:
+        point_id = SearchProfileService.point_id(doc_id)
+        payload, vector = (await SearchProfileService._fetch_points([point_id])).get(point_id, ({}, None))
+        if not payload and ":" in doc_id:
+            payload = {"type": doc_id.partition(":")[0]}
+
+        try:
+            # FOR UPDATE locks nothing while the row is missing, so concurrent first clicks insert it idempotently first.
+            await db.execute(
+                insert(UserSearchProfile).values(user_id=user_id).on_conflict_do_nothing(index_elements=["user_id"])
+            )
+            profile = await SearchProfileService.get(db, user_id, for_update=True)
+            SearchProfileService.apply_click(profile, point_id, payload, vector, _utcnow())
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.warning("Failed to update search profile of user %s", user_id, exc_info=True)
+
+    @staticmethod
+    async def rebuild_from_clicks(db: AsyncSession, user_id: int) -> UserSearchProfile | None:
+        """One-off backfill for users whose clicks predate profiles; replays them oldest first."""
+        settings = get_search_settings()
+        clicks = await SearchTrackingService.get_recent_click_events(db, user_id, limit=settings.PROFILE_RECENT_DOCS)
+        if not clicks:
+            return None
+
+        point_ids = [SearchProfileService.point_id(click.doc_id) for click in clicks]
+        points = await SearchProfileService._fetch_points(point_ids)
+        profile = UserSearchProfile(user_id=user_id)
+        for click, point_id in reversed(list(zip(clicks, point_ids))):
+            payload, vector = points.get(point_id, ({"type": click.doc_type}, None))
+            SearchProfileService.apply_click(profile, point_id, payload, vector, click.created_at or _utcnow())
+
+        db.add(profile)
+        try:
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.warning("Failed to store rebuilt search profile of user %s", user_id, exc_info=True)
+        return profile
@@ -1,30 +1,152 @@
+from __future__ import annotations
+
+import asyncio
 import inspect
 import logging
-from typing import Any
-
-from qdrant_client import AsyncQdrantClient
-from qdrant_client.http import exceptions as qdrant_exceptions
-from qdrant_client.http.models import Distance, Filter, VectorParams
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
 
 from apps.search.config import get_search_settings
 
+if TYPE_CHECKING:
+    from qdrant_client import AsyncQdrantClient
+    from qdrant_client.http.models import (
+        Filter,
+        HnswConfigDiff,
+        QueryRequest,
+        ScalarQuantization,
+        SearchParams,
+    )
+
 logger = logging.getLogger(__name__)
 
 
+def is_outage(exc: BaseException) -> bool:
+    """Whether ``exc`` means Qdrant itself is failing: transport errors, timeouts and 5xx responses.
+
+    4xx responses (a bad filter, a missing index) and validation errors are
+    problems with one request and must not take search down for everyone.
+    """
+    from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+    if isinstance(exc, UnexpectedResponse):
+        return exc.status_code is None or exc.status_code >= 500
+    if isinstance(exc, ResponseHandlingException):
+        # Also raised for responses that fail to parse; only the wrapped transport errors count.
+        return is_outage(exc.source) if isinstance(exc.source, Exception) else True
+    if isinstance(exc, (OSError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    import httpx
+
+    return isinstance(exc, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """Fails Qdrant calls fast after repeated errors instead of waiting out every timeout.
+
+    closed -> open after ``failure_threshold`` consecutive failures; open -> half_open once
+    ``reset_timeout`` has passed. Half-open lets a single probe through at a time, and its
+    result closes or re-opens the circuit; a probe that never reports back (its caller was
+    cancelled) is replaced after another ``reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probe_started_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state != self.HALF_OPEN:
+            return state == self.CLOSED
+        now = time.monotonic()
+        if self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+            return False
+        self.probe_started_at = now
+        return True
+
+    def release_probe(self) -> None:
+        self.probe_started_at = None
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probe_started_at = None
+
+
 class QdrantState:
     def __init__(self) -> None:
+        settings = get_search_settings()
         self.reachable: bool = False
         self.collection_exists: bool = False
         self.last_error: str | None = None
+        self.checked_at: float | None = None
+        self.configured: bool = False
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.QDRANT_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.QDRANT_CIRCUIT_RESET_SECONDS,
+        )
+
+    def mark_ready(self) -> None:
+        self.reachable = True
+        self.collection_exists = True
+        self.last_error = None
+        self.checked_at = time.monotonic()
+        self.breaker.record_success()
+
+    def mark_failure(self, exc: BaseException) -> None:
+        # Any failure drops the cached readiness so the next caller re-verifies the collection;
+        # only outages count against the breaker.
+        self.reachable = False
+        self.collection_exists = False
+        self.last_error = str(exc)
+        self.checked_at = None
+        if is_outage(exc):
+            self.breaker.record_failure()
+
+    def is_fresh(self) -> bool:
+        settings = get_search_settings()
+        return (
+            self.collection_exists
+            and self.checked_at is not None
+            and time.monotonic() - self.checked_at < settings.QDRANT_READINESS_TTL_SECONDS
+        )
 
 
 qdrant_state = QdrantState()
 _qdrant_client: AsyncQdrantClient | None = None
+_background_tasks: set[asyncio.Task[None]] = set()
 
 
 def get_qdrant_client() -> AsyncQdrantClient:
     global _qdrant_client
     if _qdrant_client is None:
+        # The SDK takes about a second to import, so it is loaded on first use rather than with the app.
+        from qdrant_client import AsyncQdrantClient
+
         settings = get_search_settings()
         _qdrant_client = AsyncQdrantClient(
             url=settings.QDRANT_URL,
@@ -34,6 +156,21 @@ def get_qdrant_client() -> AsyncQdrantClient:
     return _qdrant_client
 
 
+@asynccontextmanager
+async def track_qdrant_call() -> AsyncIterator[None]:
+    try:
+        yield
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        # A rejected request (4xx, validation) says nothing about the readiness of the collection.
+        if is_outage(exc):
+            qdrant_state.mark_failure(exc)
+        raise
+    else:
+        qdrant_state.breaker.record_success()
+
+
 async def _call_async(func: Any, **kwargs: Any) -> Any:
     params = inspect.signature(func).parameters
     filtered = {key: value for key, value in kwargs.items() if key in params}
@@ -48,6 +185,7 @@ async def search_points(
     limit: int,
     score_threshold: float | None,
     with_payload: bool,
+    search_params: SearchParams | None = None,
 ) -> list[Any]:
     client = get_qdrant_client()
     kwargs = {
@@ -59,45 +197,336 @@ async def search_points(
         "limit": limit,
         "score_threshold": score_threshold,
         "with_payload": with_payload,
+        "search_params": search_params,
     }
-    if hasattr(client, "search"):
-        return await _call_async(client.search, **kwargs)
-    if hasattr(client, "search_points"):
-        response = await _call_async(client.search_points, **kwargs)
-    elif hasattr(client, "query_points"):
-        response = await _call_async(client.query_points, **kwargs)
-    else:
-        raise AttributeError("AsyncQdrantClient has no search-like method.")
+    async with track_qdrant_call():
+        if hasattr(client, "search"):
+            return await _call_async(client.search, **kwargs)
+        if hasattr(client, "search_points"):
+            response = await _call_async(client.search_points, **kwargs)
+        elif hasattr(client, "query_points"):
+            response = await _call_async(client.query_points, **kwargs)
+        else:
+            raise AttributeError("AsyncQdrantClient has no search-like method.")
     return response.points if hasattr(response, "points") else response
 
 
-async def ensure_collection() -> bool:
+async def search_points_batch(*, collection_name: str, requests: list[QueryRequest]) -> list[list[Any]]:
+    """Runs several vector queries in one round trip; results keep the order of ``requests``."""
+    if not requests:
+        return []
+    client = get_qdrant_client()
+    async with track_qdrant_call():
+        responses = await client.query_batch_points(collection_name=collection_name, requests=requests)
+    return [response.points for response in responses]
+
+
+async def recommend_points(
+    *,
+    collection_name: str,
+    positive: list[str],
+    query_filter: Filter | None,
+    limit: int,
+    score_threshold: float | None,
+    search_params: SearchParams | None = None,
+) -> list[Any] | None:
+    """Points nearest to the stored ``positive`` points, which Qdrant resolves and excludes itself.
+
+    Returns None when one of ``positive`` is not in the collection; that is a
+    client error, so it does not count against the circuit breaker.
+    """
+    from qdrant_client.http.exceptions import UnexpectedResponse
+    from qdrant_client.http.models import RecommendInput, RecommendQuery
+
+    client = get_qdrant_client()
+    async with track_qdrant_call():
+        try:
+            response = await client.query_points(
+                collection_name=collection_name,
+                query=RecommendQuery(recommend=RecommendInput(positive=positive)),
+                query_filter=query_filter,
+                limit=limit,
+                score_threshold=score_threshold,
+                with_payload=True,
+                search_params=search_params,
+            )
+        except UnexpectedResponse as exc:
+            if exc.status_code != 404:
+                raise
+            return None
+    return response.points
+
+
+def _hnsw_config() -> HnswConfigDiff | None:
+    from qdrant_client.http.models import HnswConfigDiff
+
+    settings = get_search_settings()
+    if settings.QDRANT_HNSW_M is None and settings.QDRANT_HNSW_EF_CONSTRUCT is None:
+        return None
+    return HnswConfigDiff(m=settings.QDRANT_HNSW_M, ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT)
+
+
+def _quantization_config() -> ScalarQuantization | None:
+    from qdrant_client.http.models import ScalarQuantization, ScalarQuantizationConfig, ScalarType
+
+    settings = get_search_settings()
+    if not settings.QDRANT_QUANTIZATION_ENABLED:
+        return None
+    return ScalarQuantization(
+        scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8,
+            quantile=settings.QDRANT_QUANTIZATION_QUANTILE,
+            always_ram=True,
+        )
+    )
+
+
+def build_search_params() -> SearchParams | None:
+    from qdrant_client.http.models import QuantizationSearchParams, SearchParams
+
+    settings = get_search_settings()
+    quantization = None
+    if settings.QDRANT_QUANTIZATION_ENABLED:
+        quantization = QuantizationSearchParams(
+            rescore=settings.QDRANT_QUANTIZATION_RESCORE,
+            oversampling=settings.QDRANT_QUANTIZATION_OVERSAMPLING,
+        )
+    if quantization is None and settings.QDRANT_HNSW_EF_SEARCH is None:
+        return None
+    return SearchParams(hnsw_ef=settings.QDRANT_HNSW_EF_SEARCH, quantization=quantization)
+
+
+async def create_search_collection(collection_name: str) -> None:
+    from qdrant_client.http.models import Distance, VectorParams
+
     settings = get_search_settings()
     client = get_qdrant_client()
     vector_size = settings.VECTOR_SIZE or 384
+    quantization = _quantization_config()
+    await client.create_collection(
+        collection_name=collection_name,
+        # With int8 quantization in RAM the float32 originals are only read for rescoring.
+        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE, on_disk=quantization is not None),
+        hnsw_config=_hnsw_config(),
+        quantization_config=quantization,
+    )
+    logger.info("Qdrant collection '%s' created with vector size %s", collection_name, vector_size)
+    await configure_search_collection(collection_name)
+
+
+async def configure_search_collection(collection_name: str) -> None:
+    """Brings an existing collection to the configured payload indexes, HNSW and quantization; safe to rerun."""
+    from qdrant_client.http.models import (
+        Disabled,
+        PayloadSchemaType,
+        TextIndexParams,
+        TextIndexType,
+        TokenizerType,
+        VectorParamsDiff,
+    )
+
+    settings = get_search_settings()
+    client = get_qdrant_client()
+    info = await client.get_collection(collection_name)
+
+    indexed_fields = set((info.payload_schema or {}).keys())
+    for field_name in settings.QDRANT_KEYWORD_INDEX_FIELDS:
+        if field_name in indexed_fields:
+            continue
+        await client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=PayloadSchemaType.KEYWORD,
+        )
+        logger.info("Created keyword payload index '%s' on '%s'", field_name, collection_name)
+    if settings.SEARCH_LEXICAL_PUSHDOWN and "search_text" not in indexed_fields:
+        await client.create_payload_index(
+            collection_name=collection_name,
+            field_name="search_text",
+            field_schema=TextIndexParams(
+                type=TextIndexType.TEXT, tokenizer=TokenizerType.WORD, lowercase=True, phrase_matching=True
+            ),
+        )
+        logger.info("Created full-text payload index 'search_text' on '%s'", collection_name)
+
+    update: dict[str, Any] = {}
+    hnsw = _hnsw_config()
+    current_hnsw = info.config.hnsw_config
+    if hnsw is not None and (
+        (hnsw.m is not None and hnsw.m != current_hnsw.m)
+        or (hnsw.ef_construct is not None and hnsw.ef_construct != current_hnsw.ef_construct)
+    ):
+        update["hnsw_config"] = hnsw
+
+    quantization = _quantization_config()
+    current_quantization = info.config.quantization_config
+    if quantization is not None and current_quantization != quantization:
+        update["quantization_config"] = quantization
+        update["vectors_config"] = {"": VectorParamsDiff(on_disk=True)}
+    elif quantization is None and current_quantization is not None:
+        update["quantization_config"] = Disabled.DISABLED
+        update["vectors_config"] = {"": VectorParamsDiff(on_disk=False)}
+
+    if update:
+        await client.update_collection(collection_name=collection_name, **update)
+        logger.info("Updated '%s' collection config: %s", collection_name, ", ".join(sorted(update)))
+
+
+def live_alias_name() -> str:
+    """Alias every search read and write goes through; blue/green switches repoint it and never rename collections."""
+    return f"{get_search_settings().QDRANT_COLLECTION}_live"
+
+
+async def get_alias_target(alias_name: str) -> str | None:
+    client = get_qdrant_client()
+    response = await client.get_aliases()
+    for alias in response.aliases:
+        if alias.alias_name == alias_name:
+            return alias.collection_name
+    return None
+
+
+async def list_index_versions() -> list[str]:
+    settings = get_search_settings()
+    client = get_qdrant_client()
+    prefix = f"{settings.QDRANT_COLLECTION}_v"
+    response = await client.get_collections()
+    return sorted(collection.name for collection in response.collections if collection.name.startswith(prefix))
+
+
+async def create_index_version() -> str:
+    settings = get_search_settings()
+    version = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    collection_name = f"{settings.QDRANT_COLLECTION}_v{version}"
+    await create_search_collection(collection_name)
+    return collection_name
+
+
+async def switch_alias(collection_name: str) -> str | None:
+    """Points the live alias at ``collection_name`` in one atomic update and returns the previous target.
+
+    No collection is deleted here: if the update fails, the previous target is
+    still live and intact.
+    """
+    from qdrant_client.http.models import CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation
+
+    client = get_qdrant_client()
+    alias_name = live_alias_name()
+    previous = await get_alias_target(alias_name)
+
+    operations: list[Any] = []
+    if previous is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name)))
+    operations.append(
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=alias_name))
+    )
+    await client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info("Search alias '%s' switched from '%s' to '%s'", alias_name, previous, collection_name)
+    return previous
+
 
+async def _create_live_alias() -> None:
+    """Points the live alias at the existing index (creating a plain one on a fresh install); a pure alias create."""
+    from qdrant_client.http.models import CreateAlias, CreateAliasOperation
+
+    settings = get_search_settings()
+    client = get_qdrant_client()
+    target = settings.QDRANT_COLLECTION
+    if not await client.collection_exists(target):
+        await create_search_collection(target)
     try:
-        exists = await client.collection_exists(settings.QDRANT_COLLECTION)
-        qdrant_state.reachable = True
+        await client.update_collection_aliases(
+            change_aliases_operations=[
+                CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=live_alias_name()))
+            ]
+        )
+    except Exception:
+        # Another worker created it first.
+        if await get_alias_target(live_alias_name()) is None:
+            raise
+        return
+    logger.info("Search alias '%s' created for '%s'", live_alias_name(), target)
 
-        if not exists:
-            await client.create_collection(
-                collection_name=settings.QDRANT_COLLECTION,
-                vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
-            )
-            logger.info(
-                "Qdrant collection '%s' created with vector size %s",
-                settings.QDRANT_COLLECTION,
-                vector_size,
-            )
-            qdrant_state.collection_exists = True
-        else:
-            qdrant_state.collection_exists = True
-        qdrant_state.last_error = None
+
+async def drop_index_version(collection_name: str) -> bool:
+    if collection_name == await get_alias_target(live_alias_name()):
+        # Rolled back to this version in the meantime; it is live again.
+        return False
+    await get_qdrant_client().delete_collection(collection_name)
+    logger.info("Dropped search index version '%s'", collection_name)
+    return True
+
+
+def schedule_index_version_drop(collection_name: str, delay_seconds: float) -> None:
+    async def drop_later() -> None:
+        await asyncio.sleep(delay_seconds)
+        try:
+            await drop_index_version(collection_name)
+        except Exception:
+            logger.warning("Failed to drop search index version '%s'", collection_name, exc_info=True)
+
+    task = asyncio.create_task(drop_later())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def drop_retired_index_versions(keep_latest: int = 1) -> list[str]:
+    """Drops versions that are not live, keeping the newest ``keep_latest`` as rollback targets."""
+    current = await get_alias_target(live_alias_name())
+    retired = [name for name in await list_index_versions() if name != current]
+    stale = retired[: max(len(retired) - keep_latest, 0)]
+    return [name for name in stale if await drop_index_version(name)]
+
+
+async def ensure_collection(force: bool = False) -> bool:
+    """Returns cached readiness; Qdrant is only asked again when the cache expired or a call failed."""
+    if not force and qdrant_state.is_fresh():
+        return True
+    if not qdrant_state.breaker.allow_request():
+        return False
+
+    try:
+        if await get_alias_target(live_alias_name()) is None:
+            await _create_live_alias()
+        if not qdrant_state.configured:
+            await configure_search_collection(live_alias_name())
+        qdrant_state.configured = True
+        qdrant_state.mark_ready()
         return True
-    except (qdrant_exceptions.ResponseHandlingException, OSError, Exception) as exc:
-        qdrant_state.reachable = False
-        qdrant_state.collection_exists = False
-        qdrant_state.last_error = str(exc)
-        logger.exception("Qdrant is not reachable during startup. Search is degraded.")
+    except Exception as exc:
+        qdrant_state.mark_failure(exc)
+        logger.warning("Qdrant is not reachable (circuit %s). Search is degraded: %s", qdrant_state.breaker.state, exc)
         return False
+    finally:
+        # Frees the half-open probe slot when the check ended without an outage verdict (4xx, cancellation).
+        qdrant_state.breaker.release_probe()
+
+
+class QdrantReadinessMonitor:
+    """Re-verifies the collection on an interval so readiness recovers without user traffic."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        settings = get_search_settings()
+        while True:
+            await asyncio.sleep(settings.QDRANT_READINESS_TTL_SECONDS)
+            await ensure_collection(force=True)
+
+
+readiness_monitor = QdrantReadinessMonitor()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import desc, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.db.base import Base
+from apps.search.models import ClickEvent, SearchClickHourly, SearchEvent, SearchPositionHourly, SearchQueryHourly
+
+
+def hour_bucket(value: datetime | None) -> datetime:
+    value = value or datetime.now(timezone.utc)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_increments(rows_by_model: dict[type[Base], list[dict[str, Any]]]) -> dict[type[Base], list[dict[str, Any]]]:
+    """Per-hour counter increments for a batch of raw event rows, sorted by key.
+
+    Search events add one query and one impression per returned position
+    (positions are 1-based, as sent by the client in /search/click); click
+    events add a click for the document and, when known, for its position.
+    """
+    queries: Counter[datetime] = Counter()
+    doc_clicks: Counter[tuple[datetime, str, str]] = Counter()
+    impressions: Counter[tuple[datetime, int]] = Counter()
+    position_clicks: Counter[tuple[datetime, int]] = Counter()
+
+    for row in rows_by_model.get(SearchEvent, []):
+        bucket = hour_bucket(row.get("created_at"))
+        queries[bucket] += 1
+        for position in range(1, len(row.get("top_doc_ids") or []) + 1):
+            impressions[(bucket, position)] += 1
+
+    for row in rows_by_model.get(ClickEvent, []):
+        bucket = hour_bucket(row.get("created_at"))
+        doc_clicks[(bucket, row["doc_id"], row.get("doc_type") or "unknown")] += 1
+        if row.get("position") is not None:
+            position_clicks[(bucket, int(row["position"]))] += 1
+
+    increments: dict[type[Base], list[dict[str, Any]]] = {}
+    if queries:
+        increments[SearchQueryHourly] = [{"bucket": bucket, "queries": count} for bucket, count in sorted(queries.items())]
+    if doc_clicks:
+        increments[SearchClickHourly] = [
+            {"bucket": bucket, "doc_id": doc_id, "doc_type": doc_type, "clicks": count}
+            for (bucket, doc_id, doc_type), count in sorted(doc_clicks.items())
+        ]
+    if impressions or position_clicks:
+        increments[SearchPositionHourly] = [
+            {"bucket": key[0], "position": key[1], "impressions": impressions[key], "clicks": position_clicks[key]}
+            for key in sorted(set(impressions) | set(position_clicks))
+        ]
+    return increments
+
+
+_ROLLUP_KEYS: dict[type[Base], tuple[list[str], list[str]]] = {
+    SearchQueryHourly: (["bucket"], ["queries"]),
+    SearchClickHourly: (["bucket", "doc_id"], ["clicks"]),
+    SearchPositionHourly: (["bucket", "position"], ["impressions", "clicks"]),
+}
+
+
+class SearchRollupService:
+    """Hourly analytics counters, updated in the same transaction as the raw events they summarize."""
+
+    @staticmethod
+    async def apply(db: AsyncSession, rows_by_model: dict[type[Base], list[dict[str, Any]]]) -> None:
+        # Rows are sorted by key so that concurrent flushes from several workers lock them in the same order.
+        for model, rows in rollup_increments(rows_by_model).items():
+            index_elements, counters = _ROLLUP_KEYS[model]
+            stmt = insert(model).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={counter: getattr(model, counter) + getattr(stmt.excluded, counter) for counter in counters},
+            )
+            await db.execute(stmt)
+
+    @staticmethod
+    async def count_queries_since(db: AsyncSession, since: datetime) -> int:
+        """Queries logged from the start of the hour containing ``since``."""
+        result = await db.execute(
+            select(func.coalesce(func.sum(SearchQueryHourly.queries), 0)).where(
+                SearchQueryHourly.bucket >= hour_bucket(since)
+            )
+        )
+        return int(result.scalar() or 0)
+
+    @staticmethod
+    async def ctr_by_position(db: AsyncSession, since: datetime, max_position: int = 10) -> list[dict[str, Any]]:
+        impressions = func.sum(SearchPositionHourly.impressions)
+        clicks = func.sum(SearchPositionHourly.clicks)
+        result = await db.execute(
+            select(SearchPositionHourly.position, impressions, clicks)
+            .where(SearchPositionHourly.bucket >= hour_bucket(since), SearchPositionHourly.position <= max_position)
+            .group_by(SearchPositionHourly.position)
+            .order_by(SearchPositionHourly.position)
+        )
+        return [
+            {
+                "position": position,
+                "impressions": int(shown or 0),
+                "clicks": int(clicked or 0),
+                "ctr": round(int(clicked or 0) / int(shown), 4) if shown else None,
+            }
+            for position, shown, clicked in result.all()
+        ]
+
+    @staticmethod
+    async def top_clicked_docs(
+        db: AsyncSession, since: datetime, limit: int = 20, doc_type: str | None = None
+    ) -> list[dict[str, Any]]:
+        clicks = func.sum(SearchClickHourly.clicks).label("clicks")
+        query = select(SearchClickHourly.doc_id, SearchClickHourly.doc_type, clicks).where(
+            SearchClickHourly.bucket >= hour_bucket(since)
+        )
+        if doc_type:
+            query = query.where(SearchClickHourly.doc_type == doc_type)
+        result = await db.execute(
+            query.group_by(SearchClickHourly.doc_id, SearchClickHourly.doc_type).order_by(desc(clicks)).limit(limit)
+        )
+        return [{"doc_id": doc_id, "doc_type": type_, "clicks": int(count)} for doc_id, type_, count in result.all()]
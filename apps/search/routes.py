@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Literal
+import asyncio
+import logging
+from typing import Any, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.security import OAuth2PasswordBearer
@@ -10,20 +12,46 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from apps.core.settings import settings
 from apps.db.dependencies import get_db
+from apps.db.session import AsyncSessionLocal
+from apps.search.cache import get_query_vector_cache, get_search_result_cache, get_similar_cache
 from apps.search.config import get_search_settings
-from apps.search.qdrant_client import ensure_collection, qdrant_state
+from apps.search.embedding_server import EmbeddingServerError, get_embedding_client
+from apps.search.embedding_store import get_embedding_store
+from apps.search.embeddings import get_embedding_batcher
+from apps.search.event_buffer import tracking_buffer
+from apps.search.jobs import ReindexJobService
+from apps.search.local_index import get_local_index
+from apps.search.models import UserSearchProfile
+from apps.search.profiles import SearchProfileService
+from apps.search.qdrant_client import (
+    ensure_collection,
+    get_alias_target,
+    list_index_versions,
+    live_alias_name,
+    qdrant_state,
+    switch_alias,
+)
+from apps.search.runtime import get_thread_budget
 from apps.search.schemas import (
-    ReindexResponse,
+    IndexAliasSwitchResponse,
+    IndexVersionsResponse,
+    ReindexJobResponse,
+    SearchBatchRequest,
+    SearchBatchResponse,
     SearchClickRequest,
     SearchClickResponse,
     SearchHealthResponse,
     SearchResponse,
 )
 from apps.search.service import SearchService
+from apps.search.stages import cancel_stage, optional_stage, required_stage, stage_stats
 from apps.search.tracking import SearchTrackingService
 from apps.search.personalization import compute_user_preferences
+from apps.search.warmup import search_warmup
 from apps.users.models import User
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/search", tags=["Search"])
 
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/users/login", auto_error=False)
@@ -65,24 +93,79 @@ async def search_health(db: AsyncSession = Depends(get_db)) -> SearchHealthRespo
     await ensure_collection()
     tracked_last_day = await SearchTrackingService.count_tracked_events_last_24h(db)
 
+    embedding_server: dict[str, Any] | None = None
+    if search_settings.EMBEDDING_SERVER_SOCKET:
+        try:
+            embedding_server = await get_embedding_client().stats()
+        except EmbeddingServerError as exc:
+            embedding_server = {"error": str(exc)}
+
     return SearchHealthResponse(
         qdrant_reachable=qdrant_state.reachable,
         collection_exists=qdrant_state.collection_exists,
+        circuit_state=qdrant_state.breaker.state,
         embedding_model=search_settings.EMBEDDING_MODEL_NAME,
         personalization_enabled=search_settings.PERSONALIZATION_ENABLED,
         tracked_events_last_24h=tracked_last_day,
         last_profile_build=None,
         last_error=qdrant_state.last_error,
+        embedding_batcher=get_embedding_batcher().snapshot(),
+        embedding_server=embedding_server,
+        embedding_store=embedding_store.stats() if (embedding_store := get_embedding_store()) else None,
+        thread_budget=get_thread_budget().as_dict(),
+        warmup=search_warmup.snapshot(),
+        query_cache=get_query_vector_cache().stats(),
+        similar_cache=get_similar_cache().stats(),
+        result_cache=get_search_result_cache().stats(),
+        tracking_buffer=tracking_buffer.snapshot(),
+        stages=stage_stats(),
+        local_index=local_index.stats() if (local_index := get_local_index()) else None,
     )
 
 
-@router.post("/reindex", response_model=ReindexResponse)
+@router.post("/reindex", response_model=ReindexJobResponse, status_code=202)
 async def reindex_search(
+    mode: Literal["full", "incremental", "blue_green"] = Query("full"),
     db: AsyncSession = Depends(get_db),
     _: bool = Depends(allow_all),
-) -> ReindexResponse:
-    indexed = await SearchService.rebuild_index(db)
-    return ReindexResponse(indexed=indexed)
+) -> ReindexJobResponse:
+    job = await ReindexJobService.start(db, mode=mode)
+    return ReindexJobResponse(**ReindexJobService.describe(job))
+
+
+@router.get("/reindex/{job_id}", response_model=ReindexJobResponse)
+async def reindex_status(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(allow_all),
+) -> ReindexJobResponse:
+    job = await ReindexJobService.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Reindex job not found")
+    return ReindexJobResponse(**ReindexJobService.describe(job))
+
+
+@router.get("/index/versions", response_model=IndexVersionsResponse)
+async def index_versions(_: bool = Depends(allow_all)) -> IndexVersionsResponse:
+    return IndexVersionsResponse(
+        alias=live_alias_name(),
+        current=await get_alias_target(live_alias_name()),
+        versions=await list_index_versions(),
+    )
+
+
+@router.post("/index/versions/{collection_name}/activate", response_model=IndexAliasSwitchResponse)
+async def activate_index_version(collection_name: str, _: bool = Depends(allow_all)) -> IndexAliasSwitchResponse:
+    if collection_name not in await list_index_versions():
+        raise HTTPException(status_code=404, detail="Index version not found")
+    previous = await switch_alias(collection_name)
+    await get_search_result_cache().bump_version()
+    get_similar_cache().clear()
+    return IndexAliasSwitchResponse(
+        alias=live_alias_name(),
+        current=collection_name,
+        previous=previous,
+    )
 
 
 @router.post("/click", response_model=SearchClickResponse)
@@ -98,6 +181,7 @@ async def track_click(
         position=payload.position,
         query_text=payload.query_text,
     )
+    await SearchProfileService.record_click(db, current_user.id, payload.doc_id)
     return SearchClickResponse(ok=True)
 
 
@@ -108,36 +192,67 @@ async def recommend(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_required_current_user),
 ) -> SearchResponse:
-    recent_clicks = await SearchTrackingService.get_recent_click_events(db, current_user.id, limit=20)
-
-    # Convert doc_ids from "type:entity_id" format to UUIDs for Qdrant
-    clicked_doc_ids = []
-    for click in recent_clicks:
-        # Always reconstruct UUID from doc_type and entity_id stored in DB
-        uuid_doc_id = SearchService.build_doc_id(click.doc_type, click.entity_id)
-        clicked_doc_ids.append(uuid_doc_id)
-
-    if clicked_doc_ids:
-        vectors = await SearchService.fetch_vectors_by_doc_ids(clicked_doc_ids)
-        profile_vector = SearchService.build_profile_vector(vectors)
-        if profile_vector:
-            items = await SearchService.recommend_by_profile_vector(
-                profile_vector=profile_vector,
+    search_settings = get_search_settings()
+    # Read before any stage: rolling back a failed stage expires every object loaded in the session.
+    user_id, user_role = current_user.id, current_user.role.value
+    # The profile vector feeds the Qdrant query, so these stages cannot overlap; each one degrades to the fallback.
+    profile = await optional_stage(
+        "profile", _load_profile(db, user_id), search_settings.PERSONALIZATION_TIMEOUT_SECONDS, _STAGE_FAILED
+    )
+    if profile is _STAGE_FAILED:
+        await _reset_session(db)
+        profile = None
+
+    if profile is not None and profile.profile_vector:
+        items = await optional_stage(
+            "recommend",
+            SearchService.recommend_by_profile_vector(
+                profile_vector=list(profile.profile_vector),
                 top_k=top_k,
                 doc_type=type,
-                exclude_doc_ids=clicked_doc_ids,
-            )
-            return SearchResponse(total=len(items), items=items)
+                exclude_doc_ids=list(profile.recent_doc_ids or []),
+            ),
+            search_settings.SEARCH_TIMEOUT_SECONDS,
+            None,
+        )
+        if items is not None:
+            return SearchResponse(total=len(items), items=items, degraded=any(item.get("degraded") for item in items))
 
     fallback_items = await SearchService.fallback_recommendations(
         db=db,
-        user_role=current_user.role.value,
+        user_role=user_role,
         top_k=top_k,
         doc_type=type,
     )
     return SearchResponse(total=len(fallback_items), items=fallback_items)
 
 
+@router.get("/similar/{doc_type}/{entity_id}", response_model=SearchResponse)
+async def similar(
+    doc_type: Literal["club", "campaign", "news"],
+    entity_id: str,
+    top_k: int = Query(10, ge=1, le=50),
+    type: Literal["club", "campaign", "news"] | None = Query(None),
+    city: str | None = Query(None),
+    category: str | None = Query(None),
+    status: str | None = Query(None),
+) -> SearchResponse:
+    items = await required_stage(
+        "similar",
+        SearchService.similar_items(
+            doc_type=doc_type,
+            entity_id=entity_id,
+            top_k=top_k,
+            result_type=type,
+            city=city,
+            category=category,
+            status=status,
+        ),
+        get_search_settings().SEARCH_TIMEOUT_SECONDS,
+    )
+    return _build_search_response(items)
+
+
 @router.get("", response_model=SearchResponse)
 async def search(
     q: str = Query(..., min_length=2),
@@ -153,6 +268,8 @@ async def search(
 ) -> SearchResponse:
     search_settings = get_search_settings()
     is_authenticated = current_user is not None
+    user_id = current_user.id if current_user is not None else None
+    user_role = current_user.role.value if current_user is not None else None
 
     personalize_effective = bool(search_settings.PERSONALIZATION_ENABLED and is_authenticated)
 
@@ -160,29 +277,41 @@ async def search(
     if track is not None:
         track_effective = bool(track and is_authenticated)
 
-    raw_items = await SearchService.semantic_search(
-        q=q,
-        top_k=top_k,
-        doc_type=type,
-        city=city,
-        category=category,
-        status=status,
+    # Preferences come from Postgres and the hits from the model and Qdrant: start both, then join.
+    preferences_task = (
+        asyncio.create_task(_load_preferences_stage(user_id))
+        if personalize_effective and user_id is not None
+        else None
     )
-
-    if personalize_effective and current_user is not None:
-        recent_clicks = await SearchTrackingService.get_recent_click_events(db, current_user.id, limit=50)
-        preferences = compute_user_preferences(
-            [
-                {"doc_type": click.doc_type}
-                for click in recent_clicks
-            ]
+    try:
+        raw_items, degraded = await required_stage(
+            "semantic_search",
+            SearchService.semantic_search(
+                q=q,
+                top_k=_candidate_pool(top_k, personalize_effective),
+                doc_type=type,
+                city=city,
+                category=category,
+                status=status,
+            ),
+            search_settings.SEARCH_TIMEOUT_SECONDS,
         )
+    except BaseException:
+        if preferences_task is not None:
+            await cancel_stage(preferences_task)
+        raise
+
+    preferences = await preferences_task if preferences_task is not None else None
+    if preferences is not None:
         raw_items = SearchService.personalize_results(
             raw_items,
-            user_role=current_user.role.value,
+            user_role=user_role,
             preferences=preferences,
             role_boost=role_boost,
+            top_k=top_k,
         )
+    else:
+        raw_items = raw_items[:top_k]
 
     if track_effective:
         filters_json = {
@@ -193,14 +322,176 @@ async def search(
             "personalize": personalize_effective,
             "role_boost": role_boost,
         }
-        await SearchTrackingService.log_search_event(
-            db=db,
-            user=current_user,
-            query_text=q,
-            filters_json=filters_json,
-            top_doc_ids=[item.get("doc_id") for item in raw_items if item.get("doc_id")],
+        await optional_stage(
+            "tracking",
+            SearchTrackingService.log_search_event(
+                db=db,
+                user_id=user_id,
+                user_role=user_role,
+                query_text=q,
+                filters_json=filters_json,
+                top_doc_ids=[item.get("doc_id") for item in raw_items if item.get("doc_id")],
+            ),
+            search_settings.TRACKING_TIMEOUT_SECONDS,
+            None,
         )
 
+    return _build_search_response(raw_items, degraded)
+
+
+@router.post("/batch", response_model=SearchBatchResponse)
+async def search_batch(
+    payload: SearchBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User | None = Depends(get_optional_current_user),
+) -> SearchBatchResponse:
+    search_settings = get_search_settings()
+    is_authenticated = current_user is not None
+    user_id = current_user.id if current_user is not None else None
+    user_role = current_user.role.value if current_user is not None else None
+
+    personalize_effective = bool(search_settings.PERSONALIZATION_ENABLED and is_authenticated)
+
+    track_effective = bool(is_authenticated)
+    if payload.track is not None:
+        track_effective = bool(payload.track and is_authenticated)
+
+    preferences_task = (
+        asyncio.create_task(_load_preferences_stage(user_id))
+        if personalize_effective and user_id is not None
+        else None
+    )
+    try:
+        batch_results = await required_stage(
+            "semantic_search_batch",
+            SearchService.semantic_search_batch(
+                [
+                    {
+                        "q": spec.q,
+                        "top_k": _candidate_pool(spec.top_k, personalize_effective),
+                        "doc_type": spec.type,
+                        "city": spec.city,
+                        "category": spec.category,
+                        "status": spec.status,
+                    }
+                    for spec in payload.queries
+                ]
+            ),
+            search_settings.SEARCH_TIMEOUT_SECONDS,
+        )
+    except BaseException:
+        if preferences_task is not None:
+            await cancel_stage(preferences_task)
+        raise
+
+    batch_items = [raw_items for raw_items, _ in batch_results]
+    preferences = await preferences_task if preferences_task is not None else None
+    if preferences is not None:
+        batch_items = [
+            SearchService.personalize_results(
+                raw_items,
+                user_role=user_role,
+                preferences=preferences,
+                role_boost=payload.role_boost,
+                top_k=spec.top_k,
+            )
+            for spec, raw_items in zip(payload.queries, batch_items)
+        ]
+    else:
+        batch_items = [raw_items[: spec.top_k] for spec, raw_items in zip(payload.queries, batch_items)]
+
+    if track_effective:
+        for spec, raw_items in zip(payload.queries, batch_items):
+            await optional_stage(
+                "tracking",
+                SearchTrackingService.log_search_event(
+                    db=db,
+                    user_id=user_id,
+                    user_role=user_role,
+                    query_text=spec.q,
+                    filters_json={
+                        "type": spec.type,
+                        "city": spec.city,
+                        "category": spec.category,
+                        "status": spec.status,
+                        "personalize": personalize_effective,
+                        "role_boost": payload.role_boost,
+                    },
+                    top_doc_ids=[item.get("doc_id") for item in raw_items if item.get("doc_id")],
+                ),
+                search_settings.TRACKING_TIMEOUT_SECONDS,
+                None,
+            )
+
+    return SearchBatchResponse(
+        results=[
+            _build_search_response(raw_items, degraded)
+            for raw_items, (_, degraded) in zip(batch_items, batch_results)
+        ]
+    )
+
+
+def _candidate_pool(top_k: int, personalize: bool) -> int:
+    # Boosts can lift a hit from below the first top_k, so personalized requests rerank a larger pool.
+    if not personalize:
+        return top_k
+    return max(top_k, get_search_settings().PERSONALIZATION_CANDIDATE_POOL)
+
+
+# Default of optional stages whose failure has to be told apart from a legitimate None result.
+_STAGE_FAILED: Any = object()
+
+
+async def _reset_session(db: AsyncSession) -> None:
+    # A stage cancelled mid-query can leave the session inside a broken transaction; later stages reuse it.
+    try:
+        await db.rollback()
+    except Exception:
+        logger.warning("Failed to reset the search DB session", exc_info=True)
+
+
+async def _load_profile(db: AsyncSession, user_id: int) -> UserSearchProfile | None:
+    profile = await SearchProfileService.get(db, user_id)
+    if profile is None:
+        profile = await SearchProfileService.rebuild_from_clicks(db, user_id)
+    return profile
+
+
+async def _load_preferences_stage(user_id: int) -> dict[str, Any] | None:
+    """Preferences for reranking, or None when loading them failed or ran past PERSONALIZATION_TIMEOUT_SECONDS.
+
+    Runs concurrently with the vector search, so it uses a session of its own:
+    an AsyncSession must never be used by two tasks at once, and a timed-out
+    load then leaves the request session untouched.
+    """
+    return await optional_stage(
+        "personalization",
+        _load_user_preferences_in_own_session(user_id),
+        get_search_settings().PERSONALIZATION_TIMEOUT_SECONDS,
+        None,
+    )
+
+
+async def _load_user_preferences_in_own_session(user_id: int) -> dict[str, Any]:
+    async with AsyncSessionLocal() as db:
+        return await _load_user_preferences(db, user_id)
+
+
+async def _load_user_preferences(db: AsyncSession, user_id: int) -> dict[str, Any]:
+    profile = await SearchProfileService.get(db, user_id)
+    if profile is not None:
+        return SearchProfileService.preferences(profile)
+
+    recent_clicks = await SearchTrackingService.get_recent_click_events(db, user_id, limit=50)
+    return compute_user_preferences(
+        [
+            {"doc_type": click.doc_type}
+            for click in recent_clicks
+        ]
+    )
+
+
+def _build_search_response(raw_items: list[dict[str, Any]], degraded: bool = False) -> SearchResponse:
     response_items = [
         {
             "type": item.get("type", "unknown"),
@@ -213,4 +504,8 @@ async def search(
         for item in raw_items
     ]
 
-    return SearchResponse(total=len(response_items), items=response_items)
+    return SearchResponse(
+        total=len(response_items),
+        items=response_items,
+        degraded=degraded or any(item.get("degraded") for item in raw_items),
+    )
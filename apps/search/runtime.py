@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from apps.search.config import get_search_settings
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+@dataclass(frozen=True)
+class ThreadBudget:
+    cpu_count: int
+    cpu_quota: float | None
+    workers: int
+    torch_threads: int
+    torch_interop_threads: int
+    executor_threads: int
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def detect_cpu_quota(cgroup_root: Path = CGROUP_ROOT) -> float | None:
+    """CPUs granted by the container's cgroup CPU limit, or None when unlimited."""
+    cpu_max = cgroup_root / "cpu.max"
+    try:
+        quota, period = cpu_max.read_text().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    try:
+        quota_us = int((cgroup_root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period_us = int((cgroup_root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return quota_us / period_us
+
+
+def detect_worker_count() -> int:
+    settings = get_search_settings()
+    if settings.SEARCH_WORKER_COUNT:
+        return settings.SEARCH_WORKER_COUNT
+    try:
+        # Gunicorn reads WEB_CONCURRENCY as its default worker count, see Dockerfile.
+        return max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+    except ValueError:
+        return 1
+
+
+def compute_thread_budget(workers: int | None = None, cgroup_root: Path = CGROUP_ROOT) -> ThreadBudget:
+    settings = get_search_settings()
+    try:
+        cpu_count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpu_count = os.cpu_count() or 1
+    cpu_quota = detect_cpu_quota(cgroup_root)
+    if cpu_quota is not None:
+        cpu_count = max(1, min(cpu_count, math.ceil(cpu_quota)))
+
+    workers = workers or detect_worker_count()
+    # Every worker encodes one batch at a time, so intra-op threads are the only parallelism worth budgeting.
+    torch_threads = settings.EMBEDDING_TORCH_THREADS or max(1, cpu_count // workers)
+    return ThreadBudget(
+        cpu_count=cpu_count,
+        cpu_quota=round(cpu_quota, 3) if cpu_quota is not None else None,
+        workers=workers,
+        torch_threads=torch_threads,
+        torch_interop_threads=1,
+        executor_threads=max(1, settings.EMBEDDING_EXECUTOR_THREADS),
+    )
+
+
+_budget: ThreadBudget | None = None
+_torch_configured = False
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_thread_budget() -> ThreadBudget:
+    global _budget
+    if _budget is None:
+        _budget = compute_thread_budget()
+    return _budget
+
+
+def set_thread_budget(budget: ThreadBudget) -> None:
+    """Overrides the detected budget; must run before the model is loaded (used by the embedding server)."""
+    global _budget
+    _budget = budget
+
+
+def configure_torch() -> None:
+    global _torch_configured
+    with _lock:
+        if _torch_configured:
+            return
+        import torch
+
+        budget = get_thread_budget()
+        torch.set_num_threads(budget.torch_threads)
+        try:
+            torch.set_num_interop_threads(budget.torch_interop_threads)
+        except RuntimeError:
+            # Only allowed before torch starts its inter-op pool; keep the existing value otherwise.
+            logger.warning("torch inter-op threads were already initialized")
+        _torch_configured = True
+        logger.info(
+            "torch threads: %s intra-op, %s inter-op (%s CPUs, %s workers)",
+            budget.torch_threads,
+            budget.torch_interop_threads,
+            budget.cpu_count,
+            budget.workers,
+        )
+
+
+def get_embedding_executor() -> ThreadPoolExecutor:
+    """Dedicated threads for model inference so it never competes with anyio's shared to_thread limiter."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_thread_budget().executor_threads,
+                thread_name_prefix="embedding",
+            )
+        return _executor
@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Any, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class SearchHit(BaseModel):
@@ -15,20 +16,78 @@ class SearchHit(BaseModel):
 class SearchResponse(BaseModel):
     total: int
     items: list[SearchHit]
+    # True when Qdrant was unavailable and the results come from the local index snapshot.
+    degraded: bool = False
 
 
-class ReindexResponse(BaseModel):
+class SearchQuerySpec(BaseModel):
+    q: str = Field(..., min_length=2)
+    top_k: int = Field(10, ge=1, le=50)
+    type: Literal["club", "campaign", "news"] | None = None
+    city: str | None = None
+    category: str | None = None
+    status: str | None = None
+
+
+class SearchBatchRequest(BaseModel):
+    queries: list[SearchQuerySpec] = Field(..., min_length=1, max_length=10)
+    role_boost: bool = True
+    track: bool | None = None
+
+
+class SearchBatchResponse(BaseModel):
+    results: list[SearchResponse]
+
+
+class ReindexJobResponse(BaseModel):
+    job_id: str
+    mode: str
+    phase: str
+    total: int
+    processed: int
     indexed: int
+    skipped: int
+    deleted: int
+    errors: list[str]
+    created_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    duration_seconds: float | None = None
+    docs_per_second: float | None = None
+
+
+class IndexVersionsResponse(BaseModel):
+    alias: str
+    current: str | None = None
+    versions: list[str]
+
+
+class IndexAliasSwitchResponse(BaseModel):
+    alias: str
+    current: str
+    previous: str | None = None
 
 
 class SearchHealthResponse(BaseModel):
     qdrant_reachable: bool
     collection_exists: bool
+    circuit_state: str = "closed"
     embedding_model: str
     personalization_enabled: bool
     tracked_events_last_24h: int
     last_profile_build: datetime | None = None
     last_error: str | None = None
+    embedding_batcher: dict[str, Any] | None = None
+    embedding_server: dict[str, Any] | None = None
+    embedding_store: dict[str, Any] | None = None
+    thread_budget: dict[str, Any] | None = None
+    warmup: dict[str, Any] | None = None
+    query_cache: dict[str, Any] | None = None
+    similar_cache: dict[str, Any] | None = None
+    result_cache: dict[str, Any] | None = None
+    tracking_buffer: dict[str, Any] | None = None
+    stages: dict[str, dict[str, int]] | None = None
+    local_index: dict[str, Any] | None = None
 
 
 class SearchClickRequest(BaseModel):
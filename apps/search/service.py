@@ -1,33 +1,68 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
 import re
-from typing import Any
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
 import uuid as uuid_module
 
 from fastapi import HTTPException
-from qdrant_client.http.models import (
-    FieldCondition,
-    Filter,
-    HasIdCondition,
-    MatchValue,
-    PointIdsList,
-    PointStruct,
-)
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload
 
 from apps.clubs.models import Club
 from apps.funding.models import Campaign, CampaignStatus
 from apps.news.models import News
+from apps.search.cache import get_query_vector_cache, get_search_result_cache, get_similar_cache, normalize_query
 from apps.search.config import get_search_settings
+from apps.search.embedding_server import EmbeddingServerError
 from apps.search.embeddings import encode_texts
+from apps.search.local_index import get_local_index
 from apps.search.personalization import BonusWeights, build_profile_vector, rerank_results
-from apps.search.qdrant_client import ensure_collection, get_qdrant_client, search_points
+from apps.search.qdrant_client import (
+    build_search_params,
+    create_index_version,
+    drop_index_version,
+    drop_retired_index_versions,
+    ensure_collection,
+    get_qdrant_client,
+    live_alias_name,
+    recommend_points,
+    schedule_index_version_drop,
+    search_points,
+    search_points_batch,
+    switch_alias,
+    track_qdrant_call,
+)
+
+if TYPE_CHECKING:
+    from qdrant_client.http.models import FieldCondition, Filter, HasIdCondition, PointStruct
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ReindexProgress:
+    total: int
+    phase: str = "indexing"
+    collection: str | None = None
+    processed: int = 0
+    indexed: int = 0
+    skipped: int = 0
+    deleted: int = 0
+    chunks: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+
 class SearchService:
     @staticmethod
     def build_doc_id(doc_type: str, entity_id: Any) -> str:
@@ -84,51 +119,253 @@ class SearchService:
         }
 
     @staticmethod
-    async def fetch_clubs(db: AsyncSession) -> list[dict[str, Any]]:
-        result = await db.execute(select(Club))
-        return [SearchService.club_payload(club) for club in result.scalars().all()]
+    def _indexed_sources() -> dict[str, tuple[Any, Callable[[Any], dict[str, Any]]]]:
+        return {
+            "club": (Club, SearchService.club_payload),
+            "campaign": (Campaign, SearchService.campaign_payload),
+            "news": (News, SearchService.news_payload),
+        }
 
     @staticmethod
-    async def fetch_campaigns(db: AsyncSession) -> list[dict[str, Any]]:
-        result = await db.execute(select(Campaign))
-        return [SearchService.campaign_payload(campaign) for campaign in result.scalars().all()]
+    async def count_documents(db: AsyncSession) -> int:
+        total = 0
+        for model, _ in SearchService._indexed_sources().values():
+            result = await db.execute(select(func.count(model.id)))
+            total += int(result.scalar() or 0)
+        return total
 
     @staticmethod
-    async def fetch_news(db: AsyncSession) -> list[dict[str, Any]]:
-        result = await db.execute(select(News))
-        return [SearchService.news_payload(news) for news in result.scalars().all()]
+    async def iter_documents(db: AsyncSession, chunk_size: int) -> AsyncIterator[list[dict[str, Any]]]:
+        # Server-side cursor + yield_per keeps only one chunk of rows in memory;
+        # relationships are never needed for payloads, so skip their selectin loads.
+        for model, build_payload in SearchService._indexed_sources().values():
+            stmt = (
+                select(model)
+                .options(lazyload("*"))
+                .order_by(model.id)
+                .execution_options(yield_per=chunk_size)
+            )
+            result = await db.stream_scalars(stmt)
+            async for partition in result.partitions(chunk_size):
+                yield [build_payload(entity) for entity in partition]
 
     @staticmethod
-    async def rebuild_index(db: AsyncSession) -> int:
-        ready = await ensure_collection()
-        if not ready:
-            raise HTTPException(status_code=503, detail="Qdrant is unavailable. Please retry later.")
+    def content_hash(doc: dict[str, Any]) -> str:
+        settings = get_search_settings()
+        text = SearchService.build_text(doc)
+        return hashlib.sha256(f"{settings.EMBEDDING_MODEL_NAME}\n{text}".encode("utf-8")).hexdigest()
 
-        docs = [
-            *await SearchService.fetch_clubs(db),
-            *await SearchService.fetch_campaigns(db),
-            *await SearchService.fetch_news(db),
-        ]
-        vectors = await encode_texts([SearchService.build_text(doc) for doc in docs])
+    @staticmethod
+    async def load_documents(db: AsyncSession, doc_type: str, entity_ids: list[Any]) -> dict[str, dict[str, Any]]:
+        source = SearchService._indexed_sources().get(doc_type)
+        if source is None or not entity_ids:
+            return {}
+        model, build_payload = source
+        result = await db.execute(select(model).options(lazyload("*")).where(model.id.in_(entity_ids)))
+        return {str(entity.id): build_payload(entity) for entity in result.scalars().all()}
+
+    @staticmethod
+    def build_point(doc: dict[str, Any], vector: list[float]) -> PointStruct:
+        from qdrant_client.http.models import PointStruct
 
-        points = []
-        for doc, vector in zip(docs, vectors, strict=False):
-            doc_id = SearchService.build_doc_id(doc["type"], doc["entity_id"])
-            payload = {
+        doc_id = SearchService.build_doc_id(doc["type"], doc["entity_id"])
+        return PointStruct(
+            id=doc_id,
+            vector=vector,
+            payload={
                 **doc,
                 "entity_id": str(doc["entity_id"]),
                 "doc_id": doc_id,
                 "text": SearchService.build_text(doc),
-            }
-            points.append(PointStruct(id=doc_id, vector=vector, payload=payload))
+                "content_hash": SearchService.content_hash(doc),
+                **SearchService.lexical_payload(doc),
+            },
+        )
 
-        if points:
-            client = get_qdrant_client()
-            settings = get_search_settings()
-            await client.upsert(collection_name=settings.QDRANT_COLLECTION, points=points)
+    @staticmethod
+    def lexical_payload(doc: dict[str, Any]) -> dict[str, Any]:
+        """Precomputed inputs of _city_query_precision_filter, stored with the point so queries skip the text work."""
+        title, snippet = str(doc.get("title") or ""), str(doc.get("snippet") or "")
+        search_text = f"{title}\n{snippet}".casefold()
+        return {
+            "search_text": search_text,
+            "tokens": sorted(set(search_text.split())),
+            "first_number": SearchService._extract_first_number(f"{title} {snippet}"),
+        }
+
+    @staticmethod
+    async def _wait_in_flight(tasks: set[asyncio.Task[None]], limit: int) -> None:
+        while len(tasks) >= limit:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            tasks.difference_update(done)
+            for task in done:
+                task.result()
+
+    @staticmethod
+    async def fetch_indexed_hashes(collection_name: str) -> dict[str, str | None]:
+        client = get_qdrant_client()
+        settings = get_search_settings()
+        hashes: dict[str, str | None] = {}
+        offset: Any = None
+        while True:
+            points, offset = await client.scroll(
+                collection_name=collection_name,
+                limit=settings.REINDEX_CHUNK_SIZE,
+                offset=offset,
+                with_payload=["content_hash"],
+                with_vectors=False,
+            )
+            for point in points:
+                hashes[str(point.id)] = (point.payload or {}).get("content_hash")
+            if offset is None:
+                return hashes
+
+    @staticmethod
+    async def _index_documents(
+        db: AsyncSession,
+        collection_name: str,
+        progress: ReindexProgress,
+        on_progress: Callable[[ReindexProgress], Awaitable[None]] | None,
+        incremental: bool,
+    ) -> None:
+        settings = get_search_settings()
+        client = get_qdrant_client()
+        indexed_hashes: dict[str, str | None] = {}
+        if incremental:
+            progress.phase = "scanning"
+            if on_progress is not None:
+                await on_progress(progress)
+            indexed_hashes = await SearchService.fetch_indexed_hashes(collection_name)
+        progress.phase = "indexing"
+        seen_doc_ids: set[str] = set()
+        in_flight: set[asyncio.Task[None]] = set()
+
+        async def upsert_chunk(points: list[PointStruct]) -> None:
+            await client.upsert(collection_name=collection_name, points=points)
+            progress.indexed += len(points)
+
+        try:
+            async for docs in SearchService.iter_documents(db, settings.REINDEX_CHUNK_SIZE):
+                progress.processed += len(docs)
+                progress.chunks += 1
+                if incremental:
+                    changed = []
+                    for doc in docs:
+                        doc_id = SearchService.build_doc_id(doc["type"], doc["entity_id"])
+                        seen_doc_ids.add(doc_id)
+                        if indexed_hashes.get(doc_id) != SearchService.content_hash(doc):
+                            changed.append(doc)
+                    progress.skipped += len(docs) - len(changed)
+                    docs = changed
+
+                if docs:
+                    vectors = await encode_texts([SearchService.build_text(doc) for doc in docs])
+                    points = [SearchService.build_point(doc, vector) for doc, vector in zip(docs, vectors, strict=False)]
+                    await SearchService._wait_in_flight(in_flight, settings.REINDEX_MAX_IN_FLIGHT)
+                    in_flight.add(asyncio.create_task(upsert_chunk(points)))
+
+                logger.info("Reindex progress: %s/%s documents processed", progress.processed, progress.total)
+                if on_progress is not None:
+                    await on_progress(progress)
+
+            await SearchService._wait_in_flight(in_flight, 1)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            raise
+
+        if incremental:
+            from qdrant_client.http.models import PointIdsList
+
+            progress.phase = "cleanup"
+            stale_doc_ids = [doc_id for doc_id in indexed_hashes if doc_id not in seen_doc_ids]
+            for start in range(0, len(stale_doc_ids), settings.REINDEX_CHUNK_SIZE):
+                batch = stale_doc_ids[start : start + settings.REINDEX_CHUNK_SIZE]
+                await client.delete(collection_name=collection_name, points_selector=PointIdsList(points=batch))
+                progress.deleted += len(batch)
+
+    @staticmethod
+    async def _rebuild_blue_green(
+        db: AsyncSession,
+        progress: ReindexProgress,
+        on_progress: Callable[[ReindexProgress], Awaitable[None]] | None,
+    ) -> None:
+        settings = get_search_settings()
+        client = get_qdrant_client()
+        await drop_retired_index_versions(keep_latest=1)
+        target = await create_index_version()
+        progress.collection = target
+
+        try:
+            await SearchService._index_documents(db, target, progress, on_progress, incremental=False)
+
+            # Writes kept landing in the live alias while the new version was built; fold them in
+            # with a cheap hash-based pass before comparing point counts.
+            progress.phase = "catch_up"
+            catch_up = ReindexProgress(total=progress.total)
+            await SearchService._index_documents(db, target, catch_up, None, incremental=True)
+            progress.indexed += catch_up.indexed
+            progress.deleted += catch_up.deleted
+
+            progress.phase = "validating"
+            if on_progress is not None:
+                await on_progress(progress)
+            expected = await SearchService.count_documents(db)
+            actual = (await client.count(collection_name=target, exact=True)).count
+            if actual != expected:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Index version {target} has {actual} points, expected {expected}; alias not switched.",
+                )
+
+            progress.phase = "switching"
+            previous = await switch_alias(target)
+        except BaseException:
+            # drop_index_version leaves the target alone if the alias update went through before the error.
+            try:
+                await drop_index_version(target)
+            except Exception:
+                logger.warning("Failed to drop abandoned index version '%s'", target, exc_info=True)
+            raise
+
+        if previous is not None:
+            schedule_index_version_drop(previous, settings.REINDEX_BLUE_GREEN_GRACE_SECONDS)
+
+    @staticmethod
+    async def rebuild_index(
+        db: AsyncSession,
+        on_progress: Callable[[ReindexProgress], Awaitable[None]] | None = None,
+        mode: str = "full",
+    ) -> ReindexProgress:
+        ready = await ensure_collection()
+        if not ready:
+            raise HTTPException(status_code=503, detail="Qdrant is unavailable. Please retry later.")
+
+        progress = ReindexProgress(total=await SearchService.count_documents(db), collection=live_alias_name())
+        if mode == "blue_green":
+            await SearchService._rebuild_blue_green(db, progress, on_progress)
+        else:
+            await SearchService._index_documents(
+                db,
+                live_alias_name(),
+                progress,
+                on_progress,
+                incremental=mode == "incremental",
+            )
 
-        logger.info("Reindexed %s documents", len(points))
-        return len(points)
+        get_similar_cache().clear()
+        await get_search_result_cache().bump_version()
+        if on_progress is not None:
+            await on_progress(progress)
+        logger.info(
+            "Reindexed %s documents into '%s' (skipped %s, deleted %s) in %.1fs",
+            progress.indexed,
+            progress.collection,
+            progress.skipped,
+            progress.deleted,
+            progress.elapsed,
+        )
+        return progress
 
     @staticmethod
     async def upsert_single(payload: dict[str, Any]) -> None:
@@ -137,24 +374,31 @@ class SearchService:
             logger.warning("Skip upsert: Qdrant unavailable")
             return
 
-        vectors = await encode_texts([SearchService.build_text(payload)])
-        if not vectors:
+        await SearchService.upsert_documents([payload])
+
+    @staticmethod
+    async def upsert_documents(docs: list[dict[str, Any]]) -> None:
+        if not docs:
             return
+        vectors = await encode_texts([SearchService.build_text(doc) for doc in docs])
+        points = [SearchService.build_point(doc, vector) for doc, vector in zip(docs, vectors, strict=False)]
+        client = get_qdrant_client()
+        async with track_qdrant_call():
+            await client.upsert(collection_name=live_alias_name(), points=points)
+        get_similar_cache().invalidate([str(point.id) for point in points])
+        await get_search_result_cache().bump_version()
+
+    @staticmethod
+    async def delete_points(doc_ids: list[str]) -> None:
+        if not doc_ids:
+            return
+        from qdrant_client.http.models import PointIdsList
 
-        doc_id = SearchService.build_doc_id(payload["type"], payload["entity_id"])
-        point = PointStruct(
-            id=doc_id,
-            vector=vectors[0],
-            payload={
-                **payload,
-                "entity_id": str(payload["entity_id"]),
-                "doc_id": doc_id,
-                "text": SearchService.build_text(payload),
-            },
-        )
         client = get_qdrant_client()
-        settings = get_search_settings()
-        await client.upsert(collection_name=settings.QDRANT_COLLECTION, points=[point])
+        async with track_qdrant_call():
+            await client.delete(collection_name=live_alias_name(), points_selector=PointIdsList(points=doc_ids))
+        get_similar_cache().invalidate(doc_ids)
+        await get_search_result_cache().bump_version()
 
     @staticmethod
     async def delete_point(doc_type: str, entity_id: Any) -> None:
@@ -163,12 +407,7 @@ class SearchService:
             logger.warning("Skip delete: Qdrant unavailable")
             return
 
-        client = get_qdrant_client()
-        settings = get_search_settings()
-        await client.delete(
-            collection_name=settings.QDRANT_COLLECTION,
-            points_selector=PointIdsList(points=[SearchService.build_doc_id(doc_type, entity_id)]),
-        )
+        await SearchService.delete_points([SearchService.build_doc_id(doc_type, entity_id)])
 
     @staticmethod
     def _build_filter(
@@ -177,7 +416,11 @@ class SearchService:
         category: str | None = None,
         status: str | None = None,
         exclude_doc_ids: list[str] | None = None,
+        phrase: str | None = None,
+        text: str | None = None,
     ) -> Filter | None:
+        from qdrant_client.http.models import FieldCondition, Filter, HasIdCondition, MatchPhrase, MatchText, MatchValue
+
         must: list[FieldCondition] = []
         must_not: list[HasIdCondition] = []
 
@@ -189,6 +432,11 @@ class SearchService:
             must.append(FieldCondition(key="category", match=MatchValue(value=category)))
         if status:
             must.append(FieldCondition(key="status", match=MatchValue(value=status)))
+        # Full-text conditions on the lexical side-index; they need the text index on search_text.
+        if phrase:
+            must.append(FieldCondition(key="search_text", match=MatchPhrase(phrase=phrase)))
+        if text:
+            must.append(FieldCondition(key="search_text", match=MatchText(text=text)))
         if exclude_doc_ids:
             # Convert string UUIDs to UUID objects for Qdrant
             uuid_list = [uuid_module.UUID(doc_id) if isinstance(doc_id, str) else doc_id for doc_id in exclude_doc_ids]
@@ -216,16 +464,23 @@ class SearchService:
             "city": payload.get("city"),
             "category": payload.get("category"),
             "status": payload.get("status"),
+            **SearchService._lexical_fields(payload),
         }
 
     @staticmethod
-    def _extract_numeric_tokens(query: str) -> list[str]:
-        return re.findall(r"\d+", query)
+    def _lexical_fields(payload: dict[str, Any]) -> dict[str, Any]:
+        # Points indexed before the lexical side-index existed lack it; the filter computes it on demand.
+        if payload.get("search_text") is None or payload.get("tokens") is None:
+            return {}
+        return {
+            "search_text": payload["search_text"],
+            "tokens": frozenset(payload["tokens"]),
+            "first_number": payload.get("first_number"),
+        }
 
     @staticmethod
-    def _contains_all_tokens(text: str, tokens: list[str]) -> bool:
-        lowered_text = text.casefold()
-        return all(token.casefold() in lowered_text for token in tokens)
+    def _extract_numeric_tokens(query: str) -> list[str]:
+        return re.findall(r"\d+", query)
 
     @staticmethod
     def _extract_first_number(text: str) -> int | None:
@@ -234,6 +489,12 @@ class SearchService:
             return None
         return int(tokens[0])
 
+    @staticmethod
+    def _lexical(item: dict[str, Any]) -> tuple[str, frozenset[str], int | None]:
+        if "tokens" not in item:
+            item.update(SearchService._lexical_fields(SearchService.lexical_payload(item)))
+        return item["search_text"], item["tokens"], item["first_number"]
+
     @staticmethod
     def _city_query_precision_filter(items: list[dict[str, Any]], q: str, city: str | None) -> list[dict[str, Any]]:
         if not city:
@@ -243,28 +504,18 @@ class SearchService:
         if not normalized_query:
             return items
 
-        exact_phrase_matches: list[dict[str, Any]] = []
-        for item in items:
-            title = str(item.get("title") or "")
-            snippet = str(item.get("snippet") or "")
-            if normalized_query in title.casefold() or normalized_query in snippet.casefold():
-                exact_phrase_matches.append(item)
-
+        lexical = [SearchService._lexical(item) for item in items]
+        exact_phrase_matches = [item for item, (text, _, _) in zip(items, lexical) if normalized_query in text]
         if exact_phrase_matches:
             return exact_phrase_matches
 
-        query_tokens = [token for token in normalized_query.split() if token]
-        all_tokens_matches: list[dict[str, Any]] = []
-        for item in items:
-            searchable_text = " ".join(
-                [
-                    str(item.get("title") or ""),
-                    str(item.get("snippet") or ""),
-                ]
-            )
-            if SearchService._contains_all_tokens(searchable_text, query_tokens):
-                all_tokens_matches.append(item)
-
+        # A whole-token hit is a set lookup; the substring check only runs for partial tokens ("шахмат" in "шахматы").
+        query_tokens = normalized_query.split()
+        all_tokens_matches = [
+            item
+            for item, (text, tokens, _) in zip(items, lexical)
+            if all(token in tokens or token in text for token in query_tokens)
+        ]
         if all_tokens_matches:
             return all_tokens_matches
 
@@ -273,26 +524,43 @@ class SearchService:
             return []
 
         query_number = int(numeric_tokens[0])
-        nearest_candidates: list[tuple[int, int, dict[str, Any]]] = []
-
-        for index, item in enumerate(items):
-            searchable_text = " ".join(
-                [
-                    str(item.get("title") or ""),
-                    str(item.get("snippet") or ""),
-                ]
-            )
-            item_number = SearchService._extract_first_number(searchable_text)
-            if item_number is None:
-                continue
-            distance = abs(item_number - query_number)
-            nearest_candidates.append((distance, index, item))
+        nearest = min(
+            (
+                (abs(item_number - query_number), index)
+                for index, (_, _, item_number) in enumerate(lexical)
+                if item_number is not None
+            ),
+            default=None,
+        )
+        return [items[nearest[1]]] if nearest is not None else []
 
-        if nearest_candidates:
-            nearest_candidates.sort(key=lambda entry: (entry[0], entry[1]))
-            return [nearest_candidates[0][2]]
+    @staticmethod
+    async def embed_query(q: str) -> list[float]:
+        return (await SearchService.embed_queries([q]))[q]
 
-        return []
+    @staticmethod
+    async def embed_queries(queries: list[str]) -> dict[str, list[float]]:
+        """Cached vectors for each distinct query; cache misses are encoded in a single forward pass."""
+        cache = get_query_vector_cache()
+        vectors: dict[str, list[float]] = {}
+        missing: list[str] = []
+        for q in dict.fromkeys(queries):
+            vector = await cache.get(q)
+            if vector is None:
+                missing.append(q)
+            else:
+                vectors[q] = vector
+
+        try:
+            # Free-form queries would only churn the document store; they have their own cache.
+            encoded = await encode_texts(missing, use_store=False)
+        except EmbeddingServerError as exc:
+            logger.warning("Query embedding failed: %s", exc)
+            raise HTTPException(status_code=503, detail="Search service is temporarily unavailable.") from exc
+        for q, vector in zip(missing, encoded):
+            vectors[q] = vector
+            await cache.set(q, vector)
+        return vectors
 
     @staticmethod
     async def semantic_search(
@@ -302,25 +570,190 @@ class SearchService:
         city: str | None = None,
         category: str | None = None,
         status: str | None = None,
-    ) -> list[dict[str, Any]]:
+    ) -> tuple[list[dict[str, Any]], bool]:
+        """Non-personalized ``(hits, degraded)``, shared between identical requests until the index version changes.
+
+        ``degraded`` covers the whole answer, so an empty one from the local index counts too.
+        """
+        request = {"q": q, "top_k": top_k, "type": doc_type, "city": city, "category": category, "status": status}
+        return await get_search_result_cache().get_or_compute(
+            request,
+            lambda: SearchService._semantic_search_uncached(q, top_k, doc_type, city, category, status),
+        )
+
+    @staticmethod
+    async def _semantic_search_uncached(
+        q: str,
+        top_k: int,
+        doc_type: str | None = None,
+        city: str | None = None,
+        category: str | None = None,
+        status: str | None = None,
+    ) -> tuple[list[dict[str, Any]], bool]:
         ready = await ensure_collection()
-        if not ready:
+        if not ready and get_local_index() is None:
             raise HTTPException(status_code=503, detail="Search service is temporarily unavailable.")
 
         settings = get_search_settings()
-        vector = (await encode_texts([q]))[0]
-        query_filter = SearchService._build_filter(doc_type=doc_type, city=city, category=category, status=status)
-
-        hits = await search_points(
-            collection_name=settings.QDRANT_COLLECTION,
-            query_vector=vector,
-            query_filter=query_filter,
-            limit=top_k,
-            score_threshold=settings.SEARCH_SCORE_THRESHOLD,
-            with_payload=True,
+        vector = await SearchService.embed_query(q)
+        if ready:
+            try:
+                if city and q.strip() and settings.SEARCH_LEXICAL_PUSHDOWN:
+                    stages = await SearchService._search_lexical_stages(q, vector, top_k, doc_type, city, category, status)
+                else:
+                    stages = [
+                        await search_points(
+                            collection_name=live_alias_name(),
+                            query_vector=vector,
+                            query_filter=SearchService._build_filter(
+                                doc_type=doc_type, city=city, category=category, status=status
+                            ),
+                            limit=top_k,
+                            score_threshold=settings.SEARCH_SCORE_THRESHOLD,
+                            with_payload=True,
+                            search_params=build_search_params(),
+                        )
+                    ]
+            except Exception:
+                if get_local_index() is None:
+                    raise
+                logger.warning("Qdrant search failed, answering from the local index", exc_info=True)
+            else:
+                for hits in stages:
+                    normalized_hits = [SearchService._normalize_hit(hit) for hit in hits]
+                    items = SearchService._city_query_precision_filter(normalized_hits, q=q, city=city)
+                    if items:
+                        return items, False
+                return [], False
+
+        items = await SearchService._local_search(
+            vector, top_k, doc_type=doc_type, city=city, category=category, status=status
         )
-        normalized_hits = [SearchService._normalize_hit(hit) for hit in hits]
-        return SearchService._city_query_precision_filter(normalized_hits, q=q, city=city)
+        return SearchService._city_query_precision_filter(items, q=q, city=city), True
+
+    @staticmethod
+    async def _search_lexical_stages(
+        q: str,
+        vector: list[float],
+        top_k: int,
+        doc_type: str | None,
+        city: str | None,
+        category: str | None,
+        status: str | None,
+    ) -> list[list[Any]]:
+        """Phrase-filtered, all-token-filtered and unfiltered hits in one round trip, in precision-filter order.
+
+        Pushing the lexical stages down gives each of them a full top_k of
+        matching candidates instead of whatever survives among the plain top_k.
+        """
+        from qdrant_client.http.models import QueryRequest
+
+        settings = get_search_settings()
+        search_params = build_search_params()
+        normalized_query = normalize_query(q)
+        lexical_filters = [{"phrase": normalized_query}, {"text": normalized_query}, {}]
+        requests = [
+            QueryRequest(
+                query=vector,
+                filter=SearchService._build_filter(
+                    doc_type=doc_type, city=city, category=category, status=status, **lexical_filter
+                ),
+                limit=top_k,
+                score_threshold=settings.SEARCH_SCORE_THRESHOLD,
+                with_payload=True,
+                params=search_params,
+            )
+            for lexical_filter in lexical_filters
+        ]
+        return await search_points_batch(collection_name=live_alias_name(), requests=requests)
+
+    @staticmethod
+    async def _local_search(
+        vector: list[float],
+        top_k: int,
+        doc_type: str | None = None,
+        city: str | None = None,
+        category: str | None = None,
+        status: str | None = None,
+        exclude_doc_ids: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Degraded-mode answer from the local index snapshot; hits carry ``degraded: True``."""
+        index = get_local_index()
+        if index is None:
+            raise HTTPException(status_code=503, detail="Search service is temporarily unavailable.")
+        hits = await asyncio.to_thread(
+            index.search,
+            vector,
+            top_k,
+            filters={"type": doc_type, "city": city, "category": category, "status": status},
+            exclude_ids=exclude_doc_ids,
+            score_threshold=get_search_settings().SEARCH_SCORE_THRESHOLD,
+        )
+        return [{**SearchService._normalize_hit(hit), "degraded": True} for hit in hits]
+
+    @staticmethod
+    async def semantic_search_batch(queries: list[dict[str, Any]]) -> list[tuple[list[dict[str, Any]], bool]]:
+        """Same as semantic_search for every spec (q, top_k, doc_type, city, category, status), in one Qdrant request.
+
+        Returns ``(items, degraded)`` per spec, in order.
+        """
+        from qdrant_client.http.models import QueryRequest
+
+        if not queries:
+            return []
+        ready = await ensure_collection()
+        if not ready and get_local_index() is None:
+            raise HTTPException(status_code=503, detail="Search service is temporarily unavailable.")
+
+        settings = get_search_settings()
+        vectors = await SearchService.embed_queries([spec["q"] for spec in queries])
+        if ready:
+            search_params = build_search_params()
+            requests = [
+                QueryRequest(
+                    query=vectors[spec["q"]],
+                    filter=SearchService._build_filter(
+                        doc_type=spec.get("doc_type"),
+                        city=spec.get("city"),
+                        category=spec.get("category"),
+                        status=spec.get("status"),
+                    ),
+                    limit=spec["top_k"],
+                    score_threshold=settings.SEARCH_SCORE_THRESHOLD,
+                    with_payload=True,
+                    params=search_params,
+                )
+                for spec in queries
+            ]
+            try:
+                batch_hits = await search_points_batch(collection_name=live_alias_name(), requests=requests)
+            except Exception:
+                if get_local_index() is None:
+                    raise
+                logger.warning("Qdrant batch search failed, answering from the local index", exc_info=True)
+            else:
+                return [
+                    (
+                        SearchService._city_query_precision_filter(
+                            [SearchService._normalize_hit(hit) for hit in hits], q=spec["q"], city=spec.get("city")
+                        ),
+                        False,
+                    )
+                    for spec, hits in zip(queries, batch_hits)
+                ]
+
+        results: list[tuple[list[dict[str, Any]], bool]] = []
+        for spec in queries:
+            items = await SearchService._local_search(
+                vectors[spec["q"]],
+                spec["top_k"],
+                doc_type=spec.get("doc_type"),
+                city=spec.get("city"),
+                category=spec.get("category"),
+                status=spec.get("status"),
+            )
+            results.append((SearchService._city_query_precision_filter(items, q=spec["q"], city=spec.get("city")), True))
+        return results
 
     @staticmethod
     def personalize_results(
@@ -328,6 +761,7 @@ class SearchService:
         user_role: str | None,
         preferences: dict[str, Any],
         role_boost: bool,
+        top_k: int | None = None,
     ) -> list[dict[str, Any]]:
         settings = get_search_settings()
         weights = BonusWeights(
@@ -336,29 +770,32 @@ class SearchService:
             pref_category_weight=settings.PREF_CATEGORY_WEIGHT,
             pref_type_weight=settings.PREF_TYPE_WEIGHT,
         )
-        return rerank_results(items, user_role=user_role, preferences=preferences, weights=weights, role_boost=role_boost)
+        return rerank_results(
+            items, user_role=user_role, preferences=preferences, weights=weights, role_boost=role_boost, top_k=top_k
+        )
 
     @staticmethod
-    async def fetch_vectors_by_doc_ids(doc_ids: list[str]) -> list[list[float]]:
+    async def fetch_points_by_doc_ids(doc_ids: list[str]) -> dict[str, tuple[dict[str, Any], list[float]]]:
+        """Payload and vector of each indexed doc_id; ids missing from the index are left out."""
         if not doc_ids:
-            return []
+            return {}
         ready = await ensure_collection()
         if not ready:
             raise HTTPException(status_code=503, detail="Search service is temporarily unavailable.")
 
         client = get_qdrant_client()
-        settings = get_search_settings()
-        points = await client.retrieve(
-            collection_name=settings.QDRANT_COLLECTION,
-            ids=doc_ids,
-            with_vectors=True,
-            with_payload=False,
-        )
-        vectors: list[list[float]] = []
-        for point in points:
-            if isinstance(point.vector, list):
-                vectors.append([float(v) for v in point.vector])
-        return vectors
+        async with track_qdrant_call():
+            points = await client.retrieve(
+                collection_name=live_alias_name(),
+                ids=doc_ids,
+                with_vectors=True,
+                with_payload=True,
+            )
+        return {
+            str(point.id): (point.payload or {}, [float(v) for v in point.vector])
+            for point in points
+            if isinstance(point.vector, list)
+        }
 
     @staticmethod
     async def recommend_by_profile_vector(
@@ -368,19 +805,90 @@ class SearchService:
         exclude_doc_ids: list[str],
     ) -> list[dict[str, Any]]:
         ready = await ensure_collection()
-        if not ready:
+        if ready:
+            settings = get_search_settings()
+            try:
+                hits = await search_points(
+                    collection_name=live_alias_name(),
+                    query_vector=profile_vector,
+                    query_filter=SearchService._build_filter(doc_type=doc_type, exclude_doc_ids=exclude_doc_ids),
+                    limit=top_k,
+                    score_threshold=settings.SEARCH_SCORE_THRESHOLD,
+                    with_payload=True,
+                    search_params=build_search_params(),
+                )
+            except Exception:
+                if get_local_index() is None:
+                    raise
+                logger.warning("Qdrant recommend failed, answering from the local index", exc_info=True)
+            else:
+                return [SearchService._normalize_hit(hit) for hit in hits]
+
+        # Raises 503 itself when there is no local snapshot either.
+        return await SearchService._local_search(
+            profile_vector, top_k, doc_type=doc_type, exclude_doc_ids=exclude_doc_ids
+        )
+
+    @staticmethod
+    async def similar_items(
+        doc_type: str,
+        entity_id: Any,
+        top_k: int,
+        result_type: str | None = None,
+        city: str | None = None,
+        category: str | None = None,
+        status: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Documents closest to an indexed one, queried by its point id so its vector never leaves Qdrant."""
+        doc_id = SearchService.build_doc_id(doc_type, entity_id)
+        filters = {"type": result_type, "city": city, "category": category, "status": status, "top_k": top_k}
+        cache = get_similar_cache()
+        cached = cache.get(doc_id, filters)
+        if cached is not None:
+            return cached
+
+        ready = await ensure_collection()
+        if not ready and get_local_index() is None:
             raise HTTPException(status_code=503, detail="Search service is temporarily unavailable.")
 
-        settings = get_search_settings()
-        hits = await search_points(
-            collection_name=settings.QDRANT_COLLECTION,
-            query_vector=profile_vector,
-            query_filter=SearchService._build_filter(doc_type=doc_type, exclude_doc_ids=exclude_doc_ids),
-            limit=top_k,
-            score_threshold=settings.SEARCH_SCORE_THRESHOLD,
-            with_payload=True,
+        if ready:
+            settings = get_search_settings()
+            try:
+                hits = await recommend_points(
+                    collection_name=live_alias_name(),
+                    positive=[doc_id],
+                    query_filter=SearchService._build_filter(
+                        doc_type=result_type, city=city, category=category, status=status
+                    ),
+                    limit=top_k,
+                    score_threshold=settings.SEARCH_SCORE_THRESHOLD,
+                    search_params=build_search_params(),
+                )
+            except Exception:
+                if get_local_index() is None:
+                    raise
+                logger.warning("Qdrant recommend failed, answering from the local index", exc_info=True)
+            else:
+                if hits is None:
+                    raise HTTPException(status_code=404, detail="Document is not in the search index")
+                items = [SearchService._normalize_hit(hit) for hit in hits]
+                cache.set(doc_id, filters, items)
+                return items
+
+        # Degraded answers are not cached, so the Qdrant result replaces them as soon as it is back.
+        index = get_local_index()
+        vector = index.vector(doc_id) if index is not None else None
+        if vector is None:
+            raise HTTPException(status_code=404, detail="Document is not in the search index")
+        return await SearchService._local_search(
+            vector.tolist(),
+            top_k,
+            doc_type=result_type,
+            city=city,
+            category=category,
+            status=status,
+            exclude_doc_ids=[doc_id],
         )
-        return [SearchService._normalize_hit(hit) for hit in hits]
 
     @staticmethod
     async def fallback_recommendations(db: AsyncSession, user_role: str | None, top_k: int, doc_type: str | None) -> list[dict[str, Any]]:
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from collections.abc import Awaitable
+from typing import Any, TypeVar
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_stage_stats: dict[str, dict[str, int]] = defaultdict(lambda: {"ok": 0, "timeouts": 0, "failures": 0})
+
+
+async def required_stage(name: str, awaitable: Awaitable[T], timeout_seconds: float) -> T:
+    """Awaits a stage the response cannot do without; a timeout becomes a 503 like any other outage."""
+    try:
+        result = await asyncio.wait_for(awaitable, timeout=timeout_seconds)
+    except asyncio.TimeoutError:
+        _stage_stats[name]["timeouts"] += 1
+        logger.warning("Search stage '%s' timed out after %.2fs", name, timeout_seconds)
+        raise HTTPException(status_code=503, detail="Search service is temporarily unavailable.") from None
+    except Exception:
+        _stage_stats[name]["failures"] += 1
+        raise
+    _stage_stats[name]["ok"] += 1
+    return result
+
+
+async def optional_stage(name: str, awaitable: Awaitable[T], timeout_seconds: float, default: T) -> T:
+    """Awaits a stage the response can do without (personalization, tracking); any failure yields ``default``."""
+    try:
+        result = await asyncio.wait_for(awaitable, timeout=timeout_seconds)
+    except asyncio.TimeoutError:
+        _stage_stats[name]["timeouts"] += 1
+        logger.warning("Optional search stage '%s' timed out after %.2fs, skipping it", name, timeout_seconds)
+        return default
+    except Exception:
+        _stage_stats[name]["failures"] += 1
+        logger.warning("Optional search stage '%s' failed, skipping it", name, exc_info=True)
+        return default
+    _stage_stats[name]["ok"] += 1
+    return result
+
+
+async def cancel_stage(task: asyncio.Task[Any]) -> None:
+    """Cancels a concurrently started stage and waits for it, so it is not left running past the request."""
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+
+
+def stage_stats() -> dict[str, dict[str, int]]:
+    return {name: dict(counts) for name, counts in _stage_stats.items()}
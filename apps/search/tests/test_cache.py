@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+
+from apps.search import cache as cache_module
+from apps.search.cache import QueryVectorCache, SearchResultCache, SimilarItemsCache, TTLCache, normalize_query
+
+
+def test_normalize_query_casefolds_and_collapses_spaces() -> None:
+    assert normalize_query("  IT   Клубы ") == "it клубы"
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[int] = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries(monkeypatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache: TTLCache[int] = TTLCache(max_entries=10, ttl_seconds=5)
+    cache.set("a", 1)
+
+    now[0] += 6
+
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_query_vector_cache_key_includes_model_and_normalized_text() -> None:
+    cache = QueryVectorCache(model_name="model-a", max_vectors=10, ttl_seconds=60)
+    await cache.set("Алматы", [0.1, 0.2])
+
+    assert await cache.get("  алматы ") == [0.1, 0.2]
+    assert cache.build_key("Алматы") != QueryVectorCache("model-b", 10, 60).build_key("Алматы")
+
+
+def test_similar_cache_drops_entries_for_upserted_source_or_result_docs() -> None:
+    cache = SimilarItemsCache(max_entries=10, ttl_seconds=60)
+    cache.set("a", {"type": "club", "city": None, "top_k": 5}, [{"doc_id": "b"}, {"doc_id": "c"}])
+    cache.set("a", {"type": None, "top_k": 5}, [{"doc_id": "d"}])
+    cache.set("x", {"top_k": 5}, [{"doc_id": "y"}])
+
+    assert cache.get("a", {"top_k": 5, "type": "club"}) == [{"doc_id": "b"}, {"doc_id": "c"}]
+
+    assert cache.invalidate(["c"]) == 1
+    assert cache.get("a", {"type": "club", "top_k": 5}) is None
+    assert cache.get("a", {"top_k": 5}) == [{"doc_id": "d"}]
+
+    assert cache.invalidate(["a"]) == 1
+    assert cache.get("x", {"top_k": 5}) == [{"doc_id": "y"}]
+    assert cache.stats()["invalidations"] == 2
+
+
+class _SharedCounter:
+    """Stands in for the Redis client: one counter that every cache instance reads."""
+
+    def __init__(self) -> None:
+        self.value = 0
+        self.fail = False
+
+    async def get(self, _key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return str(self.value)
+
+    async def incr(self, _key):
+        self.value += 1
+
+
+def _shared_cache(counter: _SharedCounter) -> SearchResultCache:
+    cache = SearchResultCache(max_entries=10, ttl_seconds=60, redis_url="redis://test")
+    cache._redis = counter
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_search_result_cache_coalesces_concurrent_misses_and_hands_out_copies() -> None:
+    cache = _shared_cache(_SharedCounter())
+    release = asyncio.Event()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return [{"doc_id": "a", "score": 0.5}], False
+
+    waiters = [
+        asyncio.create_task(cache.get_or_compute({"q": q, "top_k": 5, "city": None}, compute))
+        for q in ("IT клубы", "it  клубы", " It Клубы")
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert cache.stats()["coalesced"] == 2
+    results[0][0][0]["score"] = 9.0
+    items, _ = await cache.get_or_compute({"q": "it клубы", "top_k": 5, "city": None}, compute)
+    assert items[0]["score"] == 0.5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_search_result_cache_skips_degraded_results_even_when_empty() -> None:
+    cache = _shared_cache(_SharedCounter())
+    results = [([], True), ([{"doc_id": "a"}], False), ([{"doc_id": "b"}], False)]
+
+    async def compute():
+        return results.pop(0)
+
+    request = {"q": "chess", "top_k": 5}
+    assert await cache.get_or_compute(request, compute) == ([], True)
+    assert await cache.get_or_compute(request, compute) == ([{"doc_id": "a"}], False)
+    assert await cache.get_or_compute(request, compute) == ([{"doc_id": "a"}], False)
+
+
+@pytest.mark.asyncio
+async def test_search_result_cache_bump_in_one_worker_invalidates_the_others() -> None:
+    counter = _SharedCounter()
+    writer, reader = _shared_cache(counter), _shared_cache(counter)
+    results = [([{"doc_id": "a"}], False), ([{"doc_id": "b"}], False)]
+
+    async def compute():
+        return results.pop(0)
+
+    request = {"q": "chess", "top_k": 5}
+    assert (await reader.get_or_compute(request, compute))[0] == [{"doc_id": "a"}]
+
+    await writer.bump_version()
+
+    assert (await reader.get_or_compute(request, compute))[0] == [{"doc_id": "b"}]
+
+
+@pytest.mark.asyncio
+async def test_search_result_cache_stores_nothing_without_a_shared_version() -> None:
+    counter = _SharedCounter()
+    counter.fail = True
+    caches = [SearchResultCache(max_entries=10, ttl_seconds=60), _shared_cache(counter)]
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return [{"doc_id": "a"}], False
+
+    for cache in caches:
+        await cache.get_or_compute({"q": "chess", "top_k": 5}, compute)
+        await cache.get_or_compute({"q": "chess", "top_k": 5}, compute)
+        assert len(cache.local) == 0
+
+    assert calls == 4
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from apps.search.embedding_server import EmbeddingClient, EmbeddingServer, EmbeddingServerError
+
+
+def _fake_encode(calls: list[list[str]]):
+    def encode(texts: list[str]) -> list[list[float]]:
+        calls.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+    return encode
+
+
+@pytest.mark.asyncio
+async def test_client_round_trip_batches_requests_from_several_connections(tmp_path) -> None:
+    calls: list[list[str]] = []
+    socket_path = str(tmp_path / "embeddings.sock")
+    server = EmbeddingServer(socket_path, _fake_encode(calls), max_batch_size=16, max_wait_ms=50)
+    await server.start()
+    try:
+        clients = [EmbeddingClient(socket_path, pool_size=1), EmbeddingClient(socket_path, pool_size=1)]
+        results = await asyncio.gather(clients[0].encode(["a", "bb"]), clients[1].encode(["ccc"]))
+        stats = await clients[0].stats()
+    finally:
+        await server.close()
+
+    assert results == [[[1.0, 0.5], [2.0, 0.5]], [[3.0, 0.5]]]
+    assert calls == [["a", "bb", "ccc"]]
+    assert stats["texts_total"] == 3
+    assert stats["connections_total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_client_reports_encode_errors_and_missing_server(tmp_path) -> None:
+    def failing(_: list[str]) -> list[list[float]]:
+        raise RuntimeError("model crashed")
+
+    socket_path = str(tmp_path / "embeddings.sock")
+    server = EmbeddingServer(socket_path, failing, max_wait_ms=0)
+    await server.start()
+    try:
+        with pytest.raises(EmbeddingServerError, match="model crashed"):
+            await EmbeddingClient(socket_path).encode(["a"])
+    finally:
+        await server.close()
+
+    with pytest.raises(EmbeddingServerError, match="unavailable"):
+        await EmbeddingClient(socket_path, timeout=1).encode(["a"])
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_closes_its_connection(tmp_path, monkeypatch) -> None:
+    calls: list[list[str]] = []
+    encode = _fake_encode(calls)
+
+    def slow_encode(texts: list[str]) -> list[list[float]]:
+        time.sleep(0.2)
+        return encode(texts)
+
+    writers: list[asyncio.StreamWriter] = []
+    open_unix_connection = asyncio.open_unix_connection
+
+    async def tracked_open(path):
+        reader, writer = await open_unix_connection(path)
+        writers.append(writer)
+        return reader, writer
+
+    monkeypatch.setattr(asyncio, "open_unix_connection", tracked_open)
+    socket_path = str(tmp_path / "embeddings.sock")
+    server = EmbeddingServer(socket_path, slow_encode, max_wait_ms=0)
+    await server.start()
+    try:
+        client = EmbeddingClient(socket_path, pool_size=1)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.encode(["slow"]), timeout=0.05)
+        cancelled_closed = writers[0].is_closing()
+        # The next request gets a fresh connection, not the one with the cancelled reply still in flight.
+        result = await client.encode(["abcd"])
+    finally:
+        await server.close()
+
+    assert cancelled_closed
+    assert len(writers) == 2
+    assert result == [[4.0, 0.5]]
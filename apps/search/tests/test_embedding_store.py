@@ -0,0 +1,99 @@
+import os
+import threading
+
+import pytest
+
+from apps.search import embeddings
+from apps.search.embedding_store import EmbeddingStore
+
+
+def test_vectors_survive_reopen_and_are_shared_between_instances(tmp_path) -> None:
+    writer = EmbeddingStore(tmp_path, model_id="model-a", max_rows=100)
+    reader = EmbeddingStore(tmp_path, model_id="model-a", max_rows=100)
+
+    writer.put_many(["alpha", "beta"], [[1.0, 2.0], [3.0, 4.0]])
+
+    assert reader.get_many(["beta", "gamma", "alpha"]) == [[3.0, 4.0], None, [1.0, 2.0]]
+    assert EmbeddingStore(tmp_path, model_id="model-a", max_rows=100).get_many(["alpha"]) == [[1.0, 2.0]]
+    assert EmbeddingStore(tmp_path, model_id="model-b", max_rows=100).get_many(["alpha"]) == [None]
+
+
+def test_torn_writes_are_ignored_and_repaired(tmp_path) -> None:
+    store = EmbeddingStore(tmp_path, model_id="model-a", max_rows=100)
+    store.put_many(["alpha"], [[1.0, 2.0]])
+    vectors_path, index_path = store._paths(store._generation)
+
+    # Simulate a crash after a partial vector row and a partial index record.
+    with open(vectors_path, "ab") as handle:
+        handle.write(b"\x00\x00")
+    with open(index_path, "ab") as handle:
+        handle.write(b"\x01" * 10)
+
+    reopened = EmbeddingStore(tmp_path, model_id="model-a", max_rows=100)
+    assert reopened.get_many(["alpha"]) == [[1.0, 2.0]]
+
+    reopened.put_many(["beta"], [[3.0, 4.0]])
+    assert EmbeddingStore(tmp_path, model_id="model-a", max_rows=100).get_many(["alpha", "beta"]) == [
+        [1.0, 2.0],
+        [3.0, 4.0],
+    ]
+    assert os.path.getsize(vectors_path) == 2 * 2 * 4
+
+
+def test_size_cap_compacts_to_newest_rows(tmp_path) -> None:
+    store = EmbeddingStore(tmp_path, model_id="model-a", max_rows=5)
+    reader = EmbeddingStore(tmp_path, model_id="model-a", max_rows=5)
+    assert reader.get_many(["t0"]) == [None]
+
+    for i in range(6):
+        store.put_many([f"t{i}"], [[float(i), 0.0]])
+
+    assert store.stats()["compactions"] == 1
+    assert store.stats()["rows"] == 4
+    assert reader.get_many(["t0", "t1", "t2", "t5"]) == [None, None, [2.0, 0.0], [5.0, 0.0]]
+    assert sorted(path.name.split(".", 1)[1] for path in tmp_path.iterdir()) == ["2.f32", "2.idx", "current", "lock"]
+
+
+def test_lookups_never_mix_generations_while_another_thread_compacts(tmp_path) -> None:
+    store = EmbeddingStore(tmp_path, model_id="model-a", max_rows=20)
+    done = threading.Event()
+    mismatches: list[tuple[str, list[float]]] = []
+
+    def write() -> None:
+        try:
+            for i in range(300):
+                store.put_many([f"t{i}"], [[float(i), float(i)]])
+        finally:
+            done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not done.is_set():
+        texts = [f"t{i}" for i in range(300)]
+        for text, vector in zip(texts, store.get_many(texts)):
+            if vector is not None and vector != [float(text[1:])] * 2:
+                mismatches.append((text, vector))
+    writer.join()
+
+    assert store.stats()["compactions"] > 1
+    assert mismatches == []
+
+
+@pytest.mark.asyncio
+async def test_encode_texts_only_encodes_texts_missing_from_store(monkeypatch, tmp_path) -> None:
+    store = EmbeddingStore(tmp_path, model_id="model-a", max_rows=100)
+    store.put_many(["cached"], [[9.0, 9.0]])
+    encoded: list[list[str]] = []
+
+    async def fake_encode(texts: list[str]) -> list[list[float]]:
+        encoded.append(list(texts))
+        return [[float(len(text)), 0.0] for text in texts]
+
+    monkeypatch.setattr(embeddings, "get_embedding_store", lambda: store)
+    monkeypatch.setattr(embeddings, "_encode_with_model", fake_encode)
+
+    vectors = await embeddings.encode_texts(["cached", "new", "new"])
+
+    assert vectors == [[9.0, 9.0], [3.0, 0.0], [3.0, 0.0]]
+    assert encoded == [["new"]]
+    assert store.get_many(["new"]) == [[3.0, 0.0]]
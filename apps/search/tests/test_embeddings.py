@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from apps.search.embeddings import EmbeddingBatcher
+
+
+def _fake_encode(calls: list[list[str]]):
+    def encode(texts: list[str]) -> list[list[float]]:
+        calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    return encode
+
+
+@pytest.mark.asyncio
+async def test_batcher_merges_concurrent_requests_into_one_forward_pass() -> None:
+    calls: list[list[str]] = []
+    batcher = EmbeddingBatcher(_fake_encode(calls), max_batch_size=16, max_wait_ms=20)
+
+    results = await asyncio.gather(
+        batcher.encode(["a"]),
+        batcher.encode(["bb", "ccc"]),
+        batcher.encode(["dddd"]),
+    )
+
+    assert calls == [["a", "bb", "ccc", "dddd"]]
+    assert results == [[[1.0, 1.0]], [[2.0, 1.0], [3.0, 1.0]], [[4.0, 1.0]]]
+    snapshot = batcher.snapshot()
+    assert snapshot["batches_total"] == 1
+    assert snapshot["avg_batch_size"] == 4.0
+    assert snapshot["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batcher_splits_by_max_batch_size() -> None:
+    calls: list[list[str]] = []
+    batcher = EmbeddingBatcher(_fake_encode(calls), max_batch_size=2, max_wait_ms=50)
+
+    await asyncio.gather(*(batcher.encode([str(i)]) for i in range(5)))
+
+    assert [len(call) for call in calls] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_batcher_propagates_encode_errors_to_all_callers() -> None:
+    def failing(_: list[str]) -> list[list[float]]:
+        raise RuntimeError("model crashed")
+
+    batcher = EmbeddingBatcher(failing, max_batch_size=8, max_wait_ms=5)
+
+    results = await asyncio.gather(batcher.encode(["a"]), batcher.encode(["b"]), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.snapshot()["errors_total"] == 1
+
+
+class _FakeSentenceTransformer:
+    def __init__(self, name: str, **kwargs) -> None:
+        self.name = name
+        self.kwargs = kwargs
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return 384
+
+
+def test_load_embedding_model_selects_onnx_backend(monkeypatch) -> None:
+    import sys
+    from types import SimpleNamespace
+
+    from apps.search import embeddings
+    from apps.search.config import SearchSettings
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers", SimpleNamespace(SentenceTransformer=_FakeSentenceTransformer))
+    monkeypatch.setattr(embeddings, "get_search_settings", lambda: SearchSettings(EMBEDDING_BACKEND="onnx", VECTOR_SIZE=384))
+
+    model = embeddings.load_embedding_model()
+
+    assert model.kwargs == {"backend": "onnx", "model_kwargs": {"file_name": "onnx/model_qint8_avx2.onnx"}}
+    assert embeddings.load_embedding_model("torch").kwargs == {}
+
+    monkeypatch.setattr(embeddings, "get_search_settings", lambda: SearchSettings(VECTOR_SIZE=768))
+    with pytest.raises(RuntimeError, match="384-d"):
+        embeddings.load_embedding_model()
+
+
+def test_cosine_agreement_reports_mean_and_min() -> None:
+    import numpy as np
+
+    from apps.search.bench import cosine_agreement
+
+    reference = np.array([[1.0, 0.0], [0.0, 1.0]])
+    candidate = np.array([[2.0, 0.0], [1.0, 1.0]])
+
+    parity = cosine_agreement(reference, candidate)
+
+    assert parity["min_cosine"] == pytest.approx(0.707107)
+    assert parity["mean_cosine"] == pytest.approx((1 + 0.707107) / 2, abs=1e-6)
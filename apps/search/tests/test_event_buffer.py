@@ -0,0 +1,109 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from apps.search import event_buffer as event_buffer_module
+from apps.search.config import get_search_settings
+from apps.search.event_buffer import TrackingEventBuffer
+from apps.search.models import ClickEvent, SearchEvent
+
+
+class _Session:
+    def __init__(self, statements: list) -> None:
+        self.statements = statements
+        self.commit = AsyncMock()
+
+    async def __aenter__(self) -> "_Session":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def execute(self, statement) -> None:
+        self.statements.append(statement)
+
+
+@pytest.fixture
+def statements(monkeypatch) -> list:
+    executed: list = []
+    monkeypatch.setattr(event_buffer_module, "AsyncSessionLocal", lambda: _Session(executed))
+    return executed
+
+
+@pytest.fixture
+def buffer_settings(monkeypatch):
+    settings = get_search_settings()
+    monkeypatch.setattr(settings, "TRACKING_BUFFER_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACKING_BUFFER_MAX_EVENTS", 3)
+    monkeypatch.setattr(settings, "TRACKING_BUFFER_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "TRACKING_BUFFER_FLUSH_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "TRACKING_BUFFER_OVERFLOW", "drop_newest")
+    return settings
+
+
+@pytest.mark.asyncio
+async def test_submit_is_refused_until_started(statements, buffer_settings) -> None:
+    buffer = TrackingEventBuffer()
+
+    assert await buffer.submit(SearchEvent, {"query_text": "chess"}) is False
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_buffer_flushes_one_multi_row_insert_per_table(statements, buffer_settings) -> None:
+    buffer = TrackingEventBuffer()
+    buffer.start()
+
+    assert await buffer.submit(SearchEvent, {"query_text": "chess"})
+    assert await buffer.submit(ClickEvent, {"doc_id": "club:1"})
+    assert await buffer.submit(SearchEvent, {"query_text": "robotics"})
+    await asyncio.sleep(0.05)
+    await buffer.stop()
+
+    tables = [statement.table.name for statement in statements]
+    assert tables.count("search_events") + tables.count("click_events") == 3
+    assert tables.count("search_query_hourly") == 2
+    snapshot = buffer.snapshot()
+    assert (snapshot["accepted"], snapshot["flushed"], snapshot["dropped"]) == (3, 3, 0)
+    assert snapshot["flushes"] == 2
+
+
+@pytest.mark.asyncio
+async def test_overflow_policies_count_dropped_events(statements, buffer_settings) -> None:
+    buffer = TrackingEventBuffer()
+    buffer.start()
+    # Fill the queue without yielding to the flusher.
+    for index in range(5):
+        await buffer.submit(SearchEvent, {"query_text": f"q{index}"})
+
+    assert buffer.snapshot()["dropped"] == 2
+    await buffer.stop()
+    assert buffer.flushed == 3
+
+    buffer_settings.TRACKING_BUFFER_OVERFLOW = "drop_oldest"
+    statements.clear()
+    buffer = TrackingEventBuffer()
+    buffer.start()
+    for index in range(5):
+        await buffer.submit(SearchEvent, {"query_text": f"q{index}"})
+    await buffer.stop()
+
+    params = [statement.compile().params for statement in statements if statement.table.name == "search_events"]
+    flushed = [value for compiled in params for key, value in compiled.items() if key.startswith("query_text")]
+    assert sorted(flushed) == ["q2", "q3", "q4"]
+    assert buffer.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_counted_not_raised(monkeypatch, buffer_settings) -> None:
+    def broken_session():
+        raise RuntimeError("pool exhausted")
+
+    monkeypatch.setattr(event_buffer_module, "AsyncSessionLocal", broken_session)
+    buffer = TrackingEventBuffer()
+    buffer.start()
+    await buffer.submit(SearchEvent, {"query_text": "chess"})
+    await buffer.stop()
+
+    assert (buffer.flushed, buffer.failed) == (0, 1)
@@ -0,0 +1,190 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+from apps.search import local_index as local_index_module
+from apps.search import service as service_module
+from apps.search.config import get_search_settings
+from apps.search.local_index import LocalVectorIndex, get_local_index
+from apps.search.service import SearchService
+
+
+def _index(dtype: str = "int8") -> LocalVectorIndex:
+    vectors = np.array([[1.0, 0.0, 0.0], [0.8, 0.6, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 2.0]], dtype=np.float32)
+    payloads = [
+        {"doc_id": "a", "type": "club", "entity_id": "1", "title": "Chess", "city": "Almaty", "content_hash": "x"},
+        {"doc_id": "b", "type": "news", "entity_id": "2", "title": "Chess news", "city": "Almaty"},
+        {"doc_id": "c", "type": "club", "entity_id": "3", "title": "Football", "city": "Astana"},
+        {"doc_id": "d", "type": "campaign", "entity_id": "4", "title": "Robots"},
+    ]
+    return LocalVectorIndex.build(["a", "b", "c", "d"], vectors, payloads, dtype=dtype)
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_search_ranks_by_cosine_and_applies_filter_masks(dtype) -> None:
+    index = _index(dtype)
+
+    assert [hit.id for hit in index.search([1.0, 0.1, 0.0], top_k=3)] == ["a", "b", "c"]
+    assert [hit.id for hit in index.search([1.0, 0.1, 0.0], top_k=3, filters={"type": "club"})] == ["a", "c"]
+    assert [hit.id for hit in index.search([1.0, 0.1, 0.0], 3, filters={"type": "club", "city": "Astana"})] == ["c"]
+    assert index.search([1.0, 0.0, 0.0], top_k=3, filters={"city": "Shymkent"}) == []
+    assert [hit.id for hit in index.search([1.0, 0.0, 0.0], 2, exclude_ids=["a"])] == ["b", "c"]
+    assert [hit.id for hit in index.search([0.0, 0.0, 5.0], 4, score_threshold=0.5)] == ["d"]
+
+    top = index.search([1.0, 0.0, 0.0], top_k=1)[0]
+    assert top.score == pytest.approx(1.0, abs=0.01)
+    # Only display fields are kept in the snapshot.
+    assert top.payload == {
+        "doc_id": "a", "type": "club", "entity_id": "1", "title": "Chess",
+        "snippet": None, "url": None, "city": "Almaty", "category": None, "status": None,
+    }
+
+
+def test_snapshot_round_trip_is_memory_mapped_and_replaces_previous(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(get_search_settings(), "LOCAL_INDEX_DIR", str(tmp_path))
+    first = _index()
+    first.save(tmp_path)
+    loaded = get_local_index()
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert [hit.id for hit in loaded.search([0.0, 1.0, 0.0], 2)] == ["c", "b"]
+    assert loaded.stats()["docs"] == 4
+
+    second = _index("float16")
+    second.created_at += 1
+    second.save(tmp_path)
+
+    assert get_local_index().stats()["dtype"] == "float16"
+    assert len(list(tmp_path.glob("snapshot-*"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_switched_snapshot_loads_off_the_event_loop_while_the_previous_one_answers(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(get_search_settings(), "LOCAL_INDEX_DIR", str(tmp_path))
+    _index().save(tmp_path)
+    previous = await local_index_module.load_local_index()
+    second = _index("float16")
+    second.created_at += 1
+    second.save(tmp_path)
+
+    release = threading.Event()
+    load_threads = []
+    real_load = LocalVectorIndex.load.__func__
+
+    def slow_load(cls, directory):
+        load_threads.append(threading.current_thread())
+        release.wait(5)
+        return real_load(cls, directory)
+
+    monkeypatch.setattr(LocalVectorIndex, "load", classmethod(slow_load))
+
+    assert get_local_index() is previous
+    assert get_local_index() is previous
+    release.set()
+    loaded = await local_index_module.load_local_index()
+
+    assert loaded.stats()["dtype"] == "float16"
+    assert get_local_index() is loaded
+    assert len(load_threads) == 1
+    assert load_threads[0] is not threading.main_thread()
+
+
+@pytest.mark.asyncio
+async def test_semantic_search_answers_from_local_index_when_qdrant_is_down(monkeypatch) -> None:
+    index = _index()
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=False))
+    monkeypatch.setattr(service_module, "get_local_index", lambda: index)
+    monkeypatch.setattr(SearchService, "embed_query", AsyncMock(return_value=[1.0, 0.1, 0.0]))
+    search_points = AsyncMock()
+    monkeypatch.setattr(service_module, "search_points", search_points)
+
+    items, degraded = await SearchService.semantic_search(q="chess", top_k=2, doc_type="club")
+
+    assert degraded
+    assert [(item["entity_id"], item["degraded"]) for item in items] == [(1, True), (3, True)]
+    search_points.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_similar_items_use_the_snapshot_vector_when_qdrant_is_down(monkeypatch) -> None:
+    from apps.search.cache import SimilarItemsCache
+
+    index = _index()
+    cache = SimilarItemsCache(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(service_module, "get_similar_cache", lambda: cache)
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=False))
+    monkeypatch.setattr(service_module, "get_local_index", lambda: index)
+    monkeypatch.setattr(service_module.SearchService, "build_doc_id", staticmethod(lambda doc_type, entity_id: "a"))
+
+    items = await SearchService.similar_items("club", 1, top_k=2)
+
+    assert [(item["title"], item["degraded"]) for item in items] == [("Chess news", True), ("Football", True)]
+    assert len(cache.local) == 0
+
+
+@pytest.mark.asyncio
+async def test_semantic_search_falls_back_when_the_qdrant_call_fails(monkeypatch) -> None:
+    index = _index()
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=True))
+    monkeypatch.setattr(service_module, "get_local_index", lambda: index)
+    monkeypatch.setattr(SearchService, "embed_query", AsyncMock(return_value=[0.0, 1.0, 0.0]))
+    monkeypatch.setattr(service_module, "search_points", AsyncMock(side_effect=ConnectionError("reset")))
+
+    items, degraded = await SearchService.semantic_search(q="football", top_k=1)
+
+    assert degraded and items[0]["title"] == "Football" and items[0]["degraded"] is True
+
+
+@pytest.mark.asyncio
+async def test_recommend_by_profile_vector_falls_back_when_the_qdrant_call_fails(monkeypatch) -> None:
+    index = _index()
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=True))
+    monkeypatch.setattr(service_module, "get_local_index", lambda: index)
+    monkeypatch.setattr(service_module, "search_points", AsyncMock(side_effect=ConnectionError("reset")))
+
+    items = await SearchService.recommend_by_profile_vector([1.0, 0.1, 0.0], top_k=2, doc_type=None, exclude_doc_ids=["a"])
+
+    assert [(item["title"], item["degraded"]) for item in items] == [("Chess news", True), ("Football", True)]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_collection_fills_quantized_matrix_page_by_page(monkeypatch) -> None:
+    reference = _index()
+    points = [
+        SimpleNamespace(id=point_id, vector=vector, payload=reference.payload(row))
+        for row, (point_id, vector) in enumerate(
+            zip(["a", "b", "c", "d"], [[1.0, 0.0, 0.0], [0.8, 0.6, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 2.0]])
+        )
+    ]
+    points.insert(2, SimpleNamespace(id="no-vector", vector=None, payload={}))
+    pages = [(points[:2], "o1"), (points[2:4], "o2"), (points[4:], None)]
+    client = SimpleNamespace(
+        # Two points landed after the count, so the matrix has to grow once.
+        count=AsyncMock(return_value=SimpleNamespace(count=2)),
+        scroll=AsyncMock(side_effect=pages),
+    )
+    monkeypatch.setattr(get_search_settings(), "REINDEX_CHUNK_SIZE", 2)
+    monkeypatch.setattr(local_index_module, "get_qdrant_client", lambda: client)
+
+    index = await local_index_module.snapshot_collection()
+
+    assert index.point_ids == ["a", "b", "c", "d"]
+    assert index.vectors.dtype == np.int8 and index.vectors.shape == (4, 3)
+    np.testing.assert_array_equal(index.vectors, reference.vectors)
+    np.testing.assert_array_equal(index.scales, reference.scales)
+    assert index.payload(3) == reference.payload(3)
+    assert [hit.id for hit in index.search([1.0, 0.1, 0.0], top_k=2)] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_snapshotter_skips_fresh_snapshot(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(get_search_settings(), "LOCAL_INDEX_DIR", str(tmp_path))
+    _index().save(tmp_path)
+    snapshot = AsyncMock()
+    monkeypatch.setattr(local_index_module, "snapshot_collection", snapshot)
+
+    assert await local_index_module.LocalIndexSnapshotter().refresh() is False
+    snapshot.assert_not_awaited()
@@ -0,0 +1,164 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import apps.db.models  # noqa: F401  (configures every mapper before entries are instantiated)
+from apps.search import outbox as outbox_module
+from apps.search.config import get_search_settings
+from apps.search.models import SearchOutboxEntry
+from apps.search.outbox import SearchOutboxService
+from apps.search.service import SearchService
+
+
+def _session(entries):
+    result = Mock()
+    result.scalars.return_value.all.return_value = entries
+    return SimpleNamespace(
+        execute=AsyncMock(return_value=result),
+        delete=AsyncMock(),
+        commit=AsyncMock(),
+        add=Mock(),
+    )
+
+
+def test_enqueue_adds_entry_to_callers_session() -> None:
+    db = _session([])
+
+    SearchOutboxService.enqueue(db, "news", 7)
+
+    entry = db.add.call_args.args[0]
+    assert isinstance(entry, SearchOutboxEntry)
+    assert (entry.doc_type, entry.entity_id) == ("news", "7")
+
+
+@asynccontextmanager
+async def _outbox_session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as connection:
+        await connection.run_sync(SearchOutboxEntry.__table__.create)
+    session = async_sessionmaker(engine, expire_on_commit=False)()
+    yield session
+    await session.close()
+    await engine.dispose()
+
+
+async def _add_entries(db, *entities, attempts=0):
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    for doc_type, entity_id in entities:
+        db.add(SearchOutboxEntry(doc_type=doc_type, entity_id=entity_id, attempts=attempts, available_at=past))
+    await db.commit()
+
+
+async def _entries(db):
+    db.expire_all()
+    return list((await db.execute(select(SearchOutboxEntry).order_by(SearchOutboxEntry.id))).scalars().all())
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_drain_batch_upserts_existing_and_deletes_missing_entities(monkeypatch) -> None:
+    async with _outbox_session() as outbox_db:
+        await _add_entries(outbox_db, ("club", "1"), ("club", "1"), ("news", "9"))
+        club_doc = {"type": "club", "entity_id": 1, "title": "Chess"}
+        leased: list[datetime] = []
+
+        async def load_documents(db, doc_type, entity_ids):
+            # The claim is committed before any sync work, with the entries leased into the future.
+            leased.extend(_as_utc(entry.available_at) for entry in await _entries(db))
+            return {"1": club_doc} if doc_type == "club" else {}
+
+        upsert = AsyncMock()
+        delete = AsyncMock()
+        monkeypatch.setattr(SearchService, "load_documents", load_documents)
+        monkeypatch.setattr(SearchService, "upsert_documents", upsert)
+        monkeypatch.setattr(SearchService, "delete_points", delete)
+
+        drained = await SearchOutboxService.drain_batch(outbox_db, batch_size=10)
+
+        assert drained == 3
+        upsert.assert_awaited_once_with([club_doc])
+        delete.assert_awaited_once_with([SearchService.build_doc_id("news", "9")])
+        assert await _entries(outbox_db) == []
+        assert leased and all(value > datetime.now(timezone.utc) for value in leased)
+
+
+@pytest.mark.asyncio
+async def test_drain_batch_isolates_a_failing_entity(monkeypatch) -> None:
+    async with _outbox_session() as outbox_db:
+        await _add_entries(outbox_db, ("club", "1"), ("club", "2"), ("club", "3"))
+
+        async def load_documents(_db, doc_type, entity_ids):
+            return {str(entity_id): {"type": doc_type, "entity_id": entity_id, "title": "x"} for entity_id in entity_ids}
+
+        async def upsert_documents(docs):
+            if any(doc["entity_id"] == 2 for doc in docs):
+                raise ValueError("bad document")
+
+        monkeypatch.setattr(outbox_module, "ensure_collection", AsyncMock(return_value=True))
+        monkeypatch.setattr(SearchService, "load_documents", load_documents)
+        monkeypatch.setattr(SearchService, "upsert_documents", upsert_documents)
+        monkeypatch.setattr(SearchService, "delete_points", AsyncMock())
+
+        drained = await SearchOutboxService.drain_batch(outbox_db, batch_size=10)
+
+        assert drained == 2
+        (poison,) = await _entries(outbox_db)
+        assert (poison.entity_id, poison.attempts, poison.last_error) == ("2", 1, "bad document")
+        assert poison.dead_at is None
+
+
+@pytest.mark.asyncio
+async def test_drain_batch_backs_off_after_a_database_error(monkeypatch) -> None:
+    async with _outbox_session() as outbox_db:
+        await _add_entries(outbox_db, ("club", "1"), ("club", "2"), attempts=2)
+
+        async def load_documents(db, _doc_type, _entity_ids):
+            await db.execute(text("SELECT * FROM missing_table"))
+
+        monkeypatch.setattr(outbox_module, "ensure_collection", AsyncMock(return_value=False))
+        monkeypatch.setattr(SearchService, "load_documents", load_documents)
+
+        drained = await SearchOutboxService.drain_batch(outbox_db, batch_size=10)
+
+        assert drained == 0
+        entries = await _entries(outbox_db)
+        assert [entry.attempts for entry in entries] == [3, 3]
+        assert all("missing_table" in entry.last_error for entry in entries)
+        # Rescheduled with the 8s backoff of a third attempt rather than left on the 60s claim lease.
+        now = datetime.now(timezone.utc)
+        assert all(now + timedelta(seconds=7) < _as_utc(entry.available_at) < now + timedelta(seconds=9) for entry in entries)
+
+
+@pytest.mark.asyncio
+async def test_drain_batch_dead_letters_after_max_attempts(monkeypatch) -> None:
+    async with _outbox_session() as outbox_db:
+        monkeypatch.setattr(get_search_settings(), "OUTBOX_MAX_ATTEMPTS", 3)
+        await _add_entries(outbox_db, ("club", "1"), attempts=2)
+        monkeypatch.setattr(SearchService, "load_documents", AsyncMock(return_value={}))
+        monkeypatch.setattr(SearchService, "upsert_documents", AsyncMock())
+        delete = AsyncMock(side_effect=ConnectionError("qdrant down"))
+        monkeypatch.setattr(SearchService, "delete_points", delete)
+
+        assert await SearchOutboxService.drain_batch(outbox_db, batch_size=10) == 0
+        (entry,) = await _entries(outbox_db)
+        assert entry.attempts == 3 and entry.dead_at is not None
+
+        # Dead entries are never claimed again, even once their backoff has passed.
+        entry.available_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await outbox_db.commit()
+        assert await SearchOutboxService.drain_batch(outbox_db, batch_size=10) == 0
+        delete.assert_awaited_once()
+
+
+def test_backoff_is_exponential_and_capped() -> None:
+    assert SearchOutboxService.backoff_seconds(1) == 2.0
+    assert SearchOutboxService.backoff_seconds(3) == 8.0
+    assert SearchOutboxService.backoff_seconds(50) == 300.0
@@ -1,7 +1,11 @@
+import pytest
+
+from apps.search import personalization
 from apps.search.personalization import (
     BonusWeights,
     build_profile_vector,
     compute_user_preferences,
+    decay_weights,
     rerank_results,
 )
 
@@ -43,3 +47,30 @@ def test_build_profile_vector_mean_pooling() -> None:
 
     assert round(pooled[0], 6) == round(0.70710678118, 6)
     assert round(pooled[1], 6) == round(0.70710678118, 6)
+
+
+def test_build_profile_vector_weighted_matches_python_fallback(monkeypatch) -> None:
+    vectors = [[1.0, 0.0, 2.0], [0.0, 1.0, 0.0], [3.0, 1.0, 1.0]]
+    weights = decay_weights([0.0, 14.0, 28.0], half_life_days=14)
+
+    assert weights == pytest.approx([1.0, 0.5, 0.25])
+    vectorized = build_profile_vector(vectors, weights)
+    monkeypatch.setattr(personalization, "np", None)
+
+    assert vectorized == pytest.approx(build_profile_vector(vectors, weights))
+    assert decay_weights([0.0, 14.0], half_life_days=14) == pytest.approx([1.0, 0.5])
+
+
+def test_rerank_top_k_matches_full_sort() -> None:
+    preferences = {"top_cities": ["Almaty"], "top_categories": ["IT"], "top_types": ["club"], "type_counts": {"club": 4}}
+    items = [
+        {"type": doc_type, "city": city, "category": "IT" if index % 3 == 0 else None, "score": 0.5}
+        for index, (doc_type, city) in enumerate(
+            [("club", "Almaty"), ("news", None), ("campaign", "Almaty"), ("club", None), ("news", "Astana")] * 8
+        )
+    ]
+
+    full = rerank_results([dict(item) for item in items], "member", preferences, BonusWeights())
+    top = rerank_results([dict(item) for item in items], "member", preferences, BonusWeights(), top_k=5)
+
+    assert top == full[:5]
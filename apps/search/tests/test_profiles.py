@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects import postgresql
+
+import apps.db.models  # noqa: F401
+from apps.search import profiles as profiles_module
+from apps.search import routes
+from apps.search.models import UserSearchProfile
+from apps.search.profiles import SearchProfileService, decay_factor
+
+
+def test_decay_factor_halves_weight_every_half_life() -> None:
+    now = datetime(2026, 3, 15, tzinfo=timezone.utc)
+
+    assert decay_factor(None, now, 14) == 1.0
+    assert decay_factor(now - timedelta(days=14), now, 14) == pytest.approx(0.5)
+    assert decay_factor((now - timedelta(days=28)).replace(tzinfo=None), now, 14) == pytest.approx(0.25)
+
+
+def test_apply_click_updates_decayed_mean_and_counters() -> None:
+    profile = UserSearchProfile(user_id=1)
+    first = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+    SearchProfileService.apply_click(profile, "p1", {"type": "club", "city": "Almaty"}, [1.0, 0.0], first)
+    SearchProfileService.apply_click(
+        profile, "p2", {"type": "news", "city": "Astana"}, [0.0, 1.0], first + timedelta(days=14)
+    )
+
+    # The first click has half the weight of the second one after a half-life.
+    assert profile.profile_vector == pytest.approx([1 / 3, 2 / 3])
+    assert profile.profile_weight == pytest.approx(1.5)
+    assert profile.type_weights == pytest.approx({"club": 0.5, "news": 1.0})
+    assert profile.top_cities == ["Astana", "Almaty"]
+    assert profile.recent_doc_ids == ["p2", "p1"]
+    assert SearchProfileService.preferences(profile)["type_counts"] == pytest.approx({"club": 0.5, "news": 1.0})
+
+
+@pytest.mark.asyncio
+async def test_record_click_creates_profile_from_clicked_point(monkeypatch) -> None:
+    point_id = SearchProfileService.point_id("club:5")
+    monkeypatch.setattr(
+        profiles_module.SearchService,
+        "fetch_points_by_doc_ids",
+        AsyncMock(return_value={point_id: ({"type": "club", "category": "IT"}, [0.6, 0.8])}),
+    )
+    profile = UserSearchProfile(user_id=7)
+    get = AsyncMock(return_value=profile)
+    monkeypatch.setattr(SearchProfileService, "get", get)
+    db = SimpleNamespace(execute=AsyncMock(), commit=AsyncMock(), rollback=AsyncMock())
+
+    await SearchProfileService.record_click(db, user_id=7, doc_id="club:5")
+
+    # The row is inserted before it is locked, so a concurrent first click waits instead of failing.
+    (statement,) = [call.args[0] for call in db.execute.await_args_list]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "INSERT INTO user_search_profiles" in sql
+    assert "ON CONFLICT (user_id) DO NOTHING" in sql
+    get.assert_awaited_once_with(db, 7, for_update=True)
+    assert profile.profile_vector == [0.6, 0.8]
+    assert profile.top_categories == ["IT"]
+    assert profile.recent_doc_ids == [point_id]
+    db.commit.assert_awaited_once()
+    db.rollback.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_recommend_uses_stored_profile_vector(monkeypatch) -> None:
+    profile = SimpleNamespace(profile_vector=[0.1, 0.2], recent_doc_ids=["p1"])
+    recommend = AsyncMock(return_value=[{"type": "club", "entity_id": 1, "title": "AI", "score": 0.5}])
+    monkeypatch.setattr(routes.SearchProfileService, "get", AsyncMock(return_value=profile))
+    monkeypatch.setattr(routes.SearchProfileService, "rebuild_from_clicks", AsyncMock())
+    monkeypatch.setattr(routes.SearchService, "recommend_by_profile_vector", recommend)
+
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[routes.get_db] = lambda: None
+    app.dependency_overrides[routes.get_required_current_user] = lambda: SimpleNamespace(id=3, role=SimpleNamespace(value="member"))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/search/recommend", params={"top_k": 5})
+
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+    assert recommend.await_args.kwargs == {
+        "profile_vector": [0.1, 0.2],
+        "top_k": 5,
+        "doc_type": None,
+        "exclude_doc_ids": ["p1"],
+    }
+    routes.SearchProfileService.rebuild_from_clicks.assert_not_awaited()
@@ -0,0 +1,270 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from apps.search import qdrant_client
+from apps.search.config import SearchSettings
+from apps.search.qdrant_client import CircuitBreaker, QdrantState
+
+
+def _collection_info(payload_schema=None, quantization_config=None, m=16, ef_construct=100):
+    return SimpleNamespace(
+        payload_schema=payload_schema or {},
+        config=SimpleNamespace(
+            hnsw_config=SimpleNamespace(m=m, ef_construct=ef_construct),
+            quantization_config=quantization_config,
+        ),
+    )
+
+
+def _configurable_client(info) -> SimpleNamespace:
+    return SimpleNamespace(
+        get_collection=AsyncMock(return_value=info),
+        create_payload_index=AsyncMock(),
+        update_collection=AsyncMock(),
+    )
+
+
+def _aliases(*pairs: tuple[str, str]) -> SimpleNamespace:
+    return SimpleNamespace(
+        aliases=[SimpleNamespace(alias_name=alias, collection_name=collection) for alias, collection in pairs]
+    )
+
+
+def test_circuit_breaker_opens_after_threshold_and_half_opens_after_timeout(monkeypatch) -> None:
+    now = [0.0]
+    monkeypatch.setattr(qdrant_client.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    now[0] = 11.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    # One probe at a time while half-open.
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 22.0
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_half_open_probe_that_never_reports_back_is_replaced(monkeypatch) -> None:
+    now = [0.0]
+    monkeypatch.setattr(qdrant_client.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+
+    now[0] = 10.0
+    assert breaker.allow_request()
+    now[0] = 15.0
+    assert not breaker.allow_request()
+    now[0] = 20.0
+    assert breaker.allow_request()
+
+
+@pytest.mark.asyncio
+async def test_ensure_collection_uses_cached_readiness(monkeypatch) -> None:
+    client = _configurable_client(_collection_info(payload_schema=dict.fromkeys(["type", "city", "category", "status"])))
+    client.get_aliases = AsyncMock(return_value=_aliases(("clubverse_search_live", "clubverse_search")))
+    monkeypatch.setattr(qdrant_client, "qdrant_state", QdrantState())
+    monkeypatch.setattr(qdrant_client, "get_qdrant_client", lambda: client)
+
+    assert await qdrant_client.ensure_collection()
+    assert await qdrant_client.ensure_collection()
+    assert await qdrant_client.ensure_collection(force=True)
+
+    assert client.get_aliases.await_count == 2
+    client.get_collection.assert_awaited_once_with("clubverse_search_live")
+
+
+@pytest.mark.asyncio
+async def test_ensure_collection_points_live_alias_at_plain_collection_without_dropping_it(monkeypatch) -> None:
+    client = _configurable_client(_collection_info(payload_schema=dict.fromkeys(["type", "city", "category", "status"])))
+    client.get_aliases = AsyncMock(return_value=_aliases())
+    client.collection_exists = AsyncMock(return_value=True)
+    client.update_collection_aliases = AsyncMock()
+    client.delete_collection = AsyncMock()
+    monkeypatch.setattr(qdrant_client, "qdrant_state", QdrantState())
+    monkeypatch.setattr(qdrant_client, "get_qdrant_client", lambda: client)
+
+    assert await qdrant_client.ensure_collection()
+
+    (operation,) = client.update_collection_aliases.await_args.kwargs["change_aliases_operations"]
+    assert operation.create_alias.alias_name == "clubverse_search_live"
+    assert operation.create_alias.collection_name == "clubverse_search"
+    client.delete_collection.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_ensure_collection_creates_plain_collection_for_live_alias_on_fresh_install(monkeypatch) -> None:
+    client = _configurable_client(_collection_info(payload_schema=dict.fromkeys(["type", "city", "category", "status"])))
+    client.get_aliases = AsyncMock(return_value=_aliases())
+    client.collection_exists = AsyncMock(return_value=False)
+    client.update_collection_aliases = AsyncMock()
+    create = AsyncMock()
+    monkeypatch.setattr(qdrant_client, "create_search_collection", create)
+    monkeypatch.setattr(qdrant_client, "qdrant_state", QdrantState())
+    monkeypatch.setattr(qdrant_client, "get_qdrant_client", lambda: client)
+
+    assert await qdrant_client.ensure_collection()
+
+    create.assert_awaited_once_with("clubverse_search")
+    (operation,) = client.update_collection_aliases.await_args.kwargs["change_aliases_operations"]
+    assert operation.create_alias.collection_name == "clubverse_search"
+
+
+@pytest.mark.asyncio
+async def test_switch_alias_repoints_live_alias_without_deleting_collections(monkeypatch) -> None:
+    client = SimpleNamespace(
+        get_aliases=AsyncMock(return_value=_aliases(("clubverse_search_live", "clubverse_search"))),
+        update_collection_aliases=AsyncMock(),
+        delete_collection=AsyncMock(),
+    )
+    monkeypatch.setattr(qdrant_client, "get_qdrant_client", lambda: client)
+
+    previous = await qdrant_client.switch_alias("clubverse_search_v20260202000000")
+
+    assert previous == "clubverse_search"
+    delete, create = client.update_collection_aliases.await_args.kwargs["change_aliases_operations"]
+    assert delete.delete_alias.alias_name == "clubverse_search_live"
+    assert create.create_alias.collection_name == "clubverse_search_v20260202000000"
+    client.delete_collection.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_drop_index_version_keeps_live_target(monkeypatch) -> None:
+    client = SimpleNamespace(
+        get_aliases=AsyncMock(return_value=_aliases(("clubverse_search_live", "clubverse_search_v20260202000000"))),
+        delete_collection=AsyncMock(),
+    )
+    monkeypatch.setattr(qdrant_client, "get_qdrant_client", lambda: client)
+
+    assert not await qdrant_client.drop_index_version("clubverse_search_v20260202000000")
+    client.delete_collection.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_ensure_collection_fails_fast_when_circuit_open(monkeypatch) -> None:
+    client = SimpleNamespace(get_aliases=AsyncMock(side_effect=OSError("connection refused")))
+    state = QdrantState()
+    state.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    monkeypatch.setattr(qdrant_client, "qdrant_state", state)
+    monkeypatch.setattr(qdrant_client, "get_qdrant_client", lambda: client)
+
+    for _ in range(5):
+        assert not await qdrant_client.ensure_collection()
+
+    assert client.get_aliases.await_count == 2
+    assert state.breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_failed_call_invalidates_cached_readiness(monkeypatch) -> None:
+    state = QdrantState()
+    state.mark_ready()
+    monkeypatch.setattr(qdrant_client, "qdrant_state", state)
+
+    with pytest.raises(OSError):
+        async with qdrant_client.track_qdrant_call():
+            raise OSError("timeout")
+
+    assert not state.is_fresh()
+    assert state.breaker.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_requests_do_not_count_as_outages(monkeypatch) -> None:
+    from httpx import Headers
+    from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+    def response(status_code: int) -> UnexpectedResponse:
+        return UnexpectedResponse(status_code, "", b"{}", Headers())
+
+    state = QdrantState()
+    state.mark_ready()
+    monkeypatch.setattr(qdrant_client, "qdrant_state", state)
+
+    for exc in (response(400), response(404), ValueError("bad filter"), ResponseHandlingException(ValueError("parse"))):
+        with pytest.raises(type(exc)):
+            async with qdrant_client.track_qdrant_call():
+                raise exc
+
+    assert state.is_fresh()
+    assert state.breaker.failures == 0
+
+    for exc in (response(503), ResponseHandlingException(ConnectionError("refused")), TimeoutError()):
+        with pytest.raises(type(exc)):
+            async with qdrant_client.track_qdrant_call():
+                raise exc
+
+    assert state.breaker.failures == 3
+
+
+@pytest.mark.asyncio
+async def test_configure_search_collection_adds_missing_payload_indexes_and_quantization(monkeypatch) -> None:
+    client = _configurable_client(_collection_info(payload_schema={"type": object()}))
+    monkeypatch.setattr(qdrant_client, "get_qdrant_client", lambda: client)
+    monkeypatch.setattr(
+        qdrant_client,
+        "get_search_settings",
+        lambda: SearchSettings(QDRANT_QUANTIZATION_ENABLED=True, QDRANT_HNSW_M=32),
+    )
+
+    await qdrant_client.configure_search_collection("clubverse_search")
+
+    created = [call.kwargs["field_name"] for call in client.create_payload_index.await_args_list]
+    assert created == ["city", "category", "status"]
+    update = client.update_collection.await_args.kwargs
+    assert update["hnsw_config"].m == 32
+    assert update["quantization_config"].scalar.quantile == 0.99
+    assert update["vectors_config"][""].on_disk is True
+
+
+@pytest.mark.asyncio
+async def test_configure_search_collection_is_noop_when_up_to_date(monkeypatch) -> None:
+    monkeypatch.setattr(qdrant_client, "get_search_settings", lambda: SearchSettings())
+    client = _configurable_client(_collection_info(payload_schema=dict.fromkeys(["type", "city", "category", "status"])))
+    monkeypatch.setattr(qdrant_client, "get_qdrant_client", lambda: client)
+
+    await qdrant_client.configure_search_collection("clubverse_search")
+
+    client.create_payload_index.assert_not_awaited()
+    client.update_collection.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_configure_search_collection_adds_text_index_for_lexical_pushdown(monkeypatch) -> None:
+    client = _configurable_client(_collection_info(payload_schema=dict.fromkeys(["type", "city", "category", "status"])))
+    monkeypatch.setattr(qdrant_client, "get_qdrant_client", lambda: client)
+    monkeypatch.setattr(qdrant_client, "get_search_settings", lambda: SearchSettings(SEARCH_LEXICAL_PUSHDOWN=True))
+
+    await qdrant_client.configure_search_collection("clubverse_search")
+
+    call = client.create_payload_index.await_args
+    assert call.kwargs["field_name"] == "search_text"
+    assert call.kwargs["field_schema"].phrase_matching is True
+
+
+def test_build_search_params_only_when_tuned(monkeypatch) -> None:
+    monkeypatch.setattr(qdrant_client, "get_search_settings", lambda: SearchSettings())
+    assert qdrant_client.build_search_params() is None
+
+    monkeypatch.setattr(
+        qdrant_client,
+        "get_search_settings",
+        lambda: SearchSettings(QDRANT_QUANTIZATION_ENABLED=True, QDRANT_HNSW_EF_SEARCH=128),
+    )
+    params = qdrant_client.build_search_params()
+    assert params.hnsw_ef == 128
+    assert params.quantization.rescore is True
+    assert params.quantization.oversampling == 2.0
@@ -0,0 +1,148 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from apps.search import partitions as partitions_module
+from apps.search.config import get_search_settings
+from apps.search.models import ClickEvent, SearchClickHourly, SearchEvent, SearchPositionHourly, SearchQueryHourly
+from apps.search.partitions import TrackingPartitionService, month_start, partition_month
+from apps.search.rollups import SearchRollupService, rollup_increments
+
+HOUR = datetime(2026, 3, 1, 10, tzinfo=timezone.utc)
+
+
+def test_rollup_increments_aggregate_by_hour() -> None:
+    increments = rollup_increments(
+        {
+            SearchEvent: [
+                {"created_at": HOUR + timedelta(minutes=5), "top_doc_ids": ["a", "b"]},
+                {"created_at": HOUR + timedelta(minutes=50), "top_doc_ids": ["a"]},
+                {"created_at": HOUR + timedelta(hours=1), "top_doc_ids": None},
+            ],
+            ClickEvent: [
+                {"created_at": HOUR, "doc_id": "club:1", "doc_type": "club", "position": 1},
+                {"created_at": HOUR, "doc_id": "club:1", "doc_type": "club", "position": None},
+            ],
+        }
+    )
+
+    assert increments[SearchQueryHourly] == [
+        {"bucket": HOUR, "queries": 2},
+        {"bucket": HOUR + timedelta(hours=1), "queries": 1},
+    ]
+    assert increments[SearchClickHourly] == [{"bucket": HOUR, "doc_id": "club:1", "doc_type": "club", "clicks": 2}]
+    assert increments[SearchPositionHourly] == [
+        {"bucket": HOUR, "position": 1, "impressions": 2, "clicks": 1},
+        {"bucket": HOUR, "position": 2, "impressions": 1, "clicks": 0},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_apply_upserts_counters_incrementally() -> None:
+    db = SimpleNamespace(execute=AsyncMock())
+
+    await SearchRollupService.apply(db, {SearchEvent: [{"created_at": HOUR, "top_doc_ids": []}]})
+
+    (statement,) = [call.args[0] for call in db.execute.await_args_list]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "INSERT INTO search_query_hourly" in sql
+    assert "ON CONFLICT (bucket) DO UPDATE SET queries = (search_query_hourly.queries + excluded.queries)" in sql
+
+
+def test_month_arithmetic_and_partition_names() -> None:
+    assert month_start(datetime(2026, 1, 31, 23, tzinfo=timezone.utc), -2) == datetime(2025, 11, 1, tzinfo=timezone.utc)
+    assert month_start(datetime(2026, 12, 5), 1) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+    assert partition_month("search_events", "search_events_p2026_03") == datetime(2026, 3, 1, tzinfo=timezone.utc)
+    assert partition_month("search_events", "search_events_default") is None
+    assert partition_month("search_events", "click_events_p2026_03") is None
+
+
+class _PartitionDb:
+    """Records DDL; statements containing ``fail_on`` raise and roll back their savepoint."""
+
+    def __init__(self, stray_rows: bool = False, fail_on: str | None = None) -> None:
+        self.stray_rows = stray_rows
+        self.fail_on = fail_on
+        self.statements: list[str] = []
+
+    async def execute(self, statement, _params=None):
+        sql = str(statement)
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError("lock timeout")
+        self.statements.append(sql)
+        return SimpleNamespace(scalar=lambda: self.stray_rows)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_partition_maintenance_creates_ahead_and_drops_expired(monkeypatch) -> None:
+    settings = get_search_settings()
+    monkeypatch.setattr(settings, "TRACKING_PARTITION_PREMAKE_MONTHS", 1)
+    monkeypatch.setattr(settings, "TRACKING_RETENTION_MONTHS", 3)
+    existing = {
+        "search_events": ["search_events_default", "search_events_p2025_12", "search_events_p2026_01"],
+        "click_events": ["click_events_p2026_04"],
+    }
+    monkeypatch.setattr(
+        partitions_module.TrackingPartitionService,
+        "list_partitions",
+        AsyncMock(side_effect=lambda _db, table: existing[table]),
+    )
+    db = _PartitionDb()
+    now = datetime(2026, 4, 15, tzinfo=timezone.utc)
+
+    created = await TrackingPartitionService.ensure_partitions(db, now)
+    dropped = await TrackingPartitionService.drop_expired_partitions(db, now)
+
+    assert created == ["search_events_p2026_04", "search_events_p2026_05", "click_events_p2026_05"]
+    # Retention of 3 months from April keeps January onwards.
+    assert dropped == ["search_events_p2025_12"]
+    statements = db.statements
+    assert statements[0] == 'LOCK TABLE "search_events_default" IN SHARE ROW EXCLUSIVE MODE'
+    assert statements[2] == (
+        'CREATE TABLE IF NOT EXISTS "search_events_p2026_04" PARTITION OF "search_events" '
+        "FOR VALUES FROM ('2026-04-01T00:00:00+00:00') TO ('2026-05-01T00:00:00+00:00')"
+    )
+    assert statements[-1] == 'DROP TABLE IF EXISTS "search_events_p2025_12"'
+
+
+@pytest.mark.asyncio
+async def test_partition_create_moves_rows_out_of_default_and_failures_do_not_block_drops(monkeypatch) -> None:
+    settings = get_search_settings()
+    monkeypatch.setattr(settings, "TRACKING_PARTITION_PREMAKE_MONTHS", 0)
+    monkeypatch.setattr(settings, "TRACKING_RETENTION_MONTHS", 3)
+    existing = {
+        "search_events": ["search_events_default", "search_events_p2025_12"],
+        "click_events": ["click_events_default", "click_events_p2025_12"],
+    }
+    monkeypatch.setattr(
+        partitions_module.TrackingPartitionService,
+        "list_partitions",
+        AsyncMock(side_effect=lambda _db, table: existing[table]),
+    )
+    now = datetime(2026, 4, 15, tzinfo=timezone.utc)
+
+    db = _PartitionDb(stray_rows=True)
+    assert await TrackingPartitionService.ensure_partitions(db, now) == ["search_events_p2026_04", "click_events_p2026_04"]
+    assert db.statements[2:6] == [
+        'CREATE TABLE "search_events_p2026_04" (LIKE "search_events" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        'INSERT INTO "search_events_p2026_04" SELECT * FROM "search_events_default" '
+        "WHERE created_at >= :start AND created_at < :end",
+        'DELETE FROM "search_events_default" WHERE created_at >= :start AND created_at < :end',
+        'ALTER TABLE "search_events" ATTACH PARTITION "search_events_p2026_04" '
+        "FOR VALUES FROM ('2026-04-01T00:00:00+00:00') TO ('2026-05-01T00:00:00+00:00')",
+    ]
+
+    db = _PartitionDb(stray_rows=True, fail_on='ATTACH PARTITION "search_events_p2026_04"')
+    assert await TrackingPartitionService.ensure_partitions(db, now) == ["click_events_p2026_04"]
+    assert await TrackingPartitionService.drop_expired_partitions(db, now) == [
+        "search_events_p2025_12",
+        "click_events_p2025_12",
+    ]
@@ -0,0 +1,314 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from apps.search import routes
+
+
+def _job(**overrides):
+    values = {
+        "id": "job-1",
+        "mode": "full",
+        "phase": "indexing",
+        "total": 100,
+        "processed": 40,
+        "indexed": 40,
+        "skipped": 0,
+        "deleted": 0,
+        "errors": [],
+        "created_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "started_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "finished_at": datetime(2026, 1, 1, 0, 0, 4, tzinfo=timezone.utc),
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[routes.get_db] = lambda: None
+    return app
+
+
+@pytest.mark.asyncio
+async def test_reindex_returns_job_id_immediately(monkeypatch):
+    start = AsyncMock(return_value=_job(phase="queued", started_at=None, finished_at=None, processed=0))
+    monkeypatch.setattr(routes.ReindexJobService, "start", start)
+
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        response = await client.post("/search/reindex", params={"mode": "incremental"})
+
+    assert response.status_code == 202
+    assert response.json()["job_id"] == "job-1"
+    assert start.await_args.kwargs["mode"] == "incremental"
+
+
+@pytest.mark.asyncio
+async def test_reindex_conflict_when_job_running(monkeypatch):
+    monkeypatch.setattr(
+        routes.ReindexJobService,
+        "start",
+        AsyncMock(side_effect=HTTPException(status_code=409, detail="Reindex job job-0 is already running")),
+    )
+
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        response = await client.post("/search/reindex")
+
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_reindex_status_reports_throughput(monkeypatch):
+    monkeypatch.setattr(routes.ReindexJobService, "get", AsyncMock(return_value=_job()))
+
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        response = await client.get("/search/reindex/job-1")
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["phase"] == "indexing"
+    assert body["duration_seconds"] == 4.0
+    assert body["docs_per_second"] == 10.0
+
+
+@pytest.mark.asyncio
+async def test_reindex_status_not_found(monkeypatch):
+    monkeypatch.setattr(routes.ReindexJobService, "get", AsyncMock(return_value=None))
+
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        response = await client.get("/search/reindex/missing")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_search_batch_returns_results_in_query_order(monkeypatch):
+    search_batch = AsyncMock(
+        return_value=[
+            ([{"type": "club", "entity_id": 1, "title": "AI Club", "score": 0.9}], False),
+            ([], True),
+        ]
+    )
+    monkeypatch.setattr(routes.SearchService, "semantic_search_batch", search_batch)
+
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        response = await client.post(
+            "/search/batch",
+            json={"queries": [{"q": "ai", "type": "club"}, {"q": "ai", "type": "news", "top_k": 3}]},
+        )
+
+    assert response.status_code == 200
+    assert [(result["total"], result["degraded"]) for result in response.json()["results"]] == [(1, False), (0, True)]
+    specs = search_batch.await_args.args[0]
+    assert [(spec["doc_type"], spec["top_k"]) for spec in specs] == [("club", 10), ("news", 3)]
+
+
+def _user_app() -> FastAPI:
+    app = _app()
+    user = SimpleNamespace(id=3, role=SimpleNamespace(value="member"))
+    app.dependency_overrides[routes.get_optional_current_user] = lambda: user
+    app.dependency_overrides[routes.get_required_current_user] = lambda: user
+    return app
+
+
+@pytest.mark.asyncio
+async def test_search_loads_preferences_while_searching(monkeypatch):
+    preferences_started = asyncio.Event()
+
+    async def load_preferences(_db, _user):
+        preferences_started.set()
+        return {"top_cities": [], "top_categories": [], "top_types": ["news"], "type_counts": {}}
+
+    async def semantic_search(**_kwargs):
+        # Only completes if the preferences stage was started before the vector search finished.
+        await asyncio.wait_for(preferences_started.wait(), timeout=1)
+        return [
+            {"type": "club", "entity_id": 1, "title": "Chess", "score": 0.5},
+            {"type": "news", "entity_id": 2, "title": "Chess news", "score": 0.49},
+        ], False
+
+    monkeypatch.setattr(routes, "_load_user_preferences", load_preferences)
+    monkeypatch.setattr(routes.SearchService, "semantic_search", semantic_search)
+    monkeypatch.setattr(routes.SearchTrackingService, "log_search_event", AsyncMock())
+
+    async with AsyncClient(transport=ASGITransport(app=_user_app()), base_url="http://test") as client:
+        response = await client.get("/search", params={"q": "chess"})
+
+    assert response.status_code == 200
+    assert [item["entity_id"] for item in response.json()["items"]] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_personalized_search_reranks_candidate_pool_before_cutting_top_k(monkeypatch):
+    async def load_preferences(_db, _user):
+        return {"top_cities": ["Almaty"], "top_categories": [], "top_types": [], "type_counts": {}}
+
+    hits = [{"type": "club", "entity_id": index, "title": f"Club {index}", "score": 0.9 - index * 0.01} for index in range(6)]
+    hits[4]["city"] = "Almaty"
+    semantic_search = AsyncMock(return_value=(hits, False))
+    monkeypatch.setattr(routes.get_search_settings(), "PERSONALIZATION_CANDIDATE_POOL", 6)
+    monkeypatch.setattr(routes.get_search_settings(), "PREF_CITY_WEIGHT", 0.1)
+    monkeypatch.setattr(routes, "_load_user_preferences", load_preferences)
+    monkeypatch.setattr(routes.SearchService, "semantic_search", semantic_search)
+    monkeypatch.setattr(routes.SearchTrackingService, "log_search_event", AsyncMock())
+
+    async with AsyncClient(transport=ASGITransport(app=_user_app()), base_url="http://test") as client:
+        response = await client.get("/search", params={"q": "chess", "top_k": 2})
+
+    assert semantic_search.await_args.kwargs["top_k"] == 6
+    assert [item["entity_id"] for item in response.json()["items"]] == [4, 0]
+
+
+@pytest.mark.asyncio
+async def test_search_degrades_when_optional_stages_fail(monkeypatch):
+    async def slow_preferences(_db, _user):
+        await asyncio.sleep(5)
+
+    db = SimpleNamespace(rollback=AsyncMock())
+    app = _user_app()
+    app.dependency_overrides[routes.get_db] = lambda: db
+    monkeypatch.setattr(routes.get_search_settings(), "PERSONALIZATION_TIMEOUT_SECONDS", 0.01)
+    monkeypatch.setattr(routes, "_load_user_preferences", slow_preferences)
+    monkeypatch.setattr(
+        routes.SearchService,
+        "semantic_search",
+        AsyncMock(return_value=([{"type": "club", "entity_id": 1, "title": "Chess", "score": 0.5}], False)),
+    )
+    monkeypatch.setattr(routes.SearchTrackingService, "log_search_event", AsyncMock(side_effect=RuntimeError("db down")))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/search", params={"q": "chess"})
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["score"] == 0.5
+    # The preferences load has its own session, so its timeout leaves the request session alone.
+    db.rollback.assert_not_awaited()
+    assert routes.stage_stats()["personalization"]["timeouts"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_search_reports_empty_degraded_answer(monkeypatch):
+    monkeypatch.setattr(routes.SearchService, "semantic_search", AsyncMock(return_value=([], True)))
+
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        response = await client.get("/search", params={"q": "chess"})
+
+    assert response.status_code == 200
+    assert response.json() == {"total": 0, "items": [], "degraded": True}
+
+
+@pytest.mark.asyncio
+async def test_recommend_falls_back_when_vector_stage_fails(monkeypatch):
+    profile = SimpleNamespace(profile_vector=[0.1, 0.2], recent_doc_ids=[])
+    fallback = AsyncMock(return_value=[{"type": "club", "entity_id": 9, "title": "Popular", "score": 0.0}])
+    monkeypatch.setattr(routes.SearchProfileService, "get", AsyncMock(return_value=profile))
+    monkeypatch.setattr(
+        routes.SearchService,
+        "recommend_by_profile_vector",
+        AsyncMock(side_effect=HTTPException(status_code=503, detail="Search service is temporarily unavailable.")),
+    )
+    monkeypatch.setattr(routes.SearchService, "fallback_recommendations", fallback)
+
+    async with AsyncClient(transport=ASGITransport(app=_user_app()), base_url="http://test") as client:
+        response = await client.get("/search/recommend")
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["entity_id"] == 9
+    fallback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_similar_passes_path_and_filters_to_service(monkeypatch):
+    similar_items = AsyncMock(return_value=[{"type": "news", "entity_id": 4, "title": "Шахматы", "score": 0.8}])
+    monkeypatch.setattr(routes.SearchService, "similar_items", similar_items)
+
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        response = await client.get("/search/similar/club/7", params={"type": "news", "city": "Almaty", "top_k": 3})
+        invalid = await client.get("/search/similar/user/7")
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["entity_id"] == 4
+    assert similar_items.await_args.kwargs == {
+        "doc_type": "club",
+        "entity_id": "7",
+        "top_k": 3,
+        "result_type": "news",
+        "city": "Almaty",
+        "category": None,
+        "status": None,
+    }
+    assert invalid.status_code == 422
+
+
+async def _orm_user_session():
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from apps.db.models import User
+    from apps.users.models import UserRole
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as connection:
+        await connection.run_sync(User.__table__.create)
+    session = async_sessionmaker(engine, expire_on_commit=False)()
+    session.add(User(id=3, email="member@example.com", hashed_password="x", role=UserRole.MEMBER))
+    await session.commit()
+    return engine, session, await session.get(User, 3)
+
+
+@pytest.mark.asyncio
+async def test_recommend_for_user_without_profile_keeps_orm_user_usable(monkeypatch):
+    engine, session, user = await _orm_user_session()
+    fallback = AsyncMock(return_value=[{"type": "club", "entity_id": 1, "title": "Chess", "score": 0.0}])
+    monkeypatch.setattr(routes, "_load_profile", AsyncMock(return_value=None))
+    monkeypatch.setattr(routes.SearchService, "fallback_recommendations", fallback)
+    app = _app()
+    app.dependency_overrides[routes.get_db] = lambda: session
+    app.dependency_overrides[routes.get_required_current_user] = lambda: user
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/search/recommend")
+    finally:
+        await session.close()
+        await engine.dispose()
+
+    assert response.status_code == 200
+    assert fallback.await_args.kwargs["user_role"] == "member"
+
+
+@pytest.mark.asyncio
+async def test_search_tracks_orm_user_after_personalization_timeout(monkeypatch):
+    engine, session, user = await _orm_user_session()
+
+    async def slow_preferences(_db, _user_id):
+        await asyncio.sleep(5)
+
+    log_search_event = AsyncMock()
+    monkeypatch.setattr(routes.get_search_settings(), "PERSONALIZATION_TIMEOUT_SECONDS", 0.01)
+    monkeypatch.setattr(routes, "_load_user_preferences", slow_preferences)
+    monkeypatch.setattr(
+        routes.SearchService,
+        "semantic_search",
+        AsyncMock(return_value=([{"doc_id": "d1", "type": "club", "entity_id": 1, "title": "Chess", "score": 0.5}], False)),
+    )
+    monkeypatch.setattr(routes.SearchTrackingService, "log_search_event", log_search_event)
+    app = _app()
+    app.dependency_overrides[routes.get_db] = lambda: session
+    app.dependency_overrides[routes.get_optional_current_user] = lambda: user
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/search", params={"q": "chess"})
+    finally:
+        await session.close()
+        await engine.dispose()
+
+    assert response.status_code == 200
+    assert log_search_event.await_args.kwargs["user_id"] == 3
+    assert log_search_event.await_args.kwargs["user_role"] == "member"
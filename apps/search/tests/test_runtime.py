@@ -0,0 +1,36 @@
+from apps.search import runtime
+from apps.search.config import SearchSettings
+
+
+def test_detect_cpu_quota_reads_cgroup_v2_and_v1(tmp_path) -> None:
+    (tmp_path / "cpu.max").write_text("250000 100000\n")
+    assert runtime.detect_cpu_quota(tmp_path) == 2.5
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert runtime.detect_cpu_quota(tmp_path) is None
+
+    v1_root = tmp_path / "v1"
+    (v1_root / "cpu").mkdir(parents=True)
+    (v1_root / "cpu" / "cpu.cfs_quota_us").write_text("150000")
+    (v1_root / "cpu" / "cpu.cfs_period_us").write_text("100000")
+    assert runtime.detect_cpu_quota(v1_root) == 1.5
+
+    (v1_root / "cpu" / "cpu.cfs_quota_us").write_text("-1")
+    assert runtime.detect_cpu_quota(v1_root) is None
+
+
+def test_thread_budget_splits_quota_between_workers(monkeypatch, tmp_path) -> None:
+    (tmp_path / "cpu.max").write_text("800000 100000\n")
+    monkeypatch.setattr(runtime.os, "sched_getaffinity", lambda _: set(range(16)))
+    monkeypatch.setattr(runtime, "get_search_settings", lambda: SearchSettings())
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+
+    budget = runtime.compute_thread_budget(cgroup_root=tmp_path)
+
+    assert (budget.cpu_count, budget.workers, budget.torch_threads) == (8, 4, 2)
+    assert budget.torch_interop_threads == 1
+    assert budget.executor_threads == 1
+    assert runtime.compute_thread_budget(workers=16, cgroup_root=tmp_path).torch_threads == 1
+
+    monkeypatch.setattr(runtime, "get_search_settings", lambda: SearchSettings(EMBEDDING_TORCH_THREADS=3))
+    assert runtime.compute_thread_budget(cgroup_root=tmp_path).torch_threads == 3
@@ -1,5 +1,12 @@
+import asyncio
 import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
 
+import pytest
+from fastapi import HTTPException
+
+from apps.search import service as service_module
 from apps.search.service import SearchService
 
 
@@ -82,6 +89,21 @@ def test_city_query_precision_filter_returns_nearest_number_when_exact_missing()
     assert filtered[0]["title"] == "Club 221"
 
 
+def test_build_point_stores_lexical_side_index_used_by_precision_filter() -> None:
+    point = SearchService.build_point(
+        {"type": "club", "entity_id": 7, "title": "Шахматы 222", "snippet": "Клуб  Шахматы для ВСЕХ"}, [0.1]
+    )
+
+    assert point.payload["search_text"] == "шахматы 222\nклуб  шахматы для всех"
+    assert point.payload["tokens"] == sorted({"шахматы", "222", "клуб", "для", "всех"})
+    assert point.payload["first_number"] == 222
+
+    hit = SearchService._normalize_hit(SimpleNamespace(payload=point.payload, score=0.5))
+    assert hit["tokens"] == frozenset({"шахматы", "222", "клуб", "для", "всех"})
+    assert SearchService._city_query_precision_filter([hit], q="клуб ШАХМАТ", city="Almaty") == [hit]
+    assert SearchService._city_query_precision_filter([hit], q="220", city="Almaty") == [hit]
+
+
 def test_city_query_precision_filter_keeps_items_without_city_constraint() -> None:
     items = [
         {
@@ -94,3 +116,251 @@ def test_city_query_precision_filter_keeps_items_without_city_constraint() -> No
     filtered = SearchService._city_query_precision_filter(items=items, q="chess", city=None)
 
     assert filtered == items
+
+
+@pytest.mark.asyncio
+async def test_rebuild_index_streams_chunks_with_bounded_in_flight_upserts(monkeypatch) -> None:
+    settings = service_module.get_search_settings()
+    monkeypatch.setattr(settings, "REINDEX_MAX_IN_FLIGHT", 2)
+
+    chunks = [
+        [{"type": "club", "entity_id": i, "title": f"Club {i}"} for i in range(start, start + 3)]
+        for start in range(0, 12, 3)
+    ]
+
+    async def iter_documents(_db, _chunk_size):
+        for chunk in chunks:
+            yield chunk
+
+    in_flight = 0
+    max_in_flight = 0
+    upserted: list[int] = []
+
+    async def upsert(collection_name, points):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        upserted.append(len(points))
+        in_flight -= 1
+
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=True))
+    monkeypatch.setattr(SearchService, "count_documents", AsyncMock(return_value=12))
+    monkeypatch.setattr(SearchService, "iter_documents", iter_documents)
+    monkeypatch.setattr(service_module, "encode_texts", AsyncMock(side_effect=lambda texts: [[0.0]] * len(texts)))
+    monkeypatch.setattr(service_module, "get_qdrant_client", lambda: SimpleNamespace(upsert=upsert))
+
+    reports: list[tuple[int, int]] = []
+
+    async def on_progress(progress) -> None:
+        reports.append((progress.processed, progress.total))
+
+    progress = await SearchService.rebuild_index(db=None, on_progress=on_progress)
+
+    assert progress.indexed == 12
+    assert upserted == [3, 3, 3, 3]
+    assert max_in_flight <= 2
+    assert reports[-1] == (12, 12)
+
+
+@pytest.mark.asyncio
+async def test_incremental_rebuild_skips_unchanged_and_deletes_stale_points(monkeypatch) -> None:
+    unchanged = {"type": "club", "entity_id": 1, "title": "Chess"}
+    changed = {"type": "club", "entity_id": 2, "title": "Chess v2"}
+    created = {"type": "news", "entity_id": 3, "title": "Fresh news"}
+    stale_doc_id = SearchService.build_doc_id("club", 99)
+    indexed_hashes = {
+        SearchService.build_doc_id("club", 1): SearchService.content_hash(unchanged),
+        SearchService.build_doc_id("club", 2): SearchService.content_hash({**changed, "title": "Chess v1"}),
+        stale_doc_id: "deadbeef",
+    }
+
+    async def iter_documents(_db, _chunk_size):
+        yield [unchanged, changed, created]
+
+    client = SimpleNamespace(upsert=AsyncMock(), delete=AsyncMock())
+    encode = AsyncMock(side_effect=lambda texts: [[0.0]] * len(texts))
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=True))
+    monkeypatch.setattr(SearchService, "count_documents", AsyncMock(return_value=3))
+    monkeypatch.setattr(SearchService, "iter_documents", iter_documents)
+    monkeypatch.setattr(SearchService, "fetch_indexed_hashes", AsyncMock(return_value=indexed_hashes))
+    monkeypatch.setattr(service_module, "encode_texts", encode)
+    monkeypatch.setattr(service_module, "get_qdrant_client", lambda: client)
+
+    progress = await SearchService.rebuild_index(db=None, mode="incremental")
+
+    assert progress.indexed == 2
+    assert progress.skipped == 1
+    assert progress.deleted == 1
+    encode.assert_awaited_once_with(["Chess v2", "Fresh news"])
+    upserted_points = client.upsert.await_args.kwargs["points"]
+    assert all(point.payload["content_hash"] for point in upserted_points)
+    assert client.delete.await_args.kwargs["points_selector"].points == [stale_doc_id]
+
+
+@pytest.mark.asyncio
+async def test_blue_green_rebuild_switches_alias_after_validation(monkeypatch) -> None:
+    async def iter_documents(_db, _chunk_size):
+        yield [{"type": "club", "entity_id": 1, "title": "Chess"}]
+
+    client = SimpleNamespace(
+        upsert=AsyncMock(),
+        delete=AsyncMock(),
+        delete_collection=AsyncMock(),
+        count=AsyncMock(return_value=SimpleNamespace(count=1)),
+    )
+    switch_alias = AsyncMock(return_value="clubverse_search_v20260101000000")
+    schedule_drop = Mock()
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=True))
+    monkeypatch.setattr(service_module, "drop_retired_index_versions", AsyncMock(return_value=[]))
+    monkeypatch.setattr(service_module, "create_index_version", AsyncMock(return_value="clubverse_search_v20260202000000"))
+    monkeypatch.setattr(service_module, "switch_alias", switch_alias)
+    monkeypatch.setattr(service_module, "schedule_index_version_drop", schedule_drop)
+    monkeypatch.setattr(SearchService, "count_documents", AsyncMock(return_value=1))
+    monkeypatch.setattr(SearchService, "iter_documents", iter_documents)
+    monkeypatch.setattr(SearchService, "fetch_indexed_hashes", AsyncMock(return_value={}))
+    monkeypatch.setattr(service_module, "encode_texts", AsyncMock(side_effect=lambda texts: [[0.0]] * len(texts)))
+    monkeypatch.setattr(service_module, "get_qdrant_client", lambda: client)
+
+    progress = await SearchService.rebuild_index(db=None, mode="blue_green")
+
+    assert progress.collection == "clubverse_search_v20260202000000"
+    assert client.upsert.await_args.kwargs["collection_name"] == "clubverse_search_v20260202000000"
+    switch_alias.assert_awaited_once_with("clubverse_search_v20260202000000")
+    assert schedule_drop.call_args.args[0] == "clubverse_search_v20260101000000"
+    client.delete_collection.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_blue_green_rebuild_keeps_alias_when_point_count_mismatches(monkeypatch) -> None:
+    async def iter_documents(_db, _chunk_size):
+        yield [{"type": "club", "entity_id": 1, "title": "Chess"}]
+
+    client = SimpleNamespace(
+        upsert=AsyncMock(),
+        delete=AsyncMock(),
+        delete_collection=AsyncMock(),
+        count=AsyncMock(return_value=SimpleNamespace(count=0)),
+    )
+    switch_alias = AsyncMock()
+    drop_version = AsyncMock(return_value=True)
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=True))
+    monkeypatch.setattr(service_module, "drop_index_version", drop_version)
+    monkeypatch.setattr(service_module, "drop_retired_index_versions", AsyncMock(return_value=[]))
+    monkeypatch.setattr(service_module, "create_index_version", AsyncMock(return_value="clubverse_search_v20260202000000"))
+    monkeypatch.setattr(service_module, "switch_alias", switch_alias)
+    monkeypatch.setattr(SearchService, "count_documents", AsyncMock(return_value=1))
+    monkeypatch.setattr(SearchService, "iter_documents", iter_documents)
+    monkeypatch.setattr(SearchService, "fetch_indexed_hashes", AsyncMock(return_value={}))
+    monkeypatch.setattr(service_module, "encode_texts", AsyncMock(side_effect=lambda texts: [[0.0]] * len(texts)))
+    monkeypatch.setattr(service_module, "get_qdrant_client", lambda: client)
+
+    with pytest.raises(HTTPException):
+        await SearchService.rebuild_index(db=None, mode="blue_green")
+
+    switch_alias.assert_not_awaited()
+    drop_version.assert_awaited_once_with("clubverse_search_v20260202000000")
+
+
+@pytest.mark.asyncio
+async def test_semantic_search_batch_embeds_distinct_queries_once_and_filters_per_query(monkeypatch) -> None:
+    from apps.search.cache import QueryVectorCache
+
+    encode = AsyncMock(side_effect=lambda texts, use_store: [[float(i)] for i, _ in enumerate(texts)])
+    search_batch = AsyncMock(
+        return_value=[
+            [
+                SimpleNamespace(payload={"type": "club", "title": "Шахматы"}, score=0.9),
+                SimpleNamespace(payload={"type": "club", "title": "Молочные коты"}, score=0.8),
+            ],
+            [SimpleNamespace(payload={"type": "news", "title": "Шахматы"}, score=0.7)],
+        ]
+    )
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=True))
+    monkeypatch.setattr(service_module, "encode_texts", encode)
+    monkeypatch.setattr(service_module, "search_points_batch", search_batch)
+    monkeypatch.setattr(service_module, "get_query_vector_cache", lambda: QueryVectorCache("test", 10, 60))
+
+    results = await SearchService.semantic_search_batch(
+        [
+            {"q": "шахматы", "top_k": 5, "doc_type": "club", "city": "Almaty"},
+            {"q": "шахматы", "top_k": 3, "doc_type": "news"},
+        ]
+    )
+
+    encode.assert_awaited_once_with(["шахматы"], use_store=False)
+    requests = search_batch.await_args.kwargs["requests"]
+    assert [request.limit for request in requests] == [5, 3]
+    assert requests[0].filter.must[0].match.value == "club"
+    assert [([item["title"] for item in items], degraded) for items, degraded in results] == [
+        (["Шахматы"], False),
+        (["Шахматы"], False),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_similar_items_queries_by_point_id_and_caches_until_upsert(monkeypatch) -> None:
+    from apps.search.cache import SimilarItemsCache
+
+    cache = SimilarItemsCache(max_entries=10, ttl_seconds=60)
+    recommend = AsyncMock(
+        return_value=[SimpleNamespace(payload={"doc_id": "n1", "type": "news", "entity_id": "4", "title": "Шахматы"}, score=0.8)]
+    )
+    client = SimpleNamespace(upsert=AsyncMock())
+    monkeypatch.setattr(service_module, "get_similar_cache", lambda: cache)
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=True))
+    monkeypatch.setattr(service_module, "recommend_points", recommend)
+    monkeypatch.setattr(service_module, "get_qdrant_client", lambda: client)
+    monkeypatch.setattr(service_module, "encode_texts", AsyncMock(return_value=[[0.1, 0.2]]))
+
+    first = await SearchService.similar_items("club", 7, top_k=5, result_type="news", city="Almaty")
+    second = await SearchService.similar_items("club", "7", top_k=5, result_type="news", city="Almaty")
+
+    doc_id = SearchService.build_doc_id("club", 7)
+    assert first == second and first[0]["entity_id"] == 4
+    recommend.assert_awaited_once()
+    assert recommend.await_args.kwargs["positive"] == [doc_id]
+    assert [condition.key for condition in recommend.await_args.kwargs["query_filter"].must] == ["type", "city"]
+
+    await SearchService.upsert_documents([{"type": "club", "entity_id": 7, "title": "Шахматы"}])
+    await SearchService.similar_items("club", 7, top_k=5, result_type="news", city="Almaty")
+
+    assert recommend.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_similar_items_returns_404_for_unindexed_document(monkeypatch) -> None:
+    from apps.search.cache import SimilarItemsCache
+
+    monkeypatch.setattr(service_module, "get_similar_cache", lambda: SimilarItemsCache(10, 60))
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=True))
+    monkeypatch.setattr(service_module, "recommend_points", AsyncMock(return_value=None))
+
+    with pytest.raises(HTTPException) as exc_info:
+        await SearchService.similar_items("club", 404, top_k=5)
+
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_semantic_search_pushes_lexical_stages_down_when_enabled(monkeypatch) -> None:
+    from apps.search.config import SearchSettings
+
+    def hit(title: str):
+        return SimpleNamespace(payload={"type": "club", "title": title, **SearchService.lexical_payload({"title": title})}, score=0.5)
+
+    # No phrase match survives, so the all-token stage answers.
+    search_batch = AsyncMock(return_value=[[], [hit("Твари молочные"), hit("Молочные и твари")], [hit("Коты")]])
+    monkeypatch.setattr(service_module, "get_search_settings", lambda: SearchSettings(SEARCH_LEXICAL_PUSHDOWN=True))
+    monkeypatch.setattr(service_module, "ensure_collection", AsyncMock(return_value=True))
+    monkeypatch.setattr(SearchService, "embed_query", AsyncMock(return_value=[0.1, 0.2]))
+    monkeypatch.setattr(service_module, "search_points_batch", search_batch)
+
+    items, degraded = await SearchService._semantic_search_uncached("Молочные  твари", top_k=5, city="Astana")
+
+    assert not degraded
+    assert [item["title"] for item in items] == ["Твари молочные", "Молочные и твари"]
+    phrase, text, plain = search_batch.await_args.kwargs["requests"]
+    assert phrase.filter.must[-1].match.phrase == "молочные твари"
+    assert text.filter.must[-1].match.text == "молочные твари"
+    assert [condition.key for condition in plain.filter.must] == ["city"]
@@ -0,0 +1,26 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from apps.search import warmup as warmup_module
+from apps.search.warmup import SearchWarmup
+
+
+@pytest.mark.asyncio
+async def test_warmup_reports_ready_only_after_all_steps(monkeypatch):
+    monkeypatch.setattr(warmup_module, "ensure_collection", AsyncMock(return_value=True))
+    model_step = AsyncMock(side_effect=RuntimeError("weights missing"))
+    monkeypatch.setattr(warmup_module, "_warm_embedding_model", model_step)
+    warmup = SearchWarmup()
+    assert not warmup.ready
+
+    warmup.start(extra_steps=[("employment_qdrant", AsyncMock(return_value=False))])
+    assert warmup.snapshot()["state"] == "running"
+    await warmup._task
+
+    snapshot = warmup.snapshot()
+    assert warmup.ready
+    assert snapshot["state"] == "failed"
+    assert snapshot["steps"]["qdrant"]["ok"] is True
+    assert snapshot["steps"]["employment_qdrant"]["error"] == "unavailable"
+    assert snapshot["steps"]["embedding_model"]["error"] == "weights missing"
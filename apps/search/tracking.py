@@ -4,33 +4,44 @@ import logging
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
-from sqlalchemy import desc, func, select
+from sqlalchemy import desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from apps.search.event_buffer import tracking_buffer
 from apps.search.models import ClickEvent, SearchEvent
+from apps.search.rollups import SearchRollupService
 from apps.users.models import User
 
 logger = logging.getLogger(__name__)
 
 
 class SearchTrackingService:
+    """Event rows go through tracking_buffer while it runs (see main.lifespan) and are written inline otherwise."""
+
     @staticmethod
     async def log_search_event(
         db: AsyncSession,
-        user: User | None,
+        user_id: int | None,
+        user_role: str | None,
         query_text: str,
         filters_json: dict[str, Any] | None,
         top_doc_ids: list[str],
     ) -> None:
-        event = SearchEvent(
-            user_id=user.id if user else None,
-            query_text=query_text,
-            role=user.role.value if user else None,
-            filters_json=filters_json,
-            top_doc_ids=top_doc_ids,
-        )
-        db.add(event)
+        # Plain values rather than the User: the request session may have been rolled back by an earlier stage.
+        row = {
+            "user_id": user_id,
+            "query_text": query_text,
+            "role": user_role,
+            "filters_json": filters_json,
+            "top_doc_ids": top_doc_ids,
+            "created_at": datetime.now(timezone.utc),
+        }
+        if await tracking_buffer.submit(SearchEvent, row):
+            return
+
+        db.add(SearchEvent(**row))
         try:
+            await SearchRollupService.apply(db, {SearchEvent: [row]})
             await db.commit()
         except Exception:
             await db.rollback()
@@ -53,15 +64,20 @@ class SearchTrackingService:
             doc_type = "unknown"
             entity_id = doc_id
 
-        event = ClickEvent(
-            user_id=user.id,
-            doc_id=doc_id,
-            doc_type=doc_type or "unknown",
-            entity_id=entity_id or doc_id,
-            position=position,
-            query_text=query_text,
-        )
-        db.add(event)
+        row = {
+            "user_id": user.id,
+            "doc_id": doc_id,
+            "doc_type": doc_type or "unknown",
+            "entity_id": entity_id or doc_id,
+            "position": position,
+            "query_text": query_text,
+            "created_at": datetime.now(timezone.utc),
+        }
+        if await tracking_buffer.submit(ClickEvent, row):
+            return
+
+        db.add(ClickEvent(**row))
+        await SearchRollupService.apply(db, {ClickEvent: [row]})
         await db.commit()
 
     @staticmethod
@@ -76,6 +92,5 @@ class SearchTrackingService:
 
     @staticmethod
     async def count_tracked_events_last_24h(db: AsyncSession) -> int:
-        since = datetime.now(timezone.utc) - timedelta(hours=24)
-        result = await db.execute(select(func.count(SearchEvent.id)).where(SearchEvent.created_at >= since))
-        return int(result.scalar() or 0)
+        # Hourly rollups instead of count(*) over the raw table; the window starts at the top of the hour.
+        return await SearchRollupService.count_queries_since(db, datetime.now(timezone.utc) - timedelta(hours=24))
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from apps.search.config import get_search_settings
+from apps.search.embeddings import encode_texts
+from apps.search.qdrant_client import ensure_collection
+
+logger = logging.getLogger(__name__)
+
+WarmupStep = tuple[str, Callable[[], Awaitable[Any]]]
+
+
+async def _warm_embedding_model() -> None:
+    # Loads the model (or connects to the embedding server) and pays for the first, slowest forward pass.
+    await encode_texts(["warm-up"], use_store=False)
+
+
+class SearchWarmup:
+    """Runs startup work in the background so the worker accepts requests (and liveness checks) immediately.
+
+    Readiness flips once every step has finished; a failed step is reported in
+    ``snapshot()`` but does not keep the worker out of rotation, since search
+    already degrades on its own when Qdrant or the model are unavailable.
+    """
+
+    def __init__(self) -> None:
+        self.state = "pending"
+        self.steps: dict[str, dict[str, Any]] = {}
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("ready", "failed", "disabled")
+
+    def start(self, extra_steps: list[WarmupStep] | None = None) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        steps: list[WarmupStep] = [("qdrant", ensure_collection), *(extra_steps or [])]
+        if get_search_settings().SEARCH_WARMUP_ENABLED:
+            steps.append(("embedding_model", _warm_embedding_model))
+        self.state = "running"
+        self.steps = {}
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self._task = asyncio.create_task(self._run(steps))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, steps: list[WarmupStep]) -> None:
+        failed = False
+        for name, step in steps:
+            step_started = time.monotonic()
+            try:
+                result = await step()
+                # ensure_* helpers report unavailability by returning False instead of raising.
+                error = "unavailable" if result is False else None
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("Startup warm-up step '%s' failed", name)
+                error = str(exc)
+            failed = failed or error is not None
+            self.steps[name] = {"ok": error is None, "error": error, "seconds": round(time.monotonic() - step_started, 3)}
+
+        self.finished_at = time.monotonic()
+        self.state = "failed" if failed else "ready"
+        logger.info("Startup warm-up %s in %.2fs", self.state, self.finished_at - (self.started_at or self.finished_at))
+
+    def snapshot(self) -> dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.monotonic()) - self.started_at, 3)
+        return {"state": self.state, "ready": self.ready, "elapsed_seconds": elapsed, "steps": dict(self.steps)}
+
+
+search_warmup = SearchWarmup()
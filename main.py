@@ -3,7 +3,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 
 # Импорт настроек
 from apps.core.settings import settings
@@ -21,16 +21,33 @@ from apps.news.routes import router as news_router
 from apps.reviews.routes import router as reviews_router
 from apps.ratings.routes import router as ratings_router
 # from apps.admin.setup import setup_admin
-from apps.search.qdrant_client import ensure_collection
+from apps.search.event_buffer import tracking_buffer
+from apps.search.local_index import local_index_snapshotter
+from apps.search.outbox import outbox_worker
+from apps.search.partitions import partition_worker
+from apps.search.qdrant_client import readiness_monitor
 from apps.search.routes import router as search_router
+from apps.search.warmup import search_warmup
 from apps.core.routes import router as media_router
 from apps.employment.routes import router as employment_router
 from apps.employment.qdrant import ensure_employment_collection
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    await ensure_collection()
-    await ensure_employment_collection()
+    # Qdrant и модель эмбеддингов прогреваются в фоне: воркер сразу принимает запросы, готовность — /health/ready.
+    search_warmup.start(extra_steps=[("employment_qdrant", ensure_employment_collection)])
+    readiness_monitor.start()
+    outbox_worker.start()
+    tracking_buffer.start()
+    partition_worker.start()
+    local_index_snapshotter.start()
     yield
+    await local_index_snapshotter.stop()
+    await partition_worker.stop()
+    # Буфер трекинга дописывает накопленные события до остановки воркера.
+    await tracking_buffer.stop()
+    await outbox_worker.stop()
+    await readiness_monitor.stop()
+    await search_warmup.stop()
 
 
 # Создание приложения
@@ -132,3 +149,13 @@ async def health_check():
     Используется Docker'ом или балансировщиком нагрузки.
     """
     return {"status": "ok", "version": "1.0.0"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Готовность принимать трафик (readiness): 503, пока идет фоновый прогрев поиска.
+    /health при этом остается liveness-проверкой и отвечает сразу.
+    """
+    warmup = search_warmup.snapshot()
+    return JSONResponse(status_code=200 if warmup["ready"] else 503, content={"ready": warmup["ready"], "warmup": warmup})
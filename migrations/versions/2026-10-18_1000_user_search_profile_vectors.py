@@ -0,0 +1,39 @@
+"""user search profile vectors
+
+Revision ID: 5b7a3e9c1d24
+Revises: 8e2d4b0c5f13
+Create Date: 2026-10-18 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7a3e9c1d24'
+down_revision: Union[str, Sequence[str], None] = '8e2d4b0c5f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_search_profiles', sa.Column('profile_vector', sa.JSON(), nullable=True))
+    op.add_column('user_search_profiles', sa.Column('profile_weight', sa.Float(), server_default=sa.text('0'), nullable=False))
+    op.add_column('user_search_profiles', sa.Column('city_weights', sa.JSON(), server_default=sa.text("'{}'"), nullable=False))
+    op.add_column('user_search_profiles', sa.Column('category_weights', sa.JSON(), server_default=sa.text("'{}'"), nullable=False))
+    op.add_column('user_search_profiles', sa.Column('type_weights', sa.JSON(), server_default=sa.text("'{}'"), nullable=False))
+    op.add_column('user_search_profiles', sa.Column('recent_doc_ids', sa.JSON(), server_default=sa.text("'[]'"), nullable=False))
+    op.add_column('user_search_profiles', sa.Column('last_click_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user_search_profiles', 'last_click_at')
+    op.drop_column('user_search_profiles', 'recent_doc_ids')
+    op.drop_column('user_search_profiles', 'type_weights')
+    op.drop_column('user_search_profiles', 'category_weights')
+    op.drop_column('user_search_profiles', 'city_weights')
+    op.drop_column('user_search_profiles', 'profile_weight')
+    op.drop_column('user_search_profiles', 'profile_vector')
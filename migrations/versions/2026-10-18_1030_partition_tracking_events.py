@@ -0,0 +1,157 @@
+"""partition tracking events, add hourly rollups
+
+Revision ID: c41e7b9d2a60
+Revises: 5b7a3e9c1d24
+Create Date: 2026-10-18 10:30:00.000000+00:00
+
+search_events and click_events are rebuilt as tables range-partitioned by month
+on created_at (PostgreSQL only): existing rows are copied into monthly
+partitions, ids keep coming from the same sequences. The copy holds an exclusive
+lock on both tables, so run it in a maintenance window on large installs.
+Further partitions are created and expired by apps.search.partitions.
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7b9d2a60'
+down_revision: Union[str, Sequence[str], None] = '5b7a3e9c1d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREMAKE_MONTHS = 2
+
+COLUMNS = {
+    'search_events': (
+        "user_id INTEGER, query_text VARCHAR(512) NOT NULL, role VARCHAR(64), "
+        "filters_json JSON, top_doc_ids JSON"
+    ),
+    'click_events': (
+        "user_id INTEGER NOT NULL, doc_id VARCHAR(255) NOT NULL, doc_type VARCHAR(32) NOT NULL, "
+        "entity_id VARCHAR(128) NOT NULL, position INTEGER, query_text VARCHAR(512)"
+    ),
+}
+INDEXES = {
+    'search_events': ['created_at', 'user_id'],
+    'click_events': ['created_at', 'doc_id', 'doc_type', 'user_id'],
+}
+
+
+def _month_start(value: datetime, offset: int = 0) -> datetime:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    months = value.year * 12 + value.month - 1 + offset
+    return datetime(months // 12, months % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _column_names(table: str) -> str:
+    names = [definition.split()[0] for definition in COLUMNS[table].split(', ')]
+    return ', '.join(['id', *names, 'created_at'])
+
+
+def _rebuild(table: str, partitioned: bool) -> None:
+    """Recreates ``table`` (partitioned or plain) under a temporary name, copies the rows and swaps it in."""
+    bind = op.get_bind()
+    new = f'{table}_new'
+    partition_clause = ' PARTITION BY RANGE (created_at)' if partitioned else ''
+    primary_key = 'id, created_at' if partitioned else 'id'
+    op.execute(
+        f"CREATE TABLE {new} ("
+        f"id INTEGER NOT NULL DEFAULT nextval('{table}_id_seq'), {COLUMNS[table]}, "
+        f"created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(), "
+        f"CONSTRAINT {new}_pkey PRIMARY KEY ({primary_key}), "
+        f"CONSTRAINT {new}_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE"
+        f"){partition_clause}"
+    )
+
+    if partitioned:
+        oldest = bind.execute(sa.text(f'SELECT min(created_at) FROM {table}')).scalar()
+        now = datetime.now(timezone.utc)
+        month, last = _month_start(oldest or now), _month_start(now, PREMAKE_MONTHS)
+        while month <= last:
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {new} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_month_start(month, 1).isoformat()}')"
+            )
+            month = _month_start(month, 1)
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {new} DEFAULT')
+
+    columns = _column_names(table)
+    op.execute(f'INSERT INTO {new} ({columns}) SELECT {columns} FROM {table}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+    op.execute(f'DROP TABLE {table}')
+    op.execute(f'ALTER TABLE {new} RENAME TO {table}')
+    op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT {new}_pkey TO {table}_pkey')
+    op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT {new}_user_id_fkey TO {table}_user_id_fkey')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    for column in INDEXES[table]:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+
+def _backfill_rollups() -> None:
+    hour = "date_trunc('hour', {column} AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'"
+    op.execute(
+        "INSERT INTO search_query_hourly (bucket, queries) "
+        f"SELECT {hour.format(column='created_at')}, count(*) FROM search_events GROUP BY 1"
+    )
+    op.execute(
+        "INSERT INTO search_click_hourly (bucket, doc_id, doc_type, clicks) "
+        f"SELECT {hour.format(column='created_at')}, doc_id, min(doc_type), count(*) FROM click_events GROUP BY 1, 2"
+    )
+    op.execute(
+        "INSERT INTO search_position_hourly (bucket, position, impressions, clicks) "
+        "SELECT bucket, position, sum(impressions), sum(clicks) FROM ("
+        f"  SELECT {hour.format(column='e.created_at')} AS bucket, p.position::integer AS position,"
+        "   count(*) AS impressions, 0 AS clicks"
+        "  FROM search_events e CROSS JOIN LATERAL json_array_elements("
+        "   CASE WHEN json_typeof(e.top_doc_ids) = 'array' THEN e.top_doc_ids ELSE '[]'::json END"
+        "  ) WITH ORDINALITY AS p(doc_id, position) GROUP BY 1, 2"
+        "  UNION ALL"
+        f"  SELECT {hour.format(column='created_at')}, position, 0, count(*)"
+        "  FROM click_events WHERE position IS NOT NULL GROUP BY 1, 2"
+        ") counts GROUP BY bucket, position"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('search_query_hourly',
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('queries', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket')
+    )
+    op.create_table('search_click_hourly',
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('doc_id', sa.String(length=255), nullable=False),
+    sa.Column('doc_type', sa.String(length=32), nullable=False),
+    sa.Column('clicks', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket', 'doc_id')
+    )
+    op.create_index(op.f('ix_search_click_hourly_doc_type'), 'search_click_hourly', ['doc_type'], unique=False)
+    op.create_table('search_position_hourly',
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('impressions', sa.Integer(), nullable=False),
+    sa.Column('clicks', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket', 'position')
+    )
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in ('search_events', 'click_events'):
+        _rebuild(table, partitioned=True)
+    _backfill_rollups()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in ('search_events', 'click_events'):
+            _rebuild(table, partitioned=False)
+
+    op.drop_table('search_position_hourly')
+    op.drop_index(op.f('ix_search_click_hourly_doc_type'), table_name='search_click_hourly')
+    op.drop_table('search_click_hourly')
+    op.drop_table('search_query_hourly')